@@ -0,0 +1,155 @@
+"""
+LLM synthesis under a traffic spike, without and with admission control.
+
+The synthetic index is built once and the engines generate through the OpenAI
+client against the local mock LLM server, which answers after `latency_ms` and
+returns 429 above `provider_concurrency` requests in flight (retried by the
+client with backoff). `clients` threads send the labelled queries at once, as
+the App does: every other query is a follow-up search (priority 1, the others 0)
+and each has a deadline `deadline_ms` after it was sent:
+- unbounded: every query starts its LLM request immediately,
+- admission: the synthesis waits for one of `provider_concurrency` slots, queries
+  that would wait more than `queue_budget_ms` or past their deadline get the
+  retrieved parcels instead.
+Reported per scenario: QPS, latency percentiles of all queries and of the
+generated answers, answers / retrieval-only / failed queries (also per priority),
+the 429 responses of the server, and the queue wait and shed rate of the
+admission controller.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.retrieval_benchmark import build_synthetic_index
+from indexes.index_query import PropertyQueryEngine
+from indexes.models import get_generation_llm
+from utilities.admission import AdmissionController
+from utilities.custom_logger import logger
+from utilities.metrics import registry, summary_stats
+
+
+def run_admission_benchmark(
+    work_dir: str,
+    num_parcels: int = 10000,
+    num_queries: int = 200,
+    clients: int = 32,
+    latency_ms: float = 500.0,
+    provider_concurrency: int = 4,
+    queue_budget_ms: float = 2000.0,
+    deadline_ms: float = 3000.0,
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    seed: int = 42,
+) -> dict:
+    persist_dir, labelled_queries, embedding_model, _ = build_synthetic_index(
+        work_dir,
+        num_parcels=num_parcels,
+        num_queries=num_queries,
+        embeddings_llm=embeddings_llm,
+        seed=seed,
+    )
+    # (query, priority): first searches and follow-up searches alternate
+    queries = [
+        (labelled_query["query"], i % 2)
+        for i, labelled_query in enumerate(labelled_queries)
+    ]
+    server = MockLLMServer(
+        latency_ms=latency_ms, max_concurrency=provider_concurrency
+    ).start()
+    os.environ["openai_api_base"] = server.url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    generation_llm = get_generation_llm("openai")
+
+    scenarios = {
+        "unbounded": None,
+        "admission": AdmissionController(
+            name="llm.admission",
+            max_concurrency=provider_concurrency,
+            queue_budget_s=queue_budget_ms / 1000.0,
+            max_queue=4 * clients,
+        ),
+    }
+    results = {
+        "config": {
+            "parcels": num_parcels,
+            "queries": len(queries),
+            "clients": clients,
+            "latency_ms": latency_ms,
+            "provider_concurrency": provider_concurrency,
+            "queue_budget_ms": queue_budget_ms,
+            "deadline_ms": deadline_ms,
+            "embeddings_llm": embeddings_llm,
+        },
+    }
+    try:
+        for name, admission in scenarios.items():
+            engine = PropertyQueryEngine(
+                persist_dir=persist_dir,
+                embedding_model=embedding_model,
+                generation_llm=generation_llm,
+                admission=admission,
+            )
+            # Warm-up query (embedding model, caches), not measured
+            engine.query(queries[0][0])
+            registry.reset()
+            rate_limited = server.stats["rate_limited"]
+
+            def timed_query(query: tuple) -> tuple:
+                query_text, priority = query
+                start = time.perf_counter()
+                deadline = time.monotonic() + deadline_ms / 1000.0
+                try:
+                    response = engine.query(
+                        query_text, priority=priority, deadline=deadline
+                    )
+                    metadata = getattr(response, "metadata", None) or {}
+                    outcome = (
+                        "retrieval_only" if metadata.get("retrieval_only") else "answer"
+                    )
+                except Exception as e:
+                    logger.error(f"Query failed: {e}")
+                    outcome = "failed"
+                return outcome, (time.perf_counter() - start) * 1000.0, priority
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                outcomes = list(executor.map(timed_query, queries))
+            seconds = time.perf_counter() - start
+
+            def outcome_counts(priority: int = None) -> dict:
+                return {
+                    outcome: sum(
+                        1
+                        for o, _, p in outcomes
+                        if o == outcome and priority in (None, p)
+                    )
+                    for outcome in ("answer", "retrieval_only", "failed")
+                }
+
+            counts = outcome_counts()
+            snapshot = registry.snapshot()
+            admitted = snapshot["counters"].get("llm.admission.admitted", 0)
+            shed = snapshot["counters"].get("llm.admission.shed", 0)
+            results[name] = {
+                "qps": len(queries) / seconds,
+                "latency_ms": summary_stats([ms for _, ms, _ in outcomes]),
+                "answer_latency_ms": summary_stats(
+                    [ms for outcome, ms, _ in outcomes if outcome == "answer"]
+                ),
+                "outcomes": counts,
+                "outcomes_by_priority": {
+                    priority: outcome_counts(priority) for priority in (0, 1)
+                },
+                "provider_429": server.stats["rate_limited"] - rate_limited,
+                "queue_wait_ms": snapshot["histograms"].get("llm.admission.queue_wait"),
+                "shed_rate": shed / (admitted + shed) if admitted + shed else 0.0,
+            }
+            logger.info(
+                f"{name}: {results[name]['qps']:.1f} QPS, "
+                f"p95 {results[name]['latency_ms']['p95']:.0f} ms, {counts}, "
+                f"{results[name]['provider_429']} provider 429 responses"
+            )
+    finally:
+        server.stop()
+    return results
@@ -0,0 +1,83 @@
+"""
+Load time of an index version: components loaded one after another from the JSON
+files, concurrently from the JSON files, and concurrently with the startup snapshot.
+
+The synthetic index is built once (local embedding model, mock LLM) and its
+snapshot written as run_build_indexes.py does. Each scenario then loads the
+components and builds a PropertyQueryEngine from them `repeats` times; the first
+load of each scenario warms up the page cache and imports and is not measured, so
+the timings compare parsing and building, not disk reads. Reported per scenario:
+load time percentiles and the speedup of the p50 over the sequential JSON load.
+"""
+
+import gc
+import time
+
+from benchmarks.retrieval_benchmark import build_synthetic_index
+from indexes.component_loader import load_components
+from indexes.index_query import PropertyQueryEngine
+from indexes.snapshot import write_snapshot
+from utilities.custom_logger import logger
+from utilities.metrics import summary_stats
+
+# name -> (max_workers, use_snapshot)
+scenarios = {
+    "sequential_json": (1, False),
+    "concurrent_json": (None, False),
+    "concurrent_snapshot": (None, True),
+}
+
+
+def run_component_load_benchmark(
+    work_dir: str,
+    num_parcels: int = 10000,
+    repeats: int = 5,
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    seed: int = 42,
+) -> dict:
+    persist_dir, _, embedding_model, generation_llm = build_synthetic_index(
+        work_dir,
+        num_parcels=num_parcels,
+        num_queries=0,
+        embeddings_llm=embeddings_llm,
+        seed=seed,
+    )
+    write_snapshot(persist_dir)
+
+    results = {
+        "config": {
+            "parcels": num_parcels,
+            "repeats": repeats,
+            "embeddings_llm": embeddings_llm,
+        },
+    }
+    for name, (max_workers, use_snapshot) in scenarios.items():
+        latencies = []
+        for i in range(repeats + 1):
+            gc.collect()
+            start = time.perf_counter()
+            components = load_components(
+                persist_dir, use_snapshot=use_snapshot, max_workers=max_workers
+            )
+            engine = PropertyQueryEngine(
+                persist_dir=persist_dir,
+                embedding_model=embedding_model,
+                generation_llm=generation_llm,
+                components=components,
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            del engine, components
+            if i > 0:
+                latencies.append(elapsed_ms)
+        results[name] = {"load_ms": summary_stats(latencies)}
+
+    baseline = results["sequential_json"]["load_ms"]["p50"]
+    for name in scenarios:
+        results[name]["speedup_p50"] = baseline / max(
+            results[name]["load_ms"]["p50"], 1e-9
+        )
+        logger.info(
+            f"{name}: p50 {results[name]['load_ms']['p50']:.0f} ms "
+            f"({results[name]['speedup_p50']:.1f}x)"
+        )
+    return results
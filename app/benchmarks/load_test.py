@@ -0,0 +1,275 @@
+"""
+Load generator for the running Gradio app.
+
+Requests are sent through Gradio's queue protocol (POST /gradio_api/queue/join, then
+the /gradio_api/queue/data event stream), the same way the browser does. The stream
+reports when a job leaves the queue ("process_starts"), so the queueing delay in the
+server is measured separately from the service time.
+
+Two arrival models are supported:
+- closed loop: `concurrency` virtual users, each sending its next query as soon
+  as the previous one returned (plus optional think time).
+- open loop: Poisson arrivals at `rate` requests/second, independent of how fast
+  the server answers. Requests that cannot be dispatched on time (all
+  `max_in_flight` slots busy) accumulate client lag, which is reported too.
+
+Only the standard library is used, so the driver runs anywhere the app runs.
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utilities.custom_logger import logger
+from utilities.metrics import percentile, summary_stats
+
+default_query_mix = [
+    "What properties are owned by 'Smith'",
+    "What properties are owned by 'Smeeth'",
+    "What properties are owned by 'Smithes'",
+    "Who owns 4001 CAMROSE DR",
+    "What properties are in BRADFORD ESTATES, BLK A",
+]
+
+
+def load_query_mix(file_path: str = None) -> list:
+    """
+    Queries to replay: a JSON list of strings or of labelled queries
+    (as written by run_benchmark.py), or a text file with one query per line.
+    """
+    if not file_path:
+        return list(default_query_mix)
+    with open(file_path, "r", encoding="utf-8") as file:
+        if file_path.endswith(".json"):
+            items = json.load(file)
+            return [item["query"] if isinstance(item, dict) else item for item in items]
+        return [line.strip() for line in file if line.strip()]
+
+
+class GradioQueueClient:
+    def __init__(self, base_url: str, api_name: str = "search", timeout: float = 120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.fn_index = self._resolve_fn_index(api_name)
+
+    def _resolve_fn_index(self, api_name: str) -> int:
+        with urllib.request.urlopen(
+            f"{self.base_url}/config", timeout=self.timeout
+        ) as response:
+            config = json.load(response)
+        for dependency in config["dependencies"]:
+            if dependency.get("api_name") == api_name:
+                return dependency["id"]
+        raise ValueError(f"API name '{api_name}' not found in the app config")
+
+    def call(self, data: list) -> dict:
+        """
+        Run one job and return its client side timestamps (perf_counter) and status.
+        """
+        session_hash = uuid.uuid4().hex
+        timings = {"sent": time.perf_counter(), "ok": False, "error": None}
+        body = json.dumps(
+            {
+                "data": data,
+                "fn_index": self.fn_index,
+                "session_hash": session_hash,
+                "event_data": None,
+                "trigger_id": None,
+            }
+        ).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/gradio_api/queue/join",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                json.load(response)
+            timings["enqueued"] = time.perf_counter()
+
+            stream_url = (
+                f"{self.base_url}/gradio_api/queue/data?session_hash={session_hash}"
+            )
+            with urllib.request.urlopen(stream_url, timeout=self.timeout) as stream:
+                for raw_line in stream:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    message = json.loads(line[len("data:") :])
+                    msg = message.get("msg")
+                    if msg == "process_starts":
+                        timings["started"] = time.perf_counter()
+                    elif msg == "process_completed":
+                        timings["ok"] = bool(message.get("success"))
+                        if not timings["ok"]:
+                            timings["error"] = str(message.get("output"))
+                        break
+                    elif msg == "unexpected_error":
+                        timings["error"] = message.get("message")
+                        break
+        except Exception as e:
+            timings["error"] = str(e)
+        timings["finished"] = time.perf_counter()
+        timings.setdefault("started", timings["finished"])
+        return timings
+
+
+def summarize(results: list, duration: float, service_time_ms: float = None) -> dict:
+    completed = [r for r in results if r["ok"]]
+    latencies = sorted((r["finished"] - r["sent"]) * 1000.0 for r in completed)
+    server_queue = sorted((r["started"] - r["sent"]) * 1000.0 for r in completed)
+    client_lag = sorted(
+        (r["sent"] - r["scheduled"]) * 1000.0 for r in results if "scheduled" in r
+    )
+
+    summary = {
+        "requests": len(results),
+        "completed": len(completed),
+        "errors": len(results) - len(completed),
+        "error_rate": (
+            (len(results) - len(completed)) / len(results) if results else 0.0
+        ),
+        "throughput_rps": len(completed) / duration if duration else 0.0,
+        "latency_ms": summary_stats(latencies),
+        "server_queue_delay_ms": summary_stats(server_queue),
+    }
+    if service_time_ms is not None:
+        # Time spent waiting anywhere, compared to an unloaded request
+        summary["queueing_delay_ms"] = summary_stats(
+            [max(latency - service_time_ms, 0.0) for latency in latencies]
+        )
+    if client_lag:
+        summary["client_lag_ms"] = summary_stats(client_lag)
+    return summary
+
+
+def request_data(query: str) -> list:
+    # Inputs of the "search" event: query, history (session state), profile flag
+    return [query, [], False]
+
+
+def measure_service_time(
+    client: GradioQueueClient, queries: list, samples: int = 5
+) -> float:
+    """
+    Median latency of sequential requests on an otherwise idle server.
+    """
+    latencies = []
+    for i in range(samples):
+        result = client.call(request_data(queries[i % len(queries)]))
+        if result["ok"]:
+            latencies.append((result["finished"] - result["sent"]) * 1000.0)
+    return percentile(sorted(latencies), 50) if latencies else None
+
+
+def run_closed_loop(
+    client: GradioQueueClient,
+    queries: list,
+    concurrency: int,
+    duration: float,
+    think_time: float = 0.0,
+    seed: int = 42,
+) -> tuple:
+    results = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(user_id: int) -> None:
+        rng = random.Random(seed + user_id)
+        while time.perf_counter() < deadline:
+            result = client.call(request_data(rng.choice(queries)))
+            with lock:
+                results.append(result)
+            if think_time:
+                time.sleep(rng.expovariate(1.0 / think_time))
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=user, args=(i,), daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def run_open_loop(
+    client: GradioQueueClient,
+    queries: list,
+    rate: float,
+    duration: float,
+    max_in_flight: int = 256,
+    seed: int = 42,
+) -> tuple:
+    rng = random.Random(seed)
+    results = []
+    lock = threading.Lock()
+
+    def send(query: str, scheduled: float) -> None:
+        result = client.call(request_data(query))
+        result["scheduled"] = scheduled
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    next_arrival = start
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while next_arrival < start + duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, rng.choice(queries), next_arrival)
+            next_arrival += rng.expovariate(rate)
+    # The arrival window lasts `duration` even if the last arrival came earlier
+    return results, max(time.perf_counter() - start, duration)
+
+
+def saturation_curve(
+    client: GradioQueueClient,
+    queries: list,
+    mode: str,
+    levels: list,
+    duration: float,
+    think_time: float = 0.0,
+    max_in_flight: int = 256,
+    seed: int = 42,
+) -> dict:
+    """
+    Run one load step per level (concurrency for closed loop, requests/second
+    for open loop) and collect a summary per step.
+    """
+    service_time_ms = measure_service_time(client, queries)
+    logger.info(f"Unloaded service time: {service_time_ms} ms")
+    steps = []
+    for level in levels:
+        logger.info(f"Load step: {mode} loop, level {level}, {duration}s")
+        if mode == "closed":
+            results, elapsed = run_closed_loop(
+                client, queries, int(level), duration, think_time, seed
+            )
+        else:
+            results, elapsed = run_open_loop(
+                client, queries, float(level), duration, max_in_flight, seed
+            )
+        summary = summarize(results, elapsed, service_time_ms)
+        summary["level"] = level
+        logger.info(
+            f"level={level} throughput={summary['throughput_rps']:.2f}/s "
+            f"p50={summary['latency_ms']['p50']:.0f}ms "
+            f"p95={summary['latency_ms']['p95']:.0f}ms "
+            f"queue p95={summary['server_queue_delay_ms']['p95']:.0f}ms "
+            f"errors={summary['error_rate']:.1%}"
+        )
+        steps.append(summary)
+    return {
+        "mode": mode,
+        "duration_per_level_s": duration,
+        "service_time_ms": service_time_ms,
+        "steps": steps,
+    }
@@ -0,0 +1,136 @@
+"""
+Per-request logging overhead of the previous synchronous handlers compared to the
+queue-based pipeline of utilities.custom_logger.
+
+Each simulated request logs what a query logs: the stage span records of the
+`gradio.metrics` logger, a few INFO lines and the full response at DEBUG level.
+Several threads log concurrently, as Gradio workers do, and the time spent in the
+log calls is measured on the calling thread. Scenarios:
+- sync: FileHandler and StreamHandler on the logger (formatting and I/O inline)
+- queue: QueueHandler, records written by the QueueListener thread
+- queue_json: as queue, with JSON output
+- queue_sampled: as queue, keeping 1% of the DEBUG records
+
+The console stream is redirected to a file of the work directory, so the numbers
+do not include terminal rendering (which makes synchronous logging slower still).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from utilities.custom_logger import (
+    attach_queue_handler,
+    create_output_handlers,
+    logger,
+)
+from utilities.metrics import summary_stats
+
+query_spans = [
+    "query.embed",
+    "query.vector_retrieve",
+    "query.auto_merge",
+    "query.prompt_assembly",
+    "query.llm",
+    "query.synthesize",
+    "query.total",
+]
+
+
+def log_request(target_logger: logging.Logger, request_id: int, response: str):
+    """
+    The records of one query, as logged by the query path.
+    """
+    metrics_logger = target_logger.getChild("metrics")
+    target_logger.info(f"Query: owner query number {request_id}")
+    for name in query_spans:
+        record = {"span": name, "duration_ms": 12.345, "request": request_id}
+        metrics_logger.info(json.dumps(record), extra={"json_fields": record})
+    target_logger.debug(f"Response: {response}")
+    target_logger.info(f"Query {request_id} completed")
+
+
+def run_scenario(
+    target_logger: logging.Logger, num_threads: int, requests_per_thread: int
+) -> dict:
+    response = "The owner of 6801 PRESTON RD is SMITH JOHN. " * 40
+    latencies = [[] for _ in range(num_threads)]
+
+    def worker(thread_index: int):
+        for i in range(requests_per_thread):
+            start = time.perf_counter()
+            log_request(target_logger, thread_index * requests_per_thread + i, response)
+            latencies[thread_index].append((time.perf_counter() - start) * 1e6)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return {
+        "request_overhead_us": summary_stats(
+            [value for values in latencies for value in values]
+        ),
+        "requests_per_second": num_threads * requests_per_thread / seconds,
+    }
+
+
+def run_logging_benchmark(
+    work_dir: str, num_threads: int = 8, requests_per_thread: int = 2000
+) -> dict:
+    os.makedirs(work_dir, exist_ok=True)
+    scenarios = {
+        "sync": {"queue": False, "log_format": "text", "sample_rate": 1.0},
+        "queue": {"queue": True, "log_format": "text", "sample_rate": 1.0},
+        "queue_json": {"queue": True, "log_format": "json", "sample_rate": 1.0},
+        "queue_sampled": {"queue": True, "log_format": "text", "sample_rate": 0.01},
+    }
+    results = {
+        "config": {
+            "threads": num_threads,
+            "requests_per_thread": requests_per_thread,
+            "records_per_request": len(query_spans) + 3,
+        }
+    }
+    for name, scenario in scenarios.items():
+        target_logger = logging.getLogger(f"benchmark_logging.{name}")
+        target_logger.setLevel(logging.DEBUG)
+        target_logger.propagate = False
+        console = open(os.path.join(work_dir, f"{name}_console.log"), "w")
+        handlers = create_output_handlers(
+            os.path.join(work_dir, f"{name}.log"),
+            stream=console,
+            log_format=scenario["log_format"],
+        )
+        listener = None
+        if scenario["queue"]:
+            listener = attach_queue_handler(
+                target_logger, handlers, debug_sample_rate=scenario["sample_rate"]
+            )
+        else:
+            for handler in handlers:
+                target_logger.addHandler(handler)
+
+        start = time.perf_counter()
+        results[name] = run_scenario(target_logger, num_threads, requests_per_thread)
+        if listener is not None:
+            # Time for the writer thread to catch up with the queued records
+            listener.stop()
+        results[name]["drain_seconds"] = time.perf_counter() - start
+        for handler in handlers:
+            target_logger.removeHandler(handler)
+            handler.close()
+        target_logger.handlers.clear()
+        console.close()
+
+        overhead = results[name]["request_overhead_us"]
+        logger.info(
+            f"{name}: {overhead['mean']:.1f} us/request mean, "
+            f"p99 {overhead['p99']:.1f} us, "
+            f"{results[name]['requests_per_second']:.0f} requests/s"
+        )
+    return results
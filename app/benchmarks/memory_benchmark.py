@@ -0,0 +1,115 @@
+"""
+Memory benchmark of the in-memory parcel representations used while building indexes.
+
+For a synthetic parcel CSV it measures, with tracemalloc, the memory retained by:
+- legacy_nodes: build_index.create_nodes (dict per row plus two TextNodes per parcel)
+- parcel_store: the columnar ParcelStore
+- parcel_store_batch: one batch of TextNodes materialized from the ParcelStore
+- legacy_items: the list of [text, dict] of the previous reader (legacy_read_items)
+- property_items: the columnar PropertyItems returned by read_csv_and_generate_items
+
+Sizes are reported in MB and scaled to MB per 100k parcels (the batch by its
+`batch_size` parcels, the others by `num_parcels`).
+"""
+
+import csv
+import gc
+import os
+import time
+import tracemalloc
+
+from benchmarks.synthetic_data import generate_parcels, write_parcels_csv
+from indexes.build_index import preprocess_csv, create_nodes
+from indexes.parcel_store import ParcelStore
+from indexes.property_appraisal_docs import (
+    key_for_search,
+    read_csv_and_generate_items,
+)
+from utilities.custom_logger import logger
+
+megabyte = 1024 * 1024
+
+
+def legacy_read_items(file_path: str) -> list:
+    """
+    The reader before PropertyItems: one [text, dict] per row, kept as reference.
+    """
+    items = []
+    with open(file_path, mode="r", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            text_string = ", ".join(
+                [f"{key_for_search.get(col, col)}: {val}" for col, val in row.items()]
+            )
+            remapped_dict = {
+                key_for_search.get(col, col): val for col, val in row.items()
+            }
+            items.append([text_string, remapped_dict])
+    return items
+
+
+def measure(build) -> dict:
+    """
+    Memory retained by the object returned from `build()` and the peak while building it.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"retained_bytes": retained, "peak_bytes": peak, "seconds": seconds}
+
+
+def run_memory_benchmark(
+    work_dir: str, num_parcels: int = 100000, batch_size: int = 10000, seed: int = 42
+) -> dict:
+    os.makedirs(work_dir, exist_ok=True)
+    csv_path = os.path.join(work_dir, "synthetic_parcels.csv")
+    logger.info(f"Generating {num_parcels} synthetic parcels")
+    write_parcels_csv(generate_parcels(num_parcels, seed=seed), csv_path)
+
+    df, filtered_df = preprocess_csv(csv_path)
+    del df
+    parcel_store = ParcelStore.from_dataframe(filtered_df)
+
+    measurements = {
+        "legacy_nodes": measure(lambda: create_nodes(filtered_df)),
+        "parcel_store": measure(lambda: ParcelStore.from_dataframe(filtered_df)),
+        "parcel_store_batch": measure(
+            lambda: next(parcel_store.iter_node_batches(batch_size))
+        ),
+        "legacy_items": measure(lambda: legacy_read_items(csv_path)),
+        "property_items": measure(lambda: read_csv_and_generate_items(csv_path)),
+    }
+
+    results = {
+        "config": {
+            "num_parcels": num_parcels,
+            "batch_size": batch_size,
+            "seed": seed,
+        },
+        "representations": {},
+    }
+    for name, measurement in measurements.items():
+        retained_mb = measurement["retained_bytes"] / megabyte
+        # The batch holds the nodes of `batch_size` parcels only
+        parcels = batch_size if name == "parcel_store_batch" else num_parcels
+        parcels = min(parcels, num_parcels)
+        results["representations"][name] = {
+            "retained_mb": retained_mb,
+            "peak_mb": measurement["peak_bytes"] / megabyte,
+            "parcels": parcels,
+            "retained_mb_per_100k": retained_mb * 100000 / parcels,
+            "seconds": measurement["seconds"],
+        }
+        logger.info(
+            f"{name}: retained {retained_mb:.1f} MB "
+            f"({retained_mb * 100000 / parcels:.1f} MB per 100k parcels), "
+            f"peak {measurement['peak_bytes'] / megabyte:.1f} MB, "
+            f"{measurement['seconds']:.2f}s"
+        )
+    return results
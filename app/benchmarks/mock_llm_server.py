@@ -0,0 +1,197 @@
+"""
+Local OpenAI compatible LLM server for load tests of the synthesis path.
+
+Serves POST <base>/chat/completions and <base>/completions (streamed or not)
+with the answers of the local mock LLM (the parcels found in the prompt), after
+a configurable delay, and behaves like a rate limited provider: requests above
+`max_concurrency` in flight or above `rate_limit` per second get a 429 response,
+which the OpenAI client retries with backoff. Point the App or a benchmark to it
+with `llm_backend=openai` and `openai_api_base=<url>` (any OPENAI_API_KEY).
+
+Classes:
+- MockLLMServer: The server, run in a background thread.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from indexes.mock_llm import mock_answer
+from utilities.admission import TokenBucket
+from utilities.custom_logger import logger
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections, as the OpenAI client uses them
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        # Requests are counted in the server stats, not logged one by one
+        pass
+
+    def send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            prompt = "\n".join(
+                str(message.get("content") or "")
+                for message in request.get("messages", [])
+            )
+            chat = True
+        elif self.path.endswith("/completions"):
+            prompt = str(request.get("prompt") or "")
+            chat = False
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        server = self.server.mock
+        if not server.admit():
+            self.send_json(
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached",
+                        "type": "rate_limit_exceeded",
+                    }
+                },
+            )
+            return
+        try:
+            text = mock_answer(prompt)
+            time.sleep(server.delay_seconds(text))
+            if request.get("stream"):
+                self.send_stream(request, text, chat)
+            else:
+                self.send_json(200, completion(request, prompt, text, chat))
+        finally:
+            server.done()
+
+    def send_stream(self, request: dict, text: str, chat: bool) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        if chat:
+            choices = [{"index": 0, "delta": {"role": "assistant", "content": text}}]
+            last = [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            kind = "chat.completion.chunk"
+        else:
+            choices = [{"index": 0, "text": text}]
+            last = [{"index": 0, "text": "", "finish_reason": "stop"}]
+            kind = "text_completion"
+        for chunk_choices in (choices, last):
+            chunk = {
+                "id": "mock-stream",
+                "object": kind,
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": chunk_choices,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def completion(request: dict, prompt: str, text: str, chat: bool) -> dict:
+    prompt_tokens = len(prompt.split())
+    completion_tokens = len(text.split())
+    if chat:
+        choice = {
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+            "logprobs": None,
+        }
+    else:
+        choice = {"index": 0, "text": text, "finish_reason": "stop", "logprobs": None}
+    return {
+        "id": "mock-completion",
+        "object": "chat.completion" if chat else "text_completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [choice],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class MockLLMServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 500.0,
+        latency_per_token_ms: float = 0.0,
+        max_concurrency: int = 0,
+        rate_limit: float = 0.0,
+    ):
+        """
+        `port` 0 picks a free port. `max_concurrency` and `rate_limit` (requests
+        per second) of 0 do not limit.
+        """
+        self.latency_ms = latency_ms
+        self.latency_per_token_ms = latency_per_token_ms
+        self.max_concurrency = max_concurrency
+        self._bucket = TokenBucket(rate_limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "max_in_flight": 0}
+        self._httpd = ThreadingHTTPServer((host, port), MockLLMHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def delay_seconds(self, text: str) -> float:
+        return (
+            self.latency_ms + self.latency_per_token_ms * len(text.split())
+        ) / 1000.0
+
+    def admit(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            over_concurrency = 0 < self.max_concurrency <= self._in_flight
+            if over_concurrency or self._bucket.take() > 0.0:
+                self.stats["rate_limited"] += 1
+                return False
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(
+                self.stats["max_in_flight"], self._in_flight
+            )
+            return True
+
+    def done(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-llm-server", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Mock LLM server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        logger.info(f"Mock LLM server stopped: {self.stats}")
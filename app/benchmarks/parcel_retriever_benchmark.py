@@ -0,0 +1,101 @@
+"""
+Dense retrieval through the ParcelRetriever compared to the AutoMergingRetriever.
+
+Both engines are loaded from the same synthetic index, without the owner name
+index, so every query takes the dense path. Each labelled query is embedded once
+and the same embedding is retrieved by both retrievers, so the timings only cover
+the FAISS search and the resolution of owner hits to parcels. Reported:
+- retrieval latency percentiles of both and the speedup,
+- agreement: share of queries where both returned the same parcels,
+- recall@k of both (the auto-merging retriever sorts its parents by descending
+  FAISS distance, the parcel retriever returns the nearest first).
+"""
+
+import time
+
+from llama_index.core.schema import QueryBundle
+
+from benchmarks.retrieval_benchmark import (
+    add_recalls,
+    average_recalls,
+    build_synthetic_index,
+    retrieved_property_ids,
+)
+from indexes.index_query import PropertyQueryEngine
+from utilities.custom_logger import logger
+from utilities.metrics import summary_stats
+
+
+def run_parcel_retriever_benchmark(
+    work_dir: str,
+    num_parcels: int = 10000,
+    num_queries: int = 200,
+    similarity_top_k: int = 20,
+    recall_ks: tuple = (1, 5, 10, 20),
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    seed: int = 42,
+) -> dict:
+    persist_dir, queries, embedding_model, generation_llm = build_synthetic_index(
+        work_dir,
+        num_parcels=num_parcels,
+        num_queries=num_queries,
+        embeddings_llm=embeddings_llm,
+        seed=seed,
+    )
+    retrievers = {}
+    for name, use_parcel_retriever in [("auto_merging", False), ("parcel", True)]:
+        engine = PropertyQueryEngine(
+            persist_dir=persist_dir,
+            embedding_model=embedding_model,
+            generation_llm=generation_llm,
+            similarity_top_k=similarity_top_k,
+            use_owner_name_index=False,
+            use_parcel_retriever=use_parcel_retriever,
+        )
+        retrievers[name] = (engine.query_engine.retriever, engine.storage_context)
+
+    latencies = {name: [] for name in retrievers}
+    recalls = {name: {} for name in retrievers}
+    agreements = 0
+    for i, labelled_query in enumerate(queries):
+        embedding = embedding_model.get_query_embedding(labelled_query["query"])
+        retrieved = {}
+        for name, (retriever, storage_context) in retrievers.items():
+            query_bundle = QueryBundle(
+                query_str=labelled_query["query"], embedding=embedding
+            )
+            start = time.perf_counter()
+            nodes = retriever.retrieve(query_bundle)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            retrieved[name] = retrieved_property_ids(nodes, storage_context.docstore)
+            # The first query warms up both retrievers
+            if i > 0:
+                latencies[name].append(elapsed_ms)
+            add_recalls(recalls[name], labelled_query, retrieved[name], recall_ks)
+        if set(retrieved["auto_merging"]) == set(retrieved["parcel"]):
+            agreements += 1
+
+    results = {
+        "config": {
+            "parcels": num_parcels,
+            "queries": len(queries),
+            "similarity_top_k": similarity_top_k,
+            "embeddings_llm": embeddings_llm,
+        },
+        "agreement": agreements / len(queries) if queries else 0.0,
+    }
+    for name in retrievers:
+        results[name] = {
+            "latency_ms": summary_stats(latencies[name]),
+            "recall": average_recalls(recalls[name]),
+        }
+    results["speedup_p50"] = results["auto_merging"]["latency_ms"]["p50"] / max(
+        results["parcel"]["latency_ms"]["p50"], 1e-9
+    )
+    logger.info(
+        f"Auto-merging p50 {results['auto_merging']['latency_ms']['p50']:.2f} ms, "
+        f"parcel retriever p50 {results['parcel']['latency_ms']['p50']:.2f} ms "
+        f"({results['speedup_p50']:.1f}x), same parcels for "
+        f"{results['agreement']:.1%} of the queries"
+    )
+    return results
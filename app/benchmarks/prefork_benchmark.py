@@ -0,0 +1,109 @@
+"""
+Throughput and memory of the pre-fork serving mode as the worker count grows.
+
+The synthetic index is built and loaded once in the parent process (local
+embedding model, mock LLM), then for each worker count a PreforkPool is forked
+from it and the labelled owner queries are sent by 2 client threads per worker.
+Reported per worker count:
+- QPS and request latency percentiles,
+- Pss of the parent and of each worker (shared pages are split between the
+  processes sharing them) and the total Pss, compared to N independent processes
+  (N times the Rss of the parent).
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.retrieval_benchmark import build_synthetic_index
+from indexes.index_query import PropertyQueryEngine
+from utilities.custom_logger import logger
+from utilities.metrics import summary_stats
+from utilities.prefork import PreforkPool, process_memory
+
+
+def run_prefork_benchmark(
+    work_dir: str,
+    num_parcels: int = 10000,
+    num_queries: int = 200,
+    levels: tuple = (1, 2, 4),
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    mock_latency_ms: float = 0.0,
+    seed: int = 42,
+) -> dict:
+    # The build runs the embedding model in this process; the workers limit torch
+    # and faiss to one thread, as OpenMP pools do not survive fork
+    persist_dir, labelled_queries, embedding_model, generation_llm = (
+        build_synthetic_index(
+            work_dir,
+            num_parcels=num_parcels,
+            num_queries=num_queries,
+            embeddings_llm=embeddings_llm,
+            mock_latency_ms=mock_latency_ms,
+            seed=seed,
+        )
+    )
+    queries = [labelled_query["query"] for labelled_query in labelled_queries]
+    engine = PropertyQueryEngine(
+        persist_dir=persist_dir,
+        embedding_model=embedding_model,
+        generation_llm=generation_llm,
+    )
+    parent_memory = process_memory(os.getpid())
+    logger.info(f"Parent process with the loaded engine: {parent_memory}")
+
+    def handler(query_text: str) -> str:
+        return str(engine.query(query_text))
+
+    results = {
+        "config": {
+            "parcels": num_parcels,
+            "queries": len(queries),
+            "embeddings_llm": embeddings_llm,
+            "mock_latency_ms": mock_latency_ms,
+            "cpus": os.cpu_count(),
+        },
+        "parent_memory_mb": parent_memory,
+        "levels": {},
+    }
+    for num_workers in levels:
+        pool = PreforkPool(handler, num_workers).start()
+        clients = 2 * num_workers
+        try:
+            # One warm-up query per worker (model and caches), not measured
+            for future in [pool.submit(queries[0]) for _ in range(num_workers)]:
+                future.result()
+
+            def timed_call(query_text: str) -> float:
+                start = time.perf_counter()
+                pool.call(query_text)
+                return (time.perf_counter() - start) * 1000.0
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                latencies = list(executor.map(timed_call, queries))
+            seconds = time.perf_counter() - start
+            memory = pool.memory()
+        finally:
+            pool.stop()
+
+        level = {
+            "clients": clients,
+            "qps": len(queries) / seconds,
+            "latency_ms": summary_stats(latencies),
+            "memory_mb": memory,
+            "pss_per_worker_mb": (memory["total_pss_mb"] - memory["parent"]["pss_mb"])
+            / num_workers,
+            "independent_processes_rss_mb": num_workers
+            * parent_memory.get("rss_mb", 0.0),
+        }
+        results["levels"][str(num_workers)] = level
+        logger.info(
+            f"{num_workers} workers: {level['qps']:.1f} QPS, "
+            f"p95 {level['latency_ms']['p95']:.0f} ms, "
+            f"total Pss {memory['total_pss_mb']:.0f} MB "
+            f"({level['pss_per_worker_mb']:.0f} MB per worker), "
+            f"vs {level['independent_processes_rss_mb']:.0f} MB for "
+            f"{num_workers} independent processes"
+        )
+    return results
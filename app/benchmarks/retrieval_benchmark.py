@@ -0,0 +1,335 @@
+"""
+Reproducible retrieval/latency benchmark for the property search pipeline.
+
+The benchmark runs fully offline:
+1) Generates a synthetic parcel CSV and labelled queries: owner names (exact and
+   misspelled), entity owners, and addresses and subdivisions that share words
+   with entity owner names.
+2) Builds the docstore and FAISS index with a small local embedding model.
+3) Loads the index with `PropertyQueryEngine`, using the deterministic `LocalMockLLM`.
+4) Runs the labelled queries and reports build throughput, index size, load time,
+   QPS, latency percentiles, recall@k and the tokens of context sent to synthesis.
+5) Optionally runs the same queries through a second engine with the cross-encoder
+   re-rank stage, and reports the latency it adds against the context tokens it saves.
+
+Results are plain dicts saved as JSON; `compare_results` flags regressions
+between two runs.
+"""
+
+import os
+import platform
+import time
+from datetime import datetime
+
+from benchmarks.synthetic_data import (
+    generate_parcels,
+    write_parcels_csv,
+    generate_labelled_queries,
+    write_queries,
+)
+from indexes.build_index import (
+    get_parcel_store,
+    build_docstore_index_from_store,
+)
+from indexes.models import get_models
+from indexes.index_query import PropertyQueryEngine, count_context_tokens
+from indexes.rerank import CrossEncoderReranker, default_rerank_model
+from indexes.query_metrics import get_callback_manager
+from utilities.custom_logger import logger
+from utilities.metrics import registry, span, summary_stats
+
+# (metric path, True if higher is better) checked by compare_results
+tracked_metrics = [
+    ("build.parcels_per_second", True),
+    ("index.size_bytes", False),
+    ("load.seconds", False),
+    ("query.qps", True),
+    ("query.retrieval_latency_ms.p95", False),
+    ("query.end_to_end_latency_ms.p95", False),
+    ("recall.exact.@20", True),
+    ("recall.fuzzy.@20", True),
+    ("recall.entity.@20", True),
+    ("recall.address.@20", True),
+    ("recall.subdivision.@20", True),
+    ("query.context_tokens.mean", False),
+]
+
+
+def directory_size(path: str) -> dict:
+    files = {}
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path):
+            files[name] = os.path.getsize(file_path)
+    return files
+
+
+def retrieved_property_ids(nodes: list, docstore) -> list:
+    """
+    Property IDs of the retrieved nodes in retrieval order.
+    Owner leaf nodes that were not merged are resolved through their parent.
+    """
+    property_ids = []
+    for node_with_score in nodes:
+        node = node_with_score.node
+        property_id = node.metadata.get("property_id")
+        if property_id is None and node.parent_node is not None:
+            parent = docstore.get_document(node.parent_node.node_id)
+            property_id = parent.metadata.get("property_id")
+        if property_id is not None and str(property_id) not in property_ids:
+            property_ids.append(str(property_id))
+    return property_ids
+
+
+def recall_at_k(retrieved: list, relevant: list, k: int) -> float:
+    relevant = set(relevant)
+    return len(relevant.intersection(retrieved[:k])) / len(relevant)
+
+
+def stage_summaries(prefix: str) -> dict:
+    histograms = registry.snapshot()["histograms"]
+    return {
+        name: stats for name, stats in histograms.items() if name.startswith(prefix)
+    }
+
+
+def build_synthetic_index(
+    work_dir: str,
+    num_parcels: int = 10000,
+    num_queries: int = 100,
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    mock_latency_ms: float = 0.0,
+    seed: int = 42,
+    queries_path: str = None,
+) -> tuple:
+    """
+    Synthetic parcels and labelled queries, indexed in work_dir/index-persist
+    with the local embedding model. Returns (persist_dir, labelled queries,
+    embedding model, mock LLM). The queries are also written to `queries_path`
+    when given, and the build (CSV parsing included) is timed as `build.total`.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    persist_dir = os.path.join(work_dir, "index-persist")
+    csv_path = os.path.join(work_dir, "synthetic_parcels.csv")
+
+    logger.info(f"Generating {num_parcels} synthetic parcels")
+    rows = generate_parcels(num_parcels, seed=seed)
+    write_parcels_csv(rows, csv_path)
+    queries = generate_labelled_queries(rows, num_queries, seed=seed)
+    if queries_path:
+        write_queries(queries, queries_path)
+    del rows
+
+    embedding_model, generation_llm = get_models(
+        embeddings_llm=embeddings_llm, llm_backend="mock"
+    )
+    generation_llm.latency_ms = mock_latency_ms
+    vector_dim = len(embedding_model.get_text_embedding("vector dimension probe"))
+    with span("build.total", parcels=num_parcels):
+        build_docstore_index_from_store(
+            get_parcel_store(csv_path),
+            persist_dir=persist_dir,
+            vector_dim=vector_dim,
+            embedding_model=embedding_model,
+        )
+    return persist_dir, queries, embedding_model, generation_llm
+
+
+def run_benchmark(
+    work_dir: str,
+    num_parcels: int = 10000,
+    num_queries: int = 100,
+    embeddings_llm: str = "BAAI/bge-small-en-v1.5",
+    similarity_top_k: int = 20,
+    recall_ks: tuple = (1, 5, 10, 20),
+    mock_latency_ms: float = 0.0,
+    seed: int = 42,
+    rerank_top_n: int = 0,
+    rerank_candidates: int = 50,
+    rerank_model: str = default_rerank_model,
+    use_owner_name_index: bool = True,
+) -> dict:
+    # 1) - 3) Synthetic data and labelled queries, models (local embeddings,
+    # deterministic mock LLM) and the build
+    registry.reset()
+    persist_dir, queries, embedding_model, generation_llm = build_synthetic_index(
+        work_dir,
+        num_parcels=num_parcels,
+        num_queries=num_queries,
+        embeddings_llm=embeddings_llm,
+        mock_latency_ms=mock_latency_ms,
+        seed=seed,
+        queries_path=os.path.join(work_dir, "labelled_queries.json"),
+    )
+    build_stages = stage_summaries("build.")
+    build_seconds = build_stages["build.total"]["max"] / 1000.0
+    index_files = directory_size(persist_dir)
+    callback_manager = get_callback_manager()
+    generation_llm.callback_manager = callback_manager
+    vector_dim = len(embedding_model.get_text_embedding("vector dimension probe"))
+
+    # 4) Load
+    load_start = time.perf_counter()
+    engine = PropertyQueryEngine(
+        persist_dir=persist_dir,
+        embedding_model=embedding_model,
+        generation_llm=generation_llm,
+        callback_manager=callback_manager,
+        similarity_top_k=similarity_top_k,
+        use_owner_name_index=use_owner_name_index,
+    )
+    load_seconds = time.perf_counter() - load_start
+    rerank_engine = None
+    if rerank_top_n:
+        rerank_engine = PropertyQueryEngine(
+            persist_dir=persist_dir,
+            embedding_model=embedding_model,
+            generation_llm=generation_llm,
+            callback_manager=callback_manager,
+            similarity_top_k=rerank_candidates,
+            reranker=CrossEncoderReranker(model=rerank_model, top_n=rerank_top_n),
+            use_owner_name_index=use_owner_name_index,
+        )
+        # Loads the cross-encoder; a query outside the set, so the cache stays cold
+        rerank_engine.retrieve("What properties are owned by 'warm up'")
+
+    # 5) Queries (one warm-up query is excluded from the numbers)
+    engine.query(queries[0]["query"])
+    registry.reset()
+    retrieval_latencies = []
+    end_to_end_latencies = []
+    context_tokens = []
+    recalls = {}
+    for labelled_query in queries:
+        start = time.perf_counter()
+        query_bundle, nodes = engine.retrieve(labelled_query["query"])
+        retrieved_at = time.perf_counter()
+        engine.query_engine.synthesize(query_bundle, nodes)
+        finished_at = time.perf_counter()
+        retrieval_latencies.append((retrieved_at - start) * 1000.0)
+        end_to_end_latencies.append((finished_at - start) * 1000.0)
+
+        context_tokens.append(count_context_tokens(nodes))
+
+        retrieved = retrieved_property_ids(nodes, engine.storage_context.docstore)
+        add_recalls(recalls, labelled_query, retrieved, recall_ks)
+    query_stages = stage_summaries("query.")
+
+    # 6) Same queries with the re-rank stage, compared query by query
+    rerank_latencies = []
+    rerank_context_tokens = []
+    rerank_recalls = {}
+    if rerank_engine is not None:
+        registry.reset()
+        for labelled_query in queries:
+            start = time.perf_counter()
+            _, nodes = rerank_engine.retrieve(labelled_query["query"])
+            rerank_latencies.append((time.perf_counter() - start) * 1000.0)
+            rerank_context_tokens.append(count_context_tokens(nodes))
+            retrieved = retrieved_property_ids(
+                nodes, rerank_engine.storage_context.docstore
+            )
+            add_recalls(rerank_recalls, labelled_query, retrieved, recall_ks)
+
+    total_query_seconds = sum(end_to_end_latencies) / 1000.0
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "num_parcels": num_parcels,
+            "num_queries": len(queries),
+            "embeddings_llm": embeddings_llm,
+            "vector_dim": vector_dim,
+            "similarity_top_k": similarity_top_k,
+            "mock_latency_ms": mock_latency_ms,
+            "seed": seed,
+            "owner_name_index": use_owner_name_index,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "build": {
+            "parcels": num_parcels,
+            "seconds": build_seconds,
+            "parcels_per_second": num_parcels / build_seconds,
+            "stages": build_stages,
+        },
+        "index": {
+            "size_bytes": sum(index_files.values()),
+            "files": index_files,
+        },
+        "load": {"seconds": load_seconds},
+        "query": {
+            "count": len(queries),
+            "qps": len(queries) / total_query_seconds,
+            "retrieval_latency_ms": summary_stats(retrieval_latencies),
+            "end_to_end_latency_ms": summary_stats(end_to_end_latencies),
+            "stages": query_stages,
+            "context_tokens": summary_stats(context_tokens),
+        },
+        "recall": average_recalls(recalls),
+    }
+    if rerank_engine is not None:
+        baseline_tokens = results["query"]["context_tokens"]["mean"]
+        reranked_tokens = sum(rerank_context_tokens) / len(rerank_context_tokens)
+        results["rerank"] = {
+            "model": rerank_model,
+            "candidates": rerank_candidates,
+            "top_n": rerank_top_n,
+            "retrieval_latency_ms": summary_stats(rerank_latencies),
+            "added_latency_ms": summary_stats(
+                [
+                    reranked - baseline
+                    for reranked, baseline in zip(rerank_latencies, retrieval_latencies)
+                ]
+            ),
+            "context_tokens": summary_stats(rerank_context_tokens),
+            "context_tokens_saved": baseline_tokens - reranked_tokens,
+            "stages": stage_summaries("query."),
+            "recall": average_recalls(rerank_recalls),
+        }
+    return results
+
+
+def add_recalls(recalls: dict, labelled_query: dict, retrieved: list, ks) -> None:
+    for kind in (labelled_query["kind"], "all"):
+        for k in ks:
+            recalls.setdefault(kind, {}).setdefault(f"@{k}", []).append(
+                recall_at_k(retrieved, labelled_query["relevant_property_ids"], k)
+            )
+
+
+def average_recalls(recalls: dict) -> dict:
+    return {
+        kind: {k: sum(values) / len(values) for k, values in by_k.items()}
+        for kind, by_k in recalls.items()
+    }
+
+
+def get_metric(results: dict, path: str):
+    value = results
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.1) -> list:
+    """
+    Return a list of human readable regressions of the tracked metrics,
+    where the current run is worse than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for path, higher_is_better in tracked_metrics:
+        old = get_metric(baseline, path)
+        new = get_metric(current, path)
+        if old is None or new is None or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if higher_is_better else change
+        logger.info(f"{path}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+        if worse > tolerance:
+            regressions.append(f"{path} regressed {worse:.1%}: {old:.4g} -> {new:.4g}")
+    return regressions
@@ -0,0 +1,168 @@
+"""
+Startup-time profile of the App, to be tracked across releases.
+
+Each measurement runs in a fresh Python process (nothing imported or cached yet):
+- imports: `python -X importtime -c "import gradio_app.app"`, reported as the total
+  import time, the import time per top-level package and the slowest modules.
+  `heavy_modules` tells which heavy or build-only modules the import loaded.
+- load: imports indexes.index_query and creates the QueryEngineSingleton from the
+  .env settings, reported as the `startup.*` stages of the metrics registry
+  (models, vector store, docstore, index and the smaller indexes).
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from utilities.custom_logger import logger
+
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the serving import should not load (pandas is loaded by gradio itself)
+heavy_modules = [
+    "pandas",
+    "pyarrow",
+    "faiss",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "openai",
+    "llama_index.llms.openai",
+    "llama_index.embeddings.huggingface",
+    "indexes.build_index",
+]
+
+result_marker = "STARTUP_PROFILE_RESULT "
+
+load_script = f"""
+import json
+import time
+
+from utilities.metrics import record_duration, registry
+
+start = time.perf_counter()
+from indexes.index_query import QueryEngineSingleton
+
+record_duration("startup.import_index_query", (time.perf_counter() - start) * 1000)
+QueryEngineSingleton()
+record_duration("startup.total", (time.perf_counter() - start) * 1000)
+print({result_marker!r} + json.dumps(registry.snapshot()["histograms"]))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    (module, self_us, cumulative_us, depth) for each `-X importtime` line.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def profile_imports(module: str = "gradio_app.app", top_n: int = 25) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    modules = parse_importtime(completed.stderr)
+
+    packages = {}
+    for name, self_us, _, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    slowest = sorted(modules, key=lambda entry: entry[1], reverse=True)[:top_n]
+    loaded = {name for name, _, _, _ in modules}
+    return {
+        "module": module,
+        "total_ms": sum(entry[2] for entry in modules if entry[3] == 0) / 1000,
+        "modules_loaded": len(modules),
+        "packages_ms": {
+            package: self_us / 1000
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )[:top_n]
+        },
+        "slowest_modules": [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cum_us / 1000}
+            for name, self_us, cum_us, _ in slowest
+        ],
+        "heavy_modules": {name: name in loaded for name in heavy_modules},
+    }
+
+
+def profile_load() -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", load_script],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith(result_marker):
+            histograms = json.loads(line[len(result_marker) :])
+            return {
+                name: stats["mean"]
+                for name, stats in histograms.items()
+                if name.startswith("startup.")
+            }
+    raise RuntimeError(f"Loading the query engine failed:\n{completed.stderr}")
+
+
+def run_startup_profile(load: bool = True, top_n: int = 25) -> dict:
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "imports": profile_imports(top_n=top_n),
+    }
+    imports = results["imports"]
+    logger.info(
+        f"Import of {imports['module']}: {imports['total_ms']:.0f} ms, "
+        f"{imports['modules_loaded']} modules"
+    )
+    for package, ms in list(imports["packages_ms"].items())[:10]:
+        logger.info(f"  {package}: {ms:.0f} ms")
+    loaded = [name for name, found in imports["heavy_modules"].items() if found]
+    logger.info(f"Heavy modules loaded on import: {loaded or 'none'}")
+
+    if load:
+        results["load_ms"] = profile_load()
+        for name, ms in results["load_ms"].items():
+            logger.info(f"{name}: {ms:.0f} ms")
+    return results
+
+
+def compare_startup(baseline: dict, current: dict, tolerance: float = 0.2) -> list:
+    """
+    Regressions of the total import time and of the load stages, ignoring changes
+    below 50 ms (noise of a single cold start).
+    """
+    pairs = [("imports.total_ms", baseline["imports"], current["imports"], "total_ms")]
+    for name in current.get("load_ms", {}):
+        pairs.append(
+            (f"load_ms.{name}", baseline.get("load_ms", {}), current["load_ms"], name)
+        )
+    regressions = []
+    for path, old_values, new_values, key in pairs:
+        old, new = old_values.get(key), new_values.get(key)
+        if old is None or new is None or old == 0:
+            continue
+        change = (new - old) / old
+        logger.info(f"{path}: {old:.0f} -> {new:.0f} ms ({change:+.1%})")
+        if change > tolerance and new - old > 50:
+            regressions.append(f"{path} regressed {change:.1%}: {old:.0f} -> {new:.0f}")
+    for name, found in current["imports"]["heavy_modules"].items():
+        if found and not baseline["imports"]["heavy_modules"].get(name):
+            regressions.append(f"{name} is now imported on startup")
+    return regressions
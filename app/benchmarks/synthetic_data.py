@@ -0,0 +1,651 @@
+"""
+Synthetic parcel dataset in the Collin CAD appraisal schema.
+
+The generator is deterministic for a given seed. Every owner gets a unique
+"LAST FIRST M" name and owns one to three parcels, so labelled owner queries
+(exact and misspelled surname) have a known set of relevant property IDs.
+About one owner in twenty is an entity named after a street or subdivision
+("CAMROSE HOLDINGS LLC", "BRADFORD ESTATES HOA"), so that address and
+subdivision queries share words with owner names, as in the real data.
+
+Functions:
+- generate_parcels(num_parcels, seed): Returns the rows as a list of dicts.
+- write_parcels_csv(rows, file_path): Writes the rows with the full appraisal header.
+- generate_owner_queries(rows, num_queries, seed): Returns labelled exact/fuzzy owner queries.
+- generate_entity_queries(rows, num_queries, seed): Returns labelled entity owner queries.
+- generate_address_queries(rows, num_queries, seed): Returns labelled address and
+  subdivision queries, on streets and subdivisions that entity owners are named after.
+- generate_labelled_queries(rows, num_queries, seed): All of the above.
+- write_queries(queries, file_path): Saves the labelled queries as JSON.
+"""
+
+import csv
+import json
+import random
+
+# Column order of Collin_CAD_Appraisal_Data_2024 (preprocess_csv relies on positions)
+appraisal_columns = [
+    "propYear",
+    "propID",
+    "geoID",
+    "propType",
+    "propSubType",
+    "propCategoryCode",
+    "propUseCode",
+    "mapID",
+    "nbhdCode",
+    "marketAreaCode",
+    "legalAbsSubCode",
+    "legalAbsSubName",
+    "legalAbsSubBlock",
+    "legalAbsSubLot",
+    "legalDescription",
+    "dbaName",
+    "comPropFlag",
+    "udiPropFlag",
+    "udiGroupID",
+    "udiInterestPct",
+    "commonInterestPct",
+    "ecoGroupID",
+    "ecoGroupGBA",
+    "ecoGroupNRA",
+    "propSplitFromPID",
+    "propCreateDate",
+    "entityCodes",
+    "entitySchoolCode",
+    "entityCityCode",
+    "entityMUD",
+    "entityTIF",
+    "entitySBCL",
+    "situsBldgNum",
+    "situsStreetPrefix",
+    "situsStreetName",
+    "situsStreetSuffix",
+    "situsUnit",
+    "situsCity",
+    "situsZip",
+    "situsConcat",
+    "situsConcatShort",
+    "ownerID",
+    "ownerName",
+    "ownerNameAddtl",
+    "ownerAddrLine1",
+    "ownerAddrLine2",
+    "ownerAddrCity",
+    "ownerAddrState",
+    "ownerAddrZip",
+    "ownerAddrCountry",
+    "taxAgentID",
+    "taxAgentName",
+    "deedTypeCd",
+    "deedNum",
+    "deedBook",
+    "deedPage",
+    "deedEffDate",
+    "deedFileDate",
+    "imprvYearBuilt",
+    "imprvClassCd",
+    "imprvMainArea",
+    "imprvUnits",
+    "imprvPoolFlag",
+    "imprvCategoryCodes",
+    "landTypeCode",
+    "landSizeAcres",
+    "landSizeSqft",
+    "landAgAcres",
+    "landCategoryCodes",
+    "exemptCodes",
+    "exemptHmstdFlag",
+    "protestCode",
+    "propStatus",
+    "currValYear",
+    "currValImprv",
+    "currValLand",
+    "currValMarket",
+    "currValAgLoss",
+    "currValAppraised",
+    "currValHSCapLoss",
+    "currValNHSCapLoss",
+    "currValAssessed",
+    "prevValYear",
+    "prevValImprv",
+    "prevValLand",
+    "prevValMarket",
+    "prevValAgLoss",
+    "prevValAppraised",
+    "prevValHSCapLoss",
+    "prevValNHSCapLoss",
+    "prevValAssessed",
+    "noticeYear",
+    "noticeValImprv",
+    "noticeValLand",
+    "noticeValMarket",
+    "noticeValAgLoss",
+    "noticeValAppraised",
+    "noticeValHSCapLoss",
+    "noticeValNHSCapLoss",
+    "noticeValAssessed",
+    "noticeDate",
+    "dataDate",
+]
+
+surnames = [
+    "SMITH",
+    "JOHNSON",
+    "WILLIAMS",
+    "BROWN",
+    "JONES",
+    "GARCIA",
+    "MILLER",
+    "DAVIS",
+    "RODRIGUEZ",
+    "MARTINEZ",
+    "HERNANDEZ",
+    "LOPEZ",
+    "GONZALEZ",
+    "WILSON",
+    "ANDERSON",
+    "THOMAS",
+    "TAYLOR",
+    "MOORE",
+    "JACKSON",
+    "MARTIN",
+    "LEE",
+    "PEREZ",
+    "THOMPSON",
+    "WHITE",
+    "HARRIS",
+    "SANCHEZ",
+    "CLARK",
+    "RAMIREZ",
+    "LEWIS",
+    "ROBINSON",
+    "WALKER",
+    "YOUNG",
+    "ALLEN",
+    "KING",
+    "WRIGHT",
+    "SCOTT",
+    "TORRES",
+    "NGUYEN",
+    "HILL",
+    "FLORES",
+    "GREEN",
+    "ADAMS",
+    "NELSON",
+    "BAKER",
+    "HALL",
+    "RIVERA",
+    "CAMPBELL",
+    "MITCHELL",
+    "CARTER",
+    "ROBERTS",
+    "PATEL",
+    "SHAH",
+    "GUPTA",
+    "KUMAR",
+    "SINGH",
+    "CHEN",
+    "WANG",
+    "LIU",
+    "ZHANG",
+    "KIM",
+    "PARK",
+    "CHOI",
+    "TRAN",
+    "PHAM",
+    "KOWALCZYK",
+    "NOWAK",
+    "MUELLER",
+    "SCHMIDT",
+    "SCHNEIDER",
+    "FISCHER",
+    "WEBER",
+    "ROSSI",
+    "RUSSO",
+    "FERRARI",
+    "ESPOSITO",
+    "BIANCHI",
+    "ROMANO",
+    "COLOMBO",
+    "OKAFOR",
+    "ADEYEMI",
+    "MENSAH",
+    "OWUSU",
+    "HOLLOWAY",
+    "WHITAKER",
+    "LANCASTER",
+    "PRESTON",
+    "CALLOWAY",
+    "DRISCOLL",
+    "FAIRBANKS",
+    "GALLAGHER",
+    "HAWTHORNE",
+    "KENSINGTON",
+    "MCALLISTER",
+    "PEMBERTON",
+    "RUTHERFORD",
+    "STANFIELD",
+    "THORNTON",
+    "WAINWRIGHT",
+    "YARBROUGH",
+    "ZIMMERMAN",
+]
+# Extra surnames built from syllables, to grow the owner pool for large datasets
+surname_prefixes = [
+    "ABER",
+    "BALD",
+    "CARR",
+    "DUNS",
+    "ELLS",
+    "FARN",
+    "GLAD",
+    "HART",
+    "INGL",
+    "JARR",
+    "KEND",
+    "LANG",
+    "MARS",
+    "NORT",
+    "OSTR",
+    "PARR",
+    "QUIN",
+    "RADC",
+    "SALT",
+    "TREM",
+]
+surname_suffixes = [
+    "WORTH",
+    "FIELD",
+    "MORE",
+    "TON",
+    "WELL",
+    "LEY",
+    "BROOK",
+    "DALE",
+    "FORD",
+    "HAM",
+    "INGS",
+    "MAN",
+    "ROSS",
+    "STEAD",
+    "WICK",
+    "WOOD",
+    "BURN",
+    "COTT",
+    "DEN",
+    "LOW",
+]
+first_names = [
+    "JAMES",
+    "MARY",
+    "ROBERT",
+    "PATRICIA",
+    "JOHN",
+    "JENNIFER",
+    "MICHAEL",
+    "LINDA",
+    "DAVID",
+    "ELIZABETH",
+    "WILLIAM",
+    "BARBARA",
+    "RICHARD",
+    "SUSAN",
+    "JOSEPH",
+    "JESSICA",
+    "THOMAS",
+    "SARAH",
+    "CHARLES",
+    "KAREN",
+    "CHRISTOPHER",
+    "LISA",
+    "DANIEL",
+    "NANCY",
+    "MATTHEW",
+    "BETTY",
+    "ANTHONY",
+    "SANDRA",
+    "MARK",
+    "MARGARET",
+    "DONALD",
+    "ASHLEY",
+    "STEVEN",
+    "KIMBERLY",
+    "ANDREW",
+    "EMILY",
+    "PAUL",
+    "DONNA",
+    "JOSHUA",
+    "MICHELLE",
+    "KENNETH",
+    "CAROL",
+    "KEVIN",
+    "AMANDA",
+    "BRIAN",
+    "MELISSA",
+    "RAJ",
+    "PRIYA",
+    "WEI",
+    "MIN",
+    "HIROSHI",
+    "YUKI",
+    "CARLOS",
+    "SOFIA",
+    "AHMED",
+    "FATIMA",
+    "IVAN",
+    "OLGA",
+    "CHIDI",
+    "AMARA",
+]
+middle_initials = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+street_names = [
+    "CAMROSE",
+    "PRESTON MEADOW",
+    "PARKWOOD",
+    "HEDGCOXE",
+    "MCDERMOTT",
+    "SPRING CREEK",
+    "WINDHAVEN",
+    "OHIO",
+    "COIT",
+    "INDEPENDENCE",
+    "LEGACY",
+    "TENNYSON",
+    "ROCHELLE",
+    "WILLOW BEND",
+    "MAPLESHADE",
+    "LAKESIDE",
+    "CHAPEL HILL",
+    "OAK POINT",
+    "RIDGEVIEW",
+    "STONEBROOK",
+    "CUSTER",
+    "ALMA",
+    "JUPITER",
+    "PARKER",
+]
+street_suffixes = ["DR", "LN", "CT", "PKWY", "RD", "BLVD", "TRL", "WAY", "CIR"]
+subdivisions = [
+    "BRADFORD ESTATES",
+    "PRESTON MEADOW",
+    "WILLOW BEND",
+    "DEERFIELD",
+    "RIDGEVIEW",
+    "LEGACY TOWN CENTER",
+    "STONEBRIAR",
+    "HUNTERS CREEK",
+    "WINDHAVEN FARMS",
+    "CASTLE HILLS",
+    "GLEN ABBEY",
+    "KINGSWOOD",
+]
+cities = [
+    ("PLANO", "75024"),
+    ("PLANO", "75093"),
+    ("FRISCO", "75034"),
+    ("ALLEN", "75002"),
+]
+entity_suffixes = [
+    "HOLDINGS LLC",
+    "HOA",
+    "PARTNERS LP",
+    "INVESTMENTS LTD",
+    "PROPERTIES LLC",
+]
+# Share of owners that are entities
+entity_share = 0.05
+vowels = "AEIOU"
+
+
+def is_entity_owner(owner_name: str) -> bool:
+    return any(owner_name.endswith(f" {suffix}") for suffix in entity_suffixes)
+
+
+def owner_pool_size() -> int:
+    all_surnames = len(surnames) + len(surname_prefixes) * len(surname_suffixes)
+    return all_surnames * len(first_names) * len(middle_initials)
+
+
+def owner_name_parts(owner_index: int) -> tuple:
+    """
+    Deterministically map an index of the owner pool to (last, first, middle).
+    """
+    owner_index, middle = divmod(owner_index, len(middle_initials))
+    surname_index, first = divmod(owner_index, len(first_names))
+    if surname_index < len(surnames):
+        last = surnames[surname_index]
+    else:
+        prefix, suffix = divmod(surname_index - len(surnames), len(surname_suffixes))
+        last = surname_prefixes[prefix] + surname_suffixes[suffix]
+    return last, first_names[first], middle_initials[middle]
+
+
+def generate_parcels(num_parcels: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    # Each owner owns 1-3 parcels; sample enough unique owners up front
+    max_owners = min(num_parcels, owner_pool_size())
+    owner_indexes = rng.sample(range(owner_pool_size()), max_owners)
+
+    rows = []
+    owner_position = 0
+    while len(rows) < num_parcels:
+        if owner_position >= len(owner_indexes):
+            raise ValueError("Owner pool exhausted, reduce num_parcels")
+        last, first, middle = owner_name_parts(owner_indexes[owner_position])
+        owner_id = 1000000 + owner_position
+        owner_position += 1
+        owner_name = f"{last} {first} {middle}"
+        owner_name_additional = ""
+        if rng.random() < entity_share:
+            entity = rng.choice(street_names + subdivisions)
+            owner_name = f"{entity} {rng.choice(entity_suffixes)}"
+        elif rng.random() < 0.2:
+            owner_name += " &"
+            owner_name_additional = f"{rng.choice(first_names)} {last}"
+        parcels_owned = min(rng.choice([1, 1, 1, 2, 3]), num_parcels - len(rows))
+        for _ in range(parcels_owned):
+            rows.append(
+                _parcel_row(rng, len(rows), owner_id, owner_name, owner_name_additional)
+            )
+    return rows
+
+
+def _parcel_row(
+    rng: random.Random,
+    row_number: int,
+    owner_id: int,
+    owner_name: str,
+    owner_name_additional: str,
+) -> dict:
+    property_id = 3000000 + row_number
+    subdivision = rng.choice(subdivisions)
+    block = rng.choice("ABCDEFGH")
+    lot = rng.randint(1, 60)
+    building_number = rng.randint(100, 9999)
+    street_name = rng.choice(street_names)
+    street_suffix = rng.choice(street_suffixes)
+    city, zip_code = rng.choice(cities)
+    situs_short = f"{building_number} {street_name} {street_suffix}"
+    value_land = rng.randrange(50000, 250000, 500)
+    value_improvement = rng.randrange(100000, 900000, 10)
+    value_market = value_land + value_improvement
+    value_appraised = value_market - rng.choice([0, 0, rng.randrange(0, 60000, 10)])
+
+    row = dict.fromkeys(appraisal_columns, "")
+    row.update(
+        {
+            "propYear": "2024",
+            "propID": str(property_id),
+            "geoID": f"R-{rng.randint(1000, 9999)}-00{block}-{lot:04d}-1",
+            "propType": "Real",
+            "propSubType": "Residential",
+            "propCategoryCode": "A",
+            "legalAbsSubName": subdivision,
+            "legalAbsSubBlock": block,
+            "legalAbsSubLot": str(lot),
+            "legalDescription": f"{subdivision}, BLK {block}, LOT {lot}",
+            "propCreateDate": "08/31/1993",
+            "situsBldgNum": str(building_number),
+            "situsStreetName": street_name,
+            "situsStreetSuffix": street_suffix,
+            "situsCity": city,
+            "situsZip": zip_code,
+            "situsConcat": f"{situs_short} , {city}, TX {zip_code}",
+            "situsConcatShort": situs_short,
+            "ownerID": str(owner_id),
+            "ownerName": owner_name,
+            "ownerNameAddtl": owner_name_additional,
+            "ownerAddrLine1": situs_short,
+            "ownerAddrCity": city,
+            "ownerAddrState": "TX",
+            "ownerAddrZip": zip_code,
+            "imprvYearBuilt": str(rng.randint(1975, 2023)),
+            "currValYear": "2024",
+            "currValImprv": str(value_improvement),
+            "currValLand": str(value_land),
+            "currValMarket": str(value_market),
+            "currValAgLoss": "0",
+            "currValAppraised": str(value_appraised),
+            "propStatus": "Certified",
+        }
+    )
+    return row
+
+
+def write_parcels_csv(rows: list, file_path: str) -> None:
+    with open(file_path, mode="w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=appraisal_columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """
+    Apply one typo of the kind seen in user queries (Smith -> Smeeth / Smithes).
+    """
+    positions = [i for i, char in enumerate(name) if char in vowels]
+    operation = rng.choice(["vowel", "double", "drop", "suffix"])
+    if operation == "vowel" and positions:
+        i = rng.choice(positions)
+        replacement = rng.choice([v for v in vowels if v != name[i]])
+        return name[:i] + replacement + name[i + 1 :]
+    if operation == "double" and len(name) > 2:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i] + name[i:]
+    if operation == "drop" and len(name) > 4:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1 :]
+    return name + rng.choice(["S", "ES", "E"])
+
+
+def generate_owner_queries(rows: list, num_queries: int, seed: int = 42) -> list:
+    """
+    Return labelled queries, one exact and one misspelled per sampled owner:
+    {"query", "kind", "owner_name", "relevant_property_ids"}.
+    """
+    rng = random.Random(seed)
+    # Queries name "Last First", so every owner sharing both names is relevant
+    parcels_by_owner = {}
+    for row in rows:
+        if is_entity_owner(row["ownerName"]):
+            continue
+        owner_name = " ".join(row["ownerName"].split()[:2])
+        parcels_by_owner.setdefault(owner_name, []).append(row["propID"])
+    owners = sorted(parcels_by_owner)
+    sampled_owners = rng.sample(owners, min(num_queries, len(owners)))
+
+    queries = []
+    for owner_name in sampled_owners:
+        last, first = owner_name.split()
+        relevant = parcels_by_owner[owner_name]
+        for kind, surname in (("exact", last), ("fuzzy", misspell(last, rng))):
+            queries.append(
+                {
+                    "query": f"What properties are owned by "
+                    f"'{surname.title()} {first.title()}'",
+                    "kind": kind,
+                    "owner_name": owner_name,
+                    "relevant_property_ids": relevant,
+                }
+            )
+    return queries
+
+
+def generate_entity_queries(rows: list, num_queries: int, seed: int = 42) -> list:
+    """
+    Labelled queries naming an entity owner, all its parcels are relevant.
+    """
+    rng = random.Random(seed)
+    parcels_by_owner = {}
+    for row in rows:
+        if is_entity_owner(row["ownerName"]):
+            parcels_by_owner.setdefault(row["ownerName"], []).append(row["propID"])
+    owners = sorted(parcels_by_owner)
+    return [
+        {
+            "query": f"What properties are owned by '{owner_name.title()}'",
+            "kind": "entity",
+            "owner_name": owner_name,
+            "relevant_property_ids": parcels_by_owner[owner_name],
+        }
+        for owner_name in rng.sample(owners, min(num_queries, len(owners)))
+    ]
+
+
+def generate_address_queries(rows: list, num_queries: int, seed: int = 42) -> list:
+    """
+    Labelled address ("Who owns 4001 CAMROSE DR") and subdivision ("What properties
+    are in BRADFORD ESTATES, BLK A, LOT 12") queries, num_queries of each, on the
+    streets and subdivisions entity owners are named after when there are any.
+    """
+    rng = random.Random(seed)
+    entity_words = " ".join(
+        row["ownerName"] for row in rows if is_entity_owner(row["ownerName"])
+    )
+    parcels_by_address = {}
+    parcels_by_legal = {}
+    for row in rows:
+        parcels_by_address.setdefault(row["situsConcatShort"], []).append(row["propID"])
+        parcels_by_legal.setdefault(row["legalDescription"], []).append(row["propID"])
+    candidates = [
+        row
+        for row in rows
+        if row["situsStreetName"] in entity_words
+        or row["legalAbsSubName"] in entity_words
+    ] or rows
+
+    queries = []
+    for row in rng.sample(candidates, min(num_queries, len(candidates))):
+        queries.append(
+            {
+                "query": f"Who owns {row['situsConcatShort']}",
+                "kind": "address",
+                "relevant_property_ids": parcels_by_address[row["situsConcatShort"]],
+            }
+        )
+        queries.append(
+            {
+                "query": f"What properties are in {row['legalDescription']}",
+                "kind": "subdivision",
+                "relevant_property_ids": parcels_by_legal[row["legalDescription"]],
+            }
+        )
+    return queries
+
+
+def generate_labelled_queries(rows: list, num_queries: int, seed: int = 42) -> list:
+    """
+    Owner queries for num_queries owners, plus entity owner, address and
+    subdivision queries for a quarter as many.
+    """
+    return (
+        generate_owner_queries(rows, num_queries, seed=seed)
+        + generate_entity_queries(rows, max(num_queries // 4, 1), seed=seed)
+        + generate_address_queries(rows, max(num_queries // 4, 1), seed=seed)
+    )
+
+
+def write_queries(queries: list, file_path: str) -> None:
+    with open(file_path, "w") as outfile:
+        json.dump(queries, outfile, indent=2)
@@ -6,43 +6,167 @@ pre-built index. It includes functions for running queries, updating search hist
 and handling user interactions with the UI components.
 
 Functions:
-- run_query(user_input): Executes a query using the QueryEngineSingleton and returns the response.
-- search_function(user_input, history): Handles the search functionality, updates the history, 
+- run_query(user_input, profile, priority, deadline): Executes a query using the QueryEngineSingleton (or a pre-forked worker) and returns the response.
+- query_on_worker(user_input, profile, priority, deadline): Runs a query on a pre-forked worker, after LLM admission in the App process.
+- query_in_worker(payload): Runs a query in a pre-forked worker process.
+- start_worker_pool(): Forks the `serving_workers` worker processes once the engine is loaded.
+- search_function(user_input, history, profile): Handles the search functionality, updates the history, 
   and returns the result along with updated history and dropdown choices.
+- get_metrics(): Returns the per-stage timing metrics of the running app.
+- suggest_addresses(prefix): Address / property ID typeahead suggestions from the prefix index.
+- show_parcel(row): Shows the selected parcel, without embedding or the LLM.
 - main(): Initializes and launches the Gradio app with the defined UI components and interactions.
 
 The app is designed to demonstrate a property search application for Collin County zip code 75024.
 """
 
 import gradio as gr
+import os
+import time
 import traceback
 
 from indexes.index_query import QueryEngineSingleton
 from utilities.custom_logger import logger
+from utilities.metrics import registry, span
+from utilities.prefork import PreforkPool
+from utilities.single_flight import SingleFlight, normalize_query
 
+# Pre-forked query workers, when serving_workers is set
+worker_pool = None
+# Identical queries running at the same time share one execution
+query_flights = SingleFlight("query.single_flight")
+# Searches running at once when search_concurrency is not set: above 1, so that
+# identical searches can be coalesced (with workers, searches wait for a worker)
+default_search_concurrency = 16
+# LLM admission priorities (lower first): the first search of a session goes ahead
+# of the follow-up searches of sessions that already got an answer
+first_search_priority = 0
+follow_up_priority = 1
 
-def run_query(user_input: str) -> str:
+
+def run_query(
+    user_input: str, profile: bool = False, priority: int = 0, deadline: float = None
+) -> str:
     """
     For demonstration purposes, we'll just echo the input.
+    `priority` and `deadline` (time.monotonic()) order the wait for the LLM.
     """
     query_engine_instance = QueryEngineSingleton()
     logger.debug(f"Query: {user_input}")
-    response = query_engine_instance.query(user_input)
+
+    # Coalesced searches share the priority and deadline of the first one
+    def execute() -> str:
+        if worker_pool is not None:
+            return query_on_worker(user_input, profile, priority, deadline)
+        return str(
+            query_engine_instance.query(
+                user_input, profile=profile, priority=priority, deadline=deadline
+            )
+        )
+
+    response = query_flights.do((normalize_query(user_input), profile), execute)
     logger.debug(f"Response: {response}")
-    return str(response)
+    return response
+
+
+def query_on_worker(
+    user_input: str, profile: bool, priority: int, deadline: float
+) -> str:
+    """
+    A worker runs one query at a time, so an admission controller in the worker
+    would never queue anything. The LLM admission runs here instead, over all
+    workers: an admitted query runs on a worker with the LLM, a shed one without.
+    """
+    admission = QueryEngineSingleton().admission
+
+    def call(shed_reason: str = None) -> str:
+        return worker_pool.call((user_input, profile, shed_reason))
+
+    if admission is None:
+        return call()
+    return admission.run(call, call, priority=priority, deadline=deadline)
 
 
-def search_function(user_input: str, history: list) -> tuple:
+def query_in_worker(payload: tuple) -> str:
+    """
+    Runs in a pre-forked worker on the engine forked from the parent. The engine
+    is never swapped in a worker: a new index version forks new workers.
+    The App process already ran the LLM admission of the query.
+    """
+    user_input, profile, shed_reason = payload
+    return str(
+        QueryEngineSingleton().engine.query(
+            user_input, profile=profile, admitted=True, shed_reason=shed_reason
+        )
+    )
+
+
+def start_worker_pool() -> None:
+    """
+    Fork `serving_workers` query workers sharing the loaded engine copy-on-write.
+    """
+    global worker_pool
+    num_workers = int(os.getenv("serving_workers") or 0)
+    if num_workers < 1:
+        return
+    worker_pool = PreforkPool(
+        query_in_worker,
+        num_workers,
+        generation=lambda: QueryEngineSingleton().engine.version,
+    ).start()
+
+
+def get_metrics() -> dict:
+    """
+    Called when "Refresh metrics" is clicked, also exposed as the "metrics" API.
+    With pre-forked workers, the metrics of the workers are included.
+    """
+    if worker_pool is None:
+        return registry.snapshot()
+    snapshot = worker_pool.metrics()
+    snapshot["worker_memory_mb"] = worker_pool.memory()
+    return snapshot
+
+
+def suggest_addresses(prefix: str) -> dict:
+    """
+    Called on every keystroke in the "Address or property ID" field.
+    """
+    with span("typeahead.suggest"):
+        suggestions = QueryEngineSingleton().engine.suggest(prefix)
+    return gr.update(
+        choices=[(label, str(row)) for label, row in suggestions], value=None
+    )
+
+
+def show_parcel(row: str) -> str:
+    """
+    Called when a suggestion is picked: the parcel is read from the docstore directly.
+    """
+    if not row:
+        return ""
+    return QueryEngineSingleton().engine.parcel_text(int(row))
+
+
+def search_function(user_input: str, history: list, profile: bool = False) -> tuple:
     """
     Called when "Search" button is clicked or Enter is pressed.
-      1) Compute the system output for the new input.
+      1) Compute the system output for the new input. Its deadline runs from
+         now, and follow-up searches of the session wait behind first searches.
       2) Update the history (limit to 10 items).
       3) Return:
          - The new system output
          - The updated history
          - The updated dropdown choices
     """
-    result = run_query(user_input)
+    received = time.monotonic()
+    deadline_ms = float(os.getenv("search_deadline_ms") or 0)
+    deadline = received + deadline_ms / 1000.0 if deadline_ms > 0 else None
+    priority = follow_up_priority if history else first_search_priority
+    with span("search.total"):
+        result = run_query(
+            user_input, profile=profile, priority=priority, deadline=deadline
+        )
 
     # If already at 10 items, remove the oldest
     if len(history) >= 10:
@@ -84,8 +208,13 @@ def main() -> None:
             # State to store (query, result) pairs
             history_state = gr.State([])
 
-            # Load the index
+            # Load the index, then fork the query workers (if configured)
             _ = QueryEngineSingleton()
+            start_worker_pool()
+            # Searches running at once: search_concurrency (1 turns coalescing off)
+            search_concurrency = int(
+                os.getenv("search_concurrency") or default_search_concurrency
+            )
 
             # We split the UI into two sections (frames/groups)
             with gr.Row():
@@ -104,19 +233,38 @@ def main() -> None:
                         label="History Query", interactive=False
                     )
 
+            # Frame 3: address / property ID typeahead, resolves straight to a parcel
+            with gr.Group():
+                address_input = gr.Textbox(
+                    label="Address or property ID", placeholder="6801 Pre..."
+                )
+                address_dropdown = gr.Dropdown(
+                    label="Suggestions", choices=[], interactive=True
+                )
+
+            # Frame 4: per-stage timings and the per request cProfile switch
+            with gr.Accordion("Diagnostics", open=False):
+                profile_checkbox = gr.Checkbox(label="Profile next queries")
+                metrics_button = gr.Button("Refresh metrics")
+                metrics_field = gr.JSON(label="Stage timings (ms)")
+
             # 1) SEARCH BUTTON:
             #    When clicked, run search_function
             search_button.click(
                 fn=search_function,
-                inputs=[input_field, history_state],
+                inputs=[input_field, history_state, profile_checkbox],
                 outputs=[output_field, history_state, history_dropdown],
+                concurrency_limit=search_concurrency,
+                api_name="search",
             )
 
             # 2) TRIGGER SEARCH WHEN "ENTER" IS PRESSED INSIDE input_field
             input_field.submit(
                 fn=search_function,
-                inputs=[input_field, history_state],
+                inputs=[input_field, history_state, profile_checkbox],
                 outputs=[output_field, history_state, history_dropdown],
+                concurrency_limit=search_concurrency,
+                api_name=False,
             )
 
             # 3) HISTORY SELECTION:
@@ -128,10 +276,39 @@ def main() -> None:
                 outputs=history_input_field,
             )
 
+            # 4) TYPEAHEAD: suggestions on every keystroke (outside the queue, only
+            #    the latest keystroke is processed), a picked parcel is shown as output
+            address_input.change(
+                fn=suggest_addresses,
+                inputs=address_input,
+                outputs=address_dropdown,
+                queue=False,
+                trigger_mode="always_last",
+                show_progress="hidden",
+                api_name="suggest",
+            )
+            address_dropdown.select(
+                fn=show_parcel,
+                inputs=address_dropdown,
+                outputs=output_field,
+                api_name=False,
+            )
+
+            # 5) METRICS: dump the in-process metrics registry
+            metrics_button.click(
+                fn=get_metrics,
+                inputs=None,
+                outputs=metrics_field,
+                api_name="metrics",
+            )
+
         demo.launch(share=False, show_api=False)
     except Exception as e:
         traceback.print_exc()
         logger.error(f"Error running Gradio app: {e}")
+    finally:
+        if worker_pool is not None:
+            worker_pool.stop()
 
 
 if __name__ == "__main__":
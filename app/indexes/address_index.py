@@ -0,0 +1,135 @@
+"""
+Prefix index for address / property ID typeahead.
+
+A sorted array of normalized keys with binary search (bisect): all keys starting
+with the typed prefix are adjacent, so a lookup is one bisect plus a short scan.
+Each parcel is indexed under
+- its situs address ("6801 PRESTON RD PLANO TX 75024"),
+- its street ("PRESTON RD 6801"), so typing a street name without the number works,
+- its property ID.
+Keys are upper case with punctuation removed and whitespace collapsed; typed
+prefixes are normalized the same way.
+
+The index is built from the parcel table at index build time and persisted next
+to the docstore; pandas is only imported to build it. A suggestion resolves to a parcel row, i.e. the parcel node str(row),
+so a search can go straight to the parcel without embedding or the LLM.
+
+Classes:
+- AddressIndex: The prefix index.
+"""
+
+import os
+import pickle
+import re
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+address_index_file = "address_index.pkl"
+
+street_columns = [
+    "situs street prefix",
+    "situs street name",
+    "situs street suffix",
+]
+
+
+def normalize_key(text) -> str:
+    if not isinstance(text, str):
+        import pandas as pd
+
+        text = "" if pd.isna(text) else str(text)
+    return " ".join(re.sub(r"[^0-9A-Z]+", " ", text.upper()).split())
+
+
+def column_text(df: "pd.DataFrame", column: str) -> "pd.Series":
+    """
+    Column as strings, missing values as "" (integral floats without ".0").
+    """
+    import pandas as pd
+
+    series = df[column]
+    if pd.api.types.is_float_dtype(series.dtype):
+        series = series.astype("Int64")
+    return series.astype("string").fillna("")
+
+
+class AddressIndex:
+    def __init__(self, keys: list, rows: np.ndarray, labels: list):
+        # keys[i] -> parcel row rows[i]; labels[row] is the text shown for a parcel
+        self.keys = keys
+        self.rows = rows
+        self.labels = labels
+
+    @classmethod
+    def from_dataframe(cls, filtered_df: "pd.DataFrame") -> "AddressIndex":
+        """
+        `filtered_df` as returned by preprocess_csv; row i is parcel node str(i).
+        """
+        df = filtered_df.reset_index(drop=True)
+        situs = column_text(df, "situs concatenated")
+        property_ids = column_text(df, "property ID")
+        building_numbers = column_text(df, "situs building number")
+        streets = column_text(df, street_columns[0])
+        for column in street_columns[1:]:
+            streets = streets + " " + column_text(df, column)
+
+        entries = []
+        for row, (address, street, number, property_id) in enumerate(
+            zip(situs, streets, building_numbers, property_ids)
+        ):
+            for key in (
+                normalize_key(address),
+                normalize_key(f"{street} {number}"),
+                property_id,
+            ):
+                if key:
+                    entries.append((key, row))
+        entries.sort()
+
+        labels = [
+            f"{' '.join(address.split())} (property ID {property_id})"
+            for address, property_id in zip(situs, property_ids)
+        ]
+        keys = [key for key, _ in entries]
+        rows = np.fromiter((row for _, row in entries), dtype=np.int32)
+        return cls(keys, rows, labels)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """
+        Up to `limit` (label, row) suggestions for the typed prefix, in key order.
+        """
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+        suggestions = []
+        seen = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(suggestions) < limit:
+            if not self.keys[i].startswith(prefix):
+                break
+            row = int(self.rows[i])
+            if row not in seen:
+                seen.add(row)
+                suggestions.append((self.labels[row], row))
+            i += 1
+        return suggestions
+
+    def persist(self, persist_dir: str) -> None:
+        os.makedirs(persist_dir, exist_ok=True)
+        with open(os.path.join(persist_dir, address_index_file), "wb") as file:
+            pickle.dump(
+                {"keys": self.keys, "rows": self.rows, "labels": self.labels},
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> "AddressIndex":
+        with open(os.path.join(persist_dir, address_index_file), "rb") as file:
+            data = pickle.load(file)
+        return cls(data["keys"], data["rows"], data["labels"])
@@ -0,0 +1,493 @@
+"""
+Columnar analytics over the full appraisal table, for aggregate questions.
+
+Questions such as "total market value owned by Smith" or "average appraised value
+on Preston Rd by city" cannot be answered from 20 retrieved parcel nodes. At build
+time the full appraisal table (all columns, values as numbers) is persisted as Parquet
+next to the index. At query time only the columns a question needs are read, string
+columns as categoricals, and filters and group-bys run vectorized over whole columns.
+
+The query router (`parse_aggregate_question`) recognizes aggregate questions with
+regular expressions: an aggregation ("total", "average", "how many", ...), a metric
+("market value", "year built", ...), filters ("owned by X", "on <street>", "in <city>",
+"in <ZIP>", "built after <year>") and an optional group-by ("by city", "per street").
+A question is only answered here when every clause of it was understood: once the
+recognized phrases are removed, only filler words ("what is the", "properties", ...)
+may be left. Questions with anything else ("does Smith own", "built in 2005",
+"with a pool", "which property", an address) return None, like all other
+questions, and go to the RAG pipeline. So do questions whose filters match no
+property, e.g. a misspelled owner name, for the fuzzy owner lookup of the pipeline.
+
+Functions:
+- build_analytics_table(df, persist_dir): Persist the appraisal table as Parquet.
+- parse_aggregate_question(question): Structured aggregate query, or None.
+- format_result(query, result): Answer text of an aggregate query.
+
+Classes:
+- AnalyticsEngine: Runs aggregate queries over the persisted table.
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from utilities.metrics import registry
+
+analytics_table_file = "appraisal_table.parquet"
+
+# Metric phrase -> column, longest phrases first; "value" alone means market value
+metric_columns = {
+    "improvement value": "current value improvement",
+    "appraised value": "current value appraised",
+    "assessed value": "currValAssessed",
+    "market value": "current value market",
+    "land value": "current value land",
+    "living area": "imprvMainArea",
+    "square feet": "imprvMainArea",
+    "year built": "improvement year built",
+    "land size": "landSizeAcres",
+    "acreage": "landSizeAcres",
+    "acres": "landSizeAcres",
+    "value": "current value market",
+}
+money_columns = {
+    "current value improvement",
+    "current value appraised",
+    "currValAssessed",
+    "current value market",
+    "current value land",
+}
+numeric_columns = [
+    "current value improvement",
+    "current value land",
+    "current value market",
+    "current value appraised",
+    "current value agriculture loss",
+    "currValHSCapLoss",
+    "currValNHSCapLoss",
+    "currValAssessed",
+    "prevValImprv",
+    "prevValLand",
+    "prevValMarket",
+    "prevValAppraised",
+    "prevValAssessed",
+    "improvement year built",
+    "imprvMainArea",
+    "landSizeAcres",
+    "landSizeSqft",
+]
+aggregations = {
+    "total": "sum",
+    "sum of": "sum",
+    "combined": "sum",
+    "average": "mean",
+    "avg": "mean",
+    "mean": "mean",
+    "median": "median",
+    "highest": "max",
+    "maximum": "max",
+    "max": "max",
+    "lowest": "min",
+    "minimum": "min",
+    "min": "min",
+}
+aggregation_names = {
+    "sum": "Total",
+    "mean": "Average",
+    "median": "Median",
+    "max": "Highest",
+    "min": "Lowest",
+    "count": "Number of properties",
+}
+# Group-by phrase -> column ("street" is derived from the situs street columns)
+group_columns = {
+    "zip code": "situs ZIP",
+    "zip": "situs ZIP",
+    "city": "situs city",
+    "street": "street",
+    "owner": "owner name",
+    "year built": "improvement year built",
+    "subdivision": "legalAbsSubName",
+}
+street_columns = ["situs street prefix", "situs street name", "situs street suffix"]
+# Column -> name in the answers
+column_labels = {
+    "current value improvement": "improvement value",
+    "current value appraised": "appraised value",
+    "currValAssessed": "assessed value",
+    "current value market": "market value",
+    "current value land": "land value",
+    "imprvMainArea": "living area",
+    "improvement year built": "year built",
+    "landSizeAcres": "land size (acres)",
+    "situs ZIP": "ZIP code",
+    "situs city": "city",
+    "owner name": "owner",
+    "legalAbsSubName": "subdivision",
+}
+
+# Ends a filter value: the next clause or the end of the question
+clause_end = (
+    r"(?=\s+(?:on|in|by|per|for each|grouped|owned|built|with|and)\b|\s*[?.!]?\s*$)"
+)
+count_pattern = re.compile(
+    r"\b(how many|number of|count of|count)\b.*\b(properties|parcels|homes|lots)\b"
+)
+aggregation_pattern = re.compile(
+    r"\b(" + "|".join(sorted(aggregations, key=len, reverse=True)) + r")\b"
+)
+metric_pattern = re.compile(
+    r"\b(" + "|".join(sorted(metric_columns, key=len, reverse=True)) + r")\b"
+)
+group_pattern = re.compile(
+    r"(?<!owned )\b(?:by|per|for each|grouped by)\s+("
+    + "|".join(sorted(group_columns, key=len, reverse=True))
+    + r")\b"
+)
+# Words that may be left over once the recognized phrases were removed; any other
+# word is a clause the parser does not understand
+filler_words = {
+    "a",
+    "across",
+    "all",
+    "an",
+    "are",
+    "do",
+    "find",
+    "give",
+    "home",
+    "homes",
+    "house",
+    "houses",
+    "how",
+    "is",
+    "lots",
+    "me",
+    "much",
+    "of",
+    "parcel",
+    "parcels",
+    "please",
+    "properties",
+    "property",
+    "show",
+    "tell",
+    "the",
+    "there",
+    "what",
+    "what's",
+    "whats",
+}
+filter_patterns = [
+    ("owner", re.compile(r"\bowned by\s+['\"]?(.+?)['\"]?" + clause_end)),
+    ("zip", re.compile(r"\b(?:in|zip(?: code)?)\s+(\d{5})\b")),
+    ("built_after", re.compile(r"\bbuilt (?:after|since)\s+(\d{4})\b")),
+    ("built_before", re.compile(r"\bbuilt before\s+(\d{4})\b")),
+    (
+        "street",
+        re.compile(
+            r"\bon\s+(?:street\s+)?['\"]?(.+?)['\"]?(?:\s+street)?" + clause_end
+        ),
+    ),
+    (
+        "city",
+        re.compile(
+            r"\bin\s+(?:the city of\s+)?['\"]?([a-z][a-z .]*?)['\"]?"
+            # "in Plano, TX"
+            r"(?:\s*,\s*(?:[a-z]{2}|texas))?"
+            + clause_end
+        ),
+    ),
+]
+
+
+def build_analytics_table(df: pd.DataFrame, persist_dir: str) -> str:
+    """
+    Persist the full appraisal table (as returned by preprocess_csv) as Parquet.
+    Value columns are stored as numbers, other text columns as strings.
+    """
+    table = df.reset_index(drop=True).copy()
+    for column in numeric_columns:
+        if column in table.columns:
+            table[column] = pd.to_numeric(table[column], errors="coerce")
+    for column in table.columns:
+        if table[column].dtype == "object":
+            # Mixed type columns (e.g. ZIPs read as numbers and text)
+            table[column] = table[column].astype("string")
+    os.makedirs(persist_dir, exist_ok=True)
+    file_path = os.path.join(persist_dir, analytics_table_file)
+    table.to_parquet(file_path, index=False, engine="pyarrow")
+    return file_path
+
+
+def normalize_text(text) -> str:
+    return " ".join(re.sub(r"[^0-9A-Z]+", " ", str(text).upper()).split())
+
+
+def blank(text: str, match: re.Match, group: int = 0) -> str:
+    """
+    `text` with a matched phrase replaced by spaces (positions stay valid).
+    """
+    start, end = match.span(group)
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+def leftover_words(text: str) -> list:
+    return re.findall(r"[a-z0-9]+(?:'[a-z]+)?", text)
+
+
+def parse_aggregate_question(question: str):
+    """
+    {"aggregation", "metric", "filters": [(kind, value)], "group_by"} for aggregate
+    questions, None for everything else. Recognized phrases are blanked out as
+    they are parsed, and the question is rejected when more than filler is left.
+    """
+    text = question.lower()
+
+    # The group-by clause first, so "by city" is not read as a filter value and
+    # "by year built" not as the metric
+    group_by = None
+    group_match = group_pattern.search(text)
+    if group_match:
+        group_by = group_columns[group_match.group(1)]
+        text = blank(text, group_match)
+
+    count_match = count_pattern.search(text)
+    if count_match:
+        aggregation = "count"
+        text = blank(blank(text, count_match, 2), count_match, 1)
+        # "total number of properties"
+        total_match = re.search(r"\btotal\b", text)
+        if total_match:
+            text = blank(text, total_match)
+    else:
+        match = aggregation_pattern.search(text)
+        if not match:
+            return None
+        aggregation = aggregations[match.group(1)]
+        text = blank(text, match)
+
+    metric_match = metric_pattern.search(text)
+    if metric_match:
+        metric = metric_columns[metric_match.group(1)]
+        text = blank(text, metric_match)
+    elif aggregation == "count":
+        metric = None
+    else:
+        return None
+
+    filters = []
+    for kind, pattern in filter_patterns:
+        match = pattern.search(text)
+        if match:
+            filters.append((kind, match.group(1).strip()))
+            # A matched clause is not matched again by later patterns
+            text = blank(text, match)
+
+    # Anything but filler left over is a clause that would be silently dropped
+    if any(word not in filler_words for word in leftover_words(text)):
+        return None
+    return {
+        "aggregation": aggregation,
+        "metric": metric,
+        "filters": filters,
+        "group_by": group_by,
+    }
+
+
+class AnalyticsEngine:
+    def __init__(self, persist_dir: str):
+        self.file_path = os.path.join(persist_dir, analytics_table_file)
+        self._columns = {}
+        self._categories_cache = {}
+
+    def column(self, name: str) -> pd.Series:
+        """
+        One column of the table, read from Parquet on first use.
+        Text columns are kept as categoricals, so filters work on the unique values.
+        """
+        if name not in self._columns:
+            if name == "street":
+                parts = [
+                    self.column(column).astype("string") for column in street_columns
+                ]
+                street = parts[0].fillna("")
+                for part in parts[1:]:
+                    street = street + " " + part.fillna("")
+                values = street.map(normalize_text).astype("category")
+            else:
+                values = pd.read_parquet(self.file_path, columns=[name])[name]
+                if not pd.api.types.is_numeric_dtype(values.dtype):
+                    values = values.astype("category")
+                elif name == "situs ZIP":
+                    values = values.astype("Int64").astype("string").astype("category")
+            self._columns[name] = values
+        return self._columns[name]
+
+    def warm_up(self) -> None:
+        """
+        Read the commonly used columns and build their word indexes up front,
+        so the first questions do not pay for it.
+        """
+        for column in set(metric_columns.values()):
+            self.column(column)
+        for column in ("owner name", "street", "situs city", "situs ZIP"):
+            self._categories(column)
+
+    def _categories(self, name: str) -> tuple:
+        """
+        Normalized unique values of a text column and an index word -> codes,
+        built once per column.
+        """
+        if name not in self._categories_cache:
+            normalized = [
+                normalize_text(category)
+                for category in self.column(name).cat.categories
+            ]
+            words = {}
+            for code, category in enumerate(normalized):
+                for word in set(category.split()):
+                    words.setdefault(word, []).append(code)
+            self._categories_cache[name] = (np.array(normalized, dtype=object), words)
+        return self._categories_cache[name]
+
+    def _codes_mask(self, name: str, codes) -> np.ndarray:
+        return np.isin(self.column(name).cat.codes.to_numpy(), np.asarray(codes))
+
+    def filter_mask(self, filters: list) -> np.ndarray:
+        mask = None
+        for kind, value in filters:
+            target = normalize_text(value)
+            if kind == "owner":
+                # Owner names containing every word of the filter
+                _, words = self._categories("owner name")
+                codes = None
+                for word in target.split():
+                    word_codes = set(words.get(word, ()))
+                    codes = word_codes if codes is None else codes & word_codes
+                condition = self._codes_mask("owner name", sorted(codes or ()))
+            elif kind == "street":
+                # "PRESTON RD", a street starting with "PRESTON", or containing it
+                normalized, words = self._categories("street")
+                starts = np.flatnonzero(
+                    [street.startswith(target + " ") for street in normalized]
+                )
+                codes = set(np.flatnonzero(normalized == target)) | set(starts)
+                codes |= set(words.get(target, ()))
+                condition = self._codes_mask("street", sorted(codes))
+            elif kind in ("city", "zip"):
+                name = "situs city" if kind == "city" else "situs ZIP"
+                normalized, _ = self._categories(name)
+                condition = self._codes_mask(name, np.flatnonzero(normalized == target))
+            elif kind == "built_after":
+                condition = (
+                    self.column("improvement year built") > int(value)
+                ).to_numpy()
+            elif kind == "built_before":
+                condition = (
+                    self.column("improvement year built") < int(value)
+                ).to_numpy()
+            else:
+                raise ValueError(f"Unknown filter: {kind}")
+            mask = condition if mask is None else mask & condition
+        return mask
+
+    def run(self, query: dict, mask: np.ndarray = None) -> dict:
+        """
+        {"count", "value"} or, with a group-by, {"count", "groups": [(key, value, count)]}
+        sorted by value, largest first. `mask` is the filter_mask of the query, when
+        it was already computed.
+        """
+        if mask is None:
+            mask = self.filter_mask(query["filters"])
+        metric = query["metric"]
+        aggregation = query["aggregation"]
+        if metric is None:
+            values = pd.Series(np.ones(len(self.column("property ID"))))
+        else:
+            values = self.column(metric)
+        if mask is not None:
+            values = values[mask]
+
+        if query["group_by"] is None:
+            count = int(values.count()) if metric is not None else len(values)
+            if aggregation == "count":
+                return {"count": count, "value": count}
+            return {"count": count, "value": values.agg(aggregation)}
+
+        keys = self.column(query["group_by"])
+        if mask is not None:
+            keys = keys[mask]
+        grouped = values.groupby(keys, observed=True)
+        if aggregation == "count":
+            table = grouped.size()
+            counts = table
+        else:
+            table = grouped.agg(aggregation)
+            counts = grouped.count()
+        table = table.sort_values(ascending=False)
+        return {
+            "count": int(counts.sum()),
+            "groups": [(key, value, int(counts[key])) for key, value in table.items()],
+        }
+
+    def answer(self, question: str, max_groups: int = 20):
+        """
+        Answer text for aggregate questions, None for other questions. Questions
+        whose filters match no property (a misspelled owner name, an unknown city
+        such as "Plano or Frisco") are not answered either: the RAG pipeline and
+        its fuzzy owner lookup may still find what was meant.
+        """
+        query = parse_aggregate_question(question)
+        if query is None:
+            return None
+        mask = self.filter_mask(query["filters"])
+        if mask is not None and not mask.any():
+            registry.increment("router.analytics_no_match")
+            return None
+        return format_result(query, self.run(query, mask=mask), max_groups=max_groups)
+
+
+def format_value(value, column: str) -> str:
+    if value is None or pd.isna(value):
+        return "n/a"
+    if column in money_columns:
+        return f"${value:,.0f}"
+    if column == "improvement year built":
+        return f"{value:.0f}"
+    return f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def format_result(query: dict, result: dict, max_groups: int = 20) -> str:
+    metric = query["metric"]
+    title = aggregation_names[query["aggregation"]]
+    if metric is not None and query["aggregation"] != "count":
+        title += f" {column_labels.get(metric, metric)}"
+    conditions = ", ".join(
+        f"{kind.replace('_', ' ')}: {value}" for kind, value in query["filters"]
+    )
+    if conditions:
+        title += f" ({conditions})"
+
+    if "groups" not in result:
+        if query["aggregation"] == "count":
+            return f"{title}: {result['count']:,}"
+        return (
+            f"{title}: {format_value(result['value'], metric)} "
+            f"over {result['count']:,} properties"
+        )
+
+    group_by = column_labels.get(query["group_by"], query["group_by"])
+    lines = [f"{title} by {group_by} ({result['count']:,} properties):"]
+    for key, value, count in result["groups"][:max_groups]:
+        if query["aggregation"] == "count":
+            lines.append(f"- {key}: {count:,}")
+        else:
+            lines.append(
+                f"- {key}: {format_value(value, metric)} ({count:,} properties)"
+            )
+    if len(result["groups"]) > max_groups:
+        lines.append(f"... {len(result['groups']) - max_groups} more")
+    return "\n".join(lines)
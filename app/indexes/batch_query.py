@@ -0,0 +1,270 @@
+"""
+Batch lookups of owner names / parcel queries against the persisted owner index.
+
+Instead of running the full retriever and LLM once per query, a batch is processed
+in a few vectorized steps:
+1) All queries are embedded in large batches.
+2) One FAISS `index.search` call per chunk of the query matrix.
+3) FAISS positions are resolved to owner leaf nodes and their parent parcel nodes
+   (each owner node has exactly one parent, which is what auto-merging returns).
+4) Only queries that ask for it get an LLM answer, synthesized asynchronously with
+   bounded concurrency.
+
+Functions:
+- read_queries(file_path, template): Reads queries from .txt, .csv or .jsonl files.
+- write_results(results, file_path): Writes results as .csv or .jsonl.
+
+Classes:
+- BatchQueryRunner: Runs a list of queries against a PropertyQueryEngine.
+"""
+
+import asyncio
+import csv
+import json
+
+import numpy as np
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from utilities.custom_logger import logger
+from utilities.metrics import span
+
+true_values = {"1", "true", "yes", "y"}
+
+
+def query_prompt(embed_model):
+    """
+    The prompt a HuggingFaceEmbedding puts in front of queries (e.g. the BGE
+    instruction), when it puts none in front of texts: the text embedding of
+    prompt + query is then its query embedding. None for other models.
+    """
+    # Imported here, not with the module: it loads torch and transformers
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    from llama_index.embeddings.huggingface.utils import (
+        get_query_instruct_for_model_name,
+        get_text_instruct_for_model_name,
+    )
+
+    if not isinstance(embed_model, HuggingFaceEmbedding):
+        return None
+    if embed_model.text_instruction or get_text_instruct_for_model_name(
+        embed_model.model_name
+    ):
+        return None
+    return embed_model.query_instruction or get_query_instruct_for_model_name(
+        embed_model.model_name
+    )
+
+
+def read_queries(file_path: str, template: str = None) -> list:
+    """
+    Read queries as dicts {"id", "query", "synthesize"}.
+    - .txt: one query per line
+    - .csv: a "query" column (optional "id" and "synthesize" columns)
+    - .jsonl: objects with a "query" key (optional "id" and "synthesize")
+    `template` (e.g. "What properties are owned by '{}'") is applied to every query.
+    """
+    queries = []
+    with open(file_path, mode="r", newline="", encoding="utf-8") as file:
+        if file_path.endswith(".csv"):
+            rows = list(csv.DictReader(file))
+        elif file_path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            rows = [{"query": line.strip()} for line in file if line.strip()]
+
+    for position, row in enumerate(rows):
+        query = row["query"].strip()
+        synthesize = row.get("synthesize", False)
+        if isinstance(synthesize, str):
+            synthesize = synthesize.strip().lower() in true_values
+        queries.append(
+            {
+                "id": row.get("id", position),
+                "query": template.format(query) if template else query,
+                "synthesize": bool(synthesize),
+            }
+        )
+    return queries
+
+
+def write_results(results: list, file_path: str) -> None:
+    """
+    .jsonl: one object per query with its ranked matches and answer.
+    .csv: one row per (query, match).
+    """
+    with open(file_path, mode="w", newline="", encoding="utf-8") as file:
+        if file_path.endswith(".jsonl"):
+            for result in results:
+                file.write(json.dumps(result, default=str) + "\n")
+            return
+
+        writer = csv.writer(file)
+        writer.writerow(
+            [
+                "id",
+                "query",
+                "rank",
+                "property_id",
+                "owner_name",
+                "legal_description",
+                "situs_city",
+                "situs_zip",
+                "distance",
+                "answer",
+            ]
+        )
+        for result in results:
+            for match in result["matches"] or [{}]:
+                writer.writerow(
+                    [
+                        result["id"],
+                        result["query"],
+                        match.get("rank"),
+                        match.get("property_id"),
+                        match.get("owner_name"),
+                        match.get("legal_description"),
+                        match.get("situs_city"),
+                        match.get("situs_zip"),
+                        match.get("distance"),
+                        result.get("answer"),
+                    ]
+                )
+
+
+class BatchQueryRunner:
+    def __init__(
+        self,
+        engine,
+        top_k: int = 5,
+        embed_batch_size: int = 256,
+        search_batch_size: int = 4096,
+        max_concurrency: int = 8,
+    ):
+        self.engine = engine
+        self.top_k = top_k
+        self.embed_batch_size = embed_batch_size
+        self.search_batch_size = search_batch_size
+        self.max_concurrency = max_concurrency
+        self._faiss_index = engine.index.vector_store.client
+        self._nodes_dict = engine.index.index_struct.nodes_dict
+        self._docstore = engine.storage_context.docstore
+
+    def embed_queries(self, texts: list) -> np.ndarray:
+        embed_model = self.engine.embed_model
+        # get_query_embedding takes one query; with the query prompt the whole
+        # batch is encoded at once as texts instead
+        prompt = query_prompt(embed_model)
+        embeddings = []
+        for start in range(0, len(texts), self.embed_batch_size):
+            batch = texts[start : start + self.embed_batch_size]
+            if prompt is not None:
+                embeddings.extend(
+                    embed_model.get_text_embedding_batch(
+                        [prompt + text for text in batch]
+                    )
+                )
+            else:
+                embeddings.extend(embed_model.get_query_embedding(t) for t in batch)
+        return np.asarray(embeddings, dtype="float32")
+
+    def search(self, embeddings: np.ndarray) -> tuple:
+        if not len(embeddings):
+            return (
+                np.empty((0, self.top_k), dtype="float32"),
+                np.empty((0, self.top_k), dtype="int64"),
+            )
+        distances = []
+        positions = []
+        for start in range(0, len(embeddings), self.search_batch_size):
+            chunk = embeddings[start : start + self.search_batch_size]
+            chunk_distances, chunk_positions = self._faiss_index.search(
+                chunk, self.top_k
+            )
+            distances.append(chunk_distances)
+            positions.append(chunk_positions)
+        return np.vstack(distances), np.vstack(positions)
+
+    def resolve_parents(self, positions: np.ndarray) -> dict:
+        """
+        Map every FAISS position in the result matrix to its parent parcel node,
+        fetching each distinct leaf and parent from the docstore once.
+        """
+        unique_positions = [int(p) for p in np.unique(positions) if p >= 0]
+        leaf_ids = [self._nodes_dict[str(p)] for p in unique_positions]
+        leaves = self._docstore.get_nodes(leaf_ids)
+        parent_ids = [leaf.parent_node.node_id for leaf in leaves]
+        parents = self._docstore.get_nodes(parent_ids)
+        return dict(zip(unique_positions, parents))
+
+    def run(self, queries: list) -> list:
+        if not queries:
+            return []
+        texts = [query["query"] for query in queries]
+        with span("batch.embed", queries=len(texts)):
+            embeddings = self.embed_queries(texts)
+        with span("batch.faiss_search", queries=len(texts)):
+            distances, positions = self.search(embeddings)
+        with span("batch.resolve_parents"):
+            parents = self.resolve_parents(positions)
+
+        results = []
+        nodes_per_query = []
+        for query, query_distances, query_positions in zip(
+            queries, distances, positions
+        ):
+            matches = []
+            nodes = []
+            for distance, position in zip(query_distances, query_positions):
+                if position < 0:
+                    continue
+                parent = parents[int(position)]
+                matches.append(
+                    {
+                        "rank": len(matches) + 1,
+                        "property_id": parent.metadata.get("property_id"),
+                        "owner_name": parent.metadata.get("owner_name"),
+                        "legal_description": parent.metadata.get("legal_description"),
+                        "situs_city": parent.metadata.get("situs_city"),
+                        "situs_zip": parent.metadata.get("situs_zip"),
+                        "distance": float(distance),
+                    }
+                )
+                nodes.append(NodeWithScore(node=parent, score=float(distance)))
+            results.append(
+                {"id": query["id"], "query": query["query"], "matches": matches}
+            )
+            nodes_per_query.append(nodes)
+
+        to_synthesize = [i for i, query in enumerate(queries) if query["synthesize"]]
+        if to_synthesize:
+            with span("batch.synthesize", queries=len(to_synthesize)):
+                answers = asyncio.run(
+                    self._synthesize(
+                        [texts[i] for i in to_synthesize],
+                        [nodes_per_query[i] for i in to_synthesize],
+                    )
+                )
+            for i, answer in zip(to_synthesize, answers):
+                results[i]["answer"] = answer
+        return results
+
+    async def _synthesize(self, texts: list, nodes_per_query: list) -> list:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def synthesize_one(text: str, nodes: list) -> str:
+            async with semaphore:
+                try:
+                    response = await self.engine.query_engine.asynthesize(
+                        QueryBundle(query_str=text), nodes
+                    )
+                    return str(response)
+                except Exception as e:
+                    logger.error(f"Synthesis failed for query '{text}': {e}")
+                    return None
+
+        return await asyncio.gather(
+            *[
+                synthesize_one(text, nodes)
+                for text, nodes in zip(texts, nodes_per_query)
+            ]
+        )
@@ -1,6 +1,6 @@
 """
 This program is responsible for building a document store index for property data. 
-It includes functions to load environment variables, preprocess CSV files, convert data to documents, create node representations, and build the document store index using FAISS for vector storage.
+It includes functions to preprocess CSV files, convert data to documents, create node representations, and build the document store index using FAISS for vector storage.
 """
 
 import os
@@ -8,14 +8,23 @@ import pandas as pd
 import faiss
 
 from llama_index.vector_stores.faiss import FaissVectorStore
-from llama_index.core import VectorStoreIndex
-from llama_index.llms.openai import OpenAI
-from llama_index.core.schema import TextNode, NodeRelationship, RelatedNodeInfo
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core import VectorStoreIndex, Settings
+from llama_index.core.schema import (
+    TextNode,
+    NodeRelationship,
+    RelatedNodeInfo,
+    MetadataMode,
+)
 from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.core import StorageContext
 
+from .parcel_store import ParcelStore
+from .owner_name_index import OwnerNameIndex
+from .address_index import AddressIndex
+from .analytics import build_analytics_table
+
 from utilities.custom_logger import logger
+from utilities.metrics import span
 
 # Mapping columns for preprocessing
 key_replacements = {
@@ -75,72 +84,6 @@ key_for_search = {
 }
 
 
-def load_env_file(file_path: str) -> None:
-    # Load environment variables from .env file
-    variables_to_define = [
-        "OPENAI_API_KEY",
-        "embeddings_llm",
-        "embeddings_cache_folder",
-        "data_path",
-        "property_file",
-        "persist_dir",
-        "vector_dim",
-    ]
-    variables_to_hide = [
-        "OPENAI_API_KEY",
-    ]
-    try:
-        with open(file_path, "r") as file:
-            for line in file:
-                # Remove whitespace and comments
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    # Split by the first '=' character
-                    key, value = line.split("=", 1)
-                    # Remove any surrounding quotes from the value
-                    value = value.strip().strip('"').strip("'")
-                    # Set the environment variable
-                    if key in variables_to_define:
-                        os.environ[key.strip()] = value
-                        if key in variables_to_hide:
-                            logger.info(
-                                f"Set environment variable: {key.strip()}=HIDDEN"
-                            )
-                        else:
-                            logger.info(
-                                f"Set environment variable: {key.strip()}={value}"
-                            )
-
-    except FileNotFoundError:
-        logger.error(f"Error: {file_path} not found.")
-        raise FileNotFoundError(f"{file_path} not found.")
-    except Exception as e:
-        logger.error(f"Error loading {file_path}: {e}")
-        raise e
-
-
-def get_models() -> tuple:
-    # Define variables from environment variables
-    embeddings_llm = os.getenv("embeddings_llm")
-    logger.info(f"embeddings_llm:{embeddings_llm}")
-    embeddings_cache_folder = os.getenv("embeddings_cache_folder")
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    # Embedding model
-    embedding_model = HuggingFaceEmbedding(
-        model_name=embeddings_llm,
-        cache_folder=embeddings_cache_folder,
-        embed_batch_size=32,
-    )
-
-    # Generation model
-    generation_llm = OpenAI(
-        model="gpt-4o-mini",
-        temperature=0.0,
-        api_key=openai_api_key,
-    )
-    return embedding_model, generation_llm
-
-
 def preprocess_csv(file_path: str) -> tuple:
     # Specify data types for problematic columns
     dtype_mapping = {
@@ -208,8 +151,51 @@ def create_node_representation(input_dict: dict) -> dict:
     return output_node
 
 
+def get_parcel_store(input_file_path: str) -> ParcelStore:
+    with span("build.csv_parse"):
+        df, filtered_df = preprocess_csv(input_file_path)
+    del df
+    return create_parcel_store(filtered_df)
+
+
+def create_parcel_store(filtered_df: pd.DataFrame) -> ParcelStore:
+    with span("build.node_creation", rows=len(filtered_df)):
+        return ParcelStore.from_dataframe(filtered_df)
+
+
+def build_analytics_store(df: pd.DataFrame, persist_dir: str = None) -> None:
+    """
+    Full appraisal table (all columns) as Parquet, for aggregate questions.
+    """
+    persist_dir = persist_dir or os.getenv("persist_dir")
+    with span("build.analytics_table", rows=len(df)):
+        file_path = build_analytics_table(df, persist_dir)
+    logger.info(f"Analytics table persisted: {file_path}")
+
+
+def build_address_index(filtered_df: pd.DataFrame, persist_dir: str = None) -> None:
+    """
+    Prefix index over situs addresses, streets and property IDs for typeahead.
+    Row i of `filtered_df` is parcel node str(i), as in the parcel store.
+    """
+    persist_dir = persist_dir or os.getenv("persist_dir")
+    with span("build.address_index", rows=len(filtered_df)):
+        address_index = AddressIndex.from_dataframe(filtered_df)
+        address_index.persist(persist_dir)
+    logger.info(f"Address index persisted ({len(address_index.keys)} keys)")
+
+
 def get_nodes(input_file_path: str) -> tuple:
-    df, filtered_df = preprocess_csv(input_file_path)
+    parcel_store = get_parcel_store(input_file_path)
+    with span("build.materialize_nodes", rows=len(parcel_store)):
+        return parcel_store.materialize_all()
+
+
+def create_nodes(filtered_df: pd.DataFrame) -> tuple:
+    """
+    Row by row node creation (a dict and two TextNodes per parcel, all kept in memory).
+    Superseded by ParcelStore; kept for comparison in the memory benchmark.
+    """
     documents = convert_to_documents(filtered_df)
     # Limit to 10 for testing
     # documents = documents[:10]
@@ -246,35 +232,116 @@ def get_nodes(input_file_path: str) -> tuple:
     return full_nodes, owner_nodes, all_nodes
 
 
-def build_docstore_index(owner_nodes: list, all_nodes: list) -> None:
-    # define storage context
+def build_docstore_index(
+    owner_nodes: list,
+    all_nodes: list,
+    persist_dir: str = None,
+    vector_dim: int = None,
+    embedding_model=None,
+) -> None:
+    # Fall back to the environment / global settings when not given explicitly
+    persist_dir = persist_dir or os.getenv("persist_dir")
+    embedding_model = embedding_model or Settings.embed_model
 
     docstore = SimpleDocumentStore()
 
     # insert nodes into docstore
-    docstore.add_documents(all_nodes)
+    with span("build.docstore_add", nodes=len(all_nodes)):
+        docstore.add_documents(all_nodes)
 
-    # Define Index and Vector Store
-    vector_dim = int(os.getenv("vector_dim"))
-    logger.info(f"Loaded vector dimension from env: {vector_dim}")
-    faiss_index = faiss.IndexFlatL2(vector_dim)
-    vector_store = FaissVectorStore(faiss_index=faiss_index)
+    # Embed owner nodes up front, so the embedding time is measured separately
+    # from the FAISS add (VectorStoreIndex skips nodes that have an embedding)
+    with span("build.embedding", nodes=len(owner_nodes)):
+        embed_owner_nodes(owner_nodes, embedding_model)
 
-    # define storage context (will include vector store by default too)
-    storage_context = StorageContext.from_defaults(
-        docstore=docstore, vector_store=vector_store
-    )
+    storage_context = create_storage_context(docstore, vector_dim)
 
     # owner_nodes are defined as leaf nodes
+    with span("build.faiss_add", nodes=len(owner_nodes)):
+        owner_index = VectorStoreIndex(
+            nodes=owner_nodes,
+            index_name="owner_index",
+            show_progress=True,
+            insert_batch_size=10000,
+            storage_context=storage_context,
+            embed_model=embedding_model,
+        )
+    logger.info("Owner index created")
+
+    # Owner name index over the parcel rows (owner node i belongs to parcel node i)
+    with span("build.owner_name_index"):
+        owner_name_index = OwnerNameIndex.from_owner_names(
+            [node.metadata["owner_name"] for node in owner_nodes]
+        )
+
+    # Persist the storage context
+    with span("build.persist"):
+        owner_index.storage_context.persist(persist_dir=persist_dir)
+        owner_name_index.persist(persist_dir)
+    logger.info("Owner index persisted")
+
+
+def build_docstore_index_from_store(
+    parcel_store: ParcelStore,
+    persist_dir: str = None,
+    vector_dim: int = None,
+    embedding_model=None,
+    batch_size: int = 10000,
+) -> None:
+    """
+    Same index as build_docstore_index, but TextNodes are materialized from the
+    compact parcel store one batch at a time, so only one batch is alive at once.
+    The parcel store itself is persisted next to the index.
+    """
+    # Fall back to the environment / global settings when not given explicitly
+    persist_dir = persist_dir or os.getenv("persist_dir")
+    embedding_model = embedding_model or Settings.embed_model
+
+    storage_context = create_storage_context(SimpleDocumentStore(), vector_dim)
     owner_index = VectorStoreIndex(
-        nodes=owner_nodes,
-        index_name="owner_index",
-        show_progress=True,
-        insert_batch_size=10000,
+        nodes=[],
         storage_context=storage_context,
+        embed_model=embedding_model,
     )
+
+    for full_nodes, owner_nodes in parcel_store.iter_node_batches(batch_size):
+        # Full nodes are only stored; owner nodes (leaf nodes) are embedded and
+        # added to the docstore by the index
+        with span("build.docstore_add", nodes=len(full_nodes)):
+            storage_context.docstore.add_documents(full_nodes)
+        with span("build.embedding", nodes=len(owner_nodes)):
+            embed_owner_nodes(owner_nodes, embedding_model)
+        with span("build.faiss_add", nodes=len(owner_nodes)):
+            owner_index.insert_nodes(owner_nodes)
+        logger.info(
+            f"Indexed {int(full_nodes[-1].node_id) + 1}/{len(parcel_store)} parcels"
+        )
     logger.info("Owner index created")
+    with span("build.owner_name_index"):
+        owner_name_index = OwnerNameIndex.from_parcel_store(parcel_store)
 
     # Persist the storage context
-    owner_index.storage_context.persist(persist_dir=os.getenv("persist_dir"))
+    with span("build.persist"):
+        owner_index.storage_context.persist(persist_dir=persist_dir)
+        parcel_store.persist(persist_dir)
+        owner_name_index.persist(persist_dir)
     logger.info("Owner index persisted")
+
+
+def create_storage_context(docstore, vector_dim: int = None) -> StorageContext:
+    # Define Index and Vector Store
+    if vector_dim is None:
+        vector_dim = int(os.getenv("vector_dim"))
+        logger.info(f"Loaded vector dimension from env: {vector_dim}")
+    faiss_index = faiss.IndexFlatL2(vector_dim)
+    vector_store = FaissVectorStore(faiss_index=faiss_index)
+
+    # define storage context (will include vector store by default too)
+    return StorageContext.from_defaults(docstore=docstore, vector_store=vector_store)
+
+
+def embed_owner_nodes(owner_nodes: list, embedding_model) -> None:
+    texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in owner_nodes]
+    embeddings = embedding_model.get_text_embedding_batch(texts, show_progress=True)
+    for node, embedding in zip(owner_nodes, embeddings):
+        node.embedding = embedding
@@ -0,0 +1,155 @@
+"""
+Concurrent loading of the components of an index version.
+
+The FAISS index, the docstore and index store, the parcel store, the owner name
+and address indexes and the analytics table are independent files. They are
+loaded by a thread pool instead of one after another: FAISS reads, file I/O and
+most of the model loading release the GIL, so the startup takes about as long as
+the slowest component rather than the sum of all. Each component is timed as its
+own `startup.load_*` stage, the whole as `startup.load_components`.
+
+The docstore and index store come from the startup snapshot when the build wrote
+one (see snapshot.py), else from their JSON files. Both are loaded with the
+garbage collector paused.
+
+Functions:
+- component_tasks(persist_dir, ...): Stage name and loader of each component.
+- load_components(persist_dir, ...): Load the components concurrently.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.storage.index_store import SimpleIndexStore
+
+from .address_index import AddressIndex, address_index_file
+from .owner_name_index import OwnerNameIndex, owner_name_index_file
+from .parcel_store import ParcelStore, parcel_store_file
+from .snapshot import load_snapshot, paused_gc
+
+from utilities.custom_logger import logger
+from utilities.metrics import span
+
+
+def load_vector_store(persist_dir: str):
+    # faiss is imported on first use, not with this module
+    from llama_index.vector_stores.faiss import FaissVectorStore
+
+    return FaissVectorStore.from_persist_dir(persist_dir)
+
+
+def load_stores(persist_dir: str, use_snapshot: bool = True) -> dict:
+    """
+    {"docstore", "index_store", "owner_rows"}; owner_rows is None without snapshot.
+    """
+    stores = load_snapshot(persist_dir) if use_snapshot else None
+    if stores is not None:
+        logger.info(f"Loaded the startup snapshot of {persist_dir}")
+        return stores
+    with paused_gc():
+        return {
+            "docstore": SimpleDocumentStore.from_persist_dir(persist_dir),
+            "index_store": SimpleIndexStore.from_persist_dir(persist_dir),
+            "owner_rows": None,
+        }
+
+
+def load_analytics(persist_dir: str):
+    """
+    None when the appraisal table was not built with the index. The analytics
+    module imports pandas, so it is imported in the loader thread, not on import.
+    """
+    from .analytics import AnalyticsEngine, analytics_table_file
+
+    if not os.path.exists(os.path.join(persist_dir, analytics_table_file)):
+        return None
+    analytics = AnalyticsEngine(persist_dir)
+    analytics.warm_up()
+    return analytics
+
+
+def component_tasks(
+    persist_dir: str,
+    use_owner_name_index: bool = True,
+    use_parcel_retriever: bool = True,
+    use_snapshot: bool = True,
+) -> dict:
+    """
+    Component name -> (stage name, loader). Optional components are only
+    included when their file was built with the index (the analytics loader
+    checks for its table itself).
+    """
+
+    def built(file_name: str) -> bool:
+        return os.path.exists(os.path.join(persist_dir, file_name))
+
+    tasks = {
+        "vector_store": (
+            "startup.load_vector_store",
+            lambda: load_vector_store(persist_dir),
+        ),
+        "stores": (
+            "startup.load_docstore",
+            lambda: load_stores(persist_dir, use_snapshot=use_snapshot),
+        ),
+    }
+    if use_parcel_retriever and built(parcel_store_file):
+        tasks["parcel_store"] = (
+            "startup.load_parcel_store",
+            lambda: ParcelStore.from_persist_dir(persist_dir),
+        )
+    if use_owner_name_index and built(owner_name_index_file):
+        tasks["owner_name_index"] = (
+            "startup.load_owner_name_index",
+            lambda: OwnerNameIndex.from_persist_dir(persist_dir),
+        )
+    if built(address_index_file):
+        tasks["address_index"] = (
+            "startup.load_address_index",
+            lambda: AddressIndex.from_persist_dir(persist_dir),
+        )
+    tasks["analytics"] = (
+        "startup.load_analytics",
+        lambda: load_analytics(persist_dir),
+    )
+    return tasks
+
+
+def run_task(stage: str, loader: Callable):
+    with span(stage):
+        return loader()
+
+
+def load_components(
+    persist_dir: str,
+    use_owner_name_index: bool = True,
+    use_parcel_retriever: bool = True,
+    use_snapshot: bool = True,
+    extra_tasks: dict = None,
+    max_workers: int = None,
+) -> dict:
+    """
+    Component name -> loaded component. `extra_tasks` ({name: (stage, loader)}) are
+    loaded in the same pool, e.g. the models at startup. One thread per component
+    unless `max_workers` is given (1 loads them one after another). Components that were not
+    built with the index are missing from the result (or None). If a loader fails, its
+    exception is raised once the other loaders finished.
+    """
+    tasks = component_tasks(
+        persist_dir,
+        use_owner_name_index=use_owner_name_index,
+        use_parcel_retriever=use_parcel_retriever,
+        use_snapshot=use_snapshot,
+    )
+    tasks.update(extra_tasks or {})
+    with span("startup.load_components", components=len(tasks)):
+        with ThreadPoolExecutor(
+            max_workers=max_workers or len(tasks), thread_name_prefix="load"
+        ) as executor:
+            futures = {
+                name: executor.submit(run_task, stage, loader)
+                for name, (stage, loader) in tasks.items()
+            }
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,71 @@
+"""
+Application settings from the .env file.
+
+Kept free of heavy imports (pandas, llama-index, torch), so that the serving path
+and the command line tools can read their settings without loading the build code.
+"""
+
+import os
+
+from utilities.custom_logger import logger
+
+
+def load_env_file(file_path: str) -> None:
+    # Load environment variables from .env file
+    variables_to_define = [
+        "OPENAI_API_KEY",
+        "embeddings_llm",
+        "embeddings_cache_folder",
+        "data_path",
+        "property_file",
+        "persist_dir",
+        "vector_dim",
+        "llm_backend",
+        "mock_llm_latency_ms",
+        "index_watch_interval",
+        "index_drain_timeout",
+        "index_keep_versions",
+        "rerank_model",
+        "rerank_candidates",
+        "rerank_top_n",
+        "serving_workers",
+        "search_concurrency",
+        "openai_api_base",
+        "llm_max_concurrency",
+        "llm_rate_limit",
+        "llm_rate_burst",
+        "llm_queue_budget_ms",
+        "llm_max_queue",
+        "search_deadline_ms",
+    ]
+    variables_to_hide = [
+        "OPENAI_API_KEY",
+    ]
+    try:
+        with open(file_path, "r") as file:
+            for line in file:
+                # Remove whitespace and comments
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    # Split by the first '=' character
+                    key, value = line.split("=", 1)
+                    # Remove any surrounding quotes from the value
+                    value = value.strip().strip('"').strip("'")
+                    # Set the environment variable
+                    if key in variables_to_define:
+                        os.environ[key.strip()] = value
+                        if key in variables_to_hide:
+                            logger.info(
+                                f"Set environment variable: {key.strip()}=HIDDEN"
+                            )
+                        else:
+                            logger.info(
+                                f"Set environment variable: {key.strip()}={value}"
+                            )
+
+    except FileNotFoundError:
+        logger.error(f"Error: {file_path} not found.")
+        raise FileNotFoundError(f"{file_path} not found.")
+    except Exception as e:
+        logger.error(f"Error loading {file_path}: {e}")
+        raise e
@@ -4,36 +4,342 @@ The query engine is responsible for loading environment variables, models, and i
 and response synthesizer.
 
 Classes:
+    PropertyQueryEngine: Index, retriever and response synthesizer loaded from one persist directory.
     QueryEngineSingleton: A singleton class that initializes and manages the query engine.
+        A watcher thread loads newly published index versions in the background and swaps
+        them in; in-flight queries finish on the old engine, which is released once drained.
 
 Functions:
     __new__(cls, *args, **kwargs): Ensures only one instance of the class is created.
     __init__(self): Initializes the query engine if it is not already initialized.
-    _initialize(self): Loads environment variables, models, and indexes, and sets up the query engine.
-    query(self, query_text: str) -> Any: Executes a query using the initialized query engine.
+    _initialize(self): Loads environment variables, then the models and the index files concurrently,
+        and sets up the query engine.
+    reload(self): Loads the current index version if it changed and swaps it in.
+    query(self, query_text: str, profile: bool = False, priority: int = 0, deadline: float = None) -> Any: Executes a
+        query using the initialized query engine, recording per-stage timings and optionally profiling the request
+        with cProfile. With `llm_max_concurrency` set, the LLM synthesis goes through admission control (see
+        utilities/admission.py) and shed queries get the retrieved parcels without a generated answer.
 """
 
+import gc
 import os
+import threading
+import time
 from dotenv import find_dotenv
-from llama_index.vector_stores.faiss import FaissVectorStore
 from llama_index.core import get_response_synthesizer
 from llama_index.core import (
     StorageContext,
     load_index_from_storage,
     Settings,
 )
+from llama_index.core.base.response.schema import Response
 from llama_index.core.retrievers import AutoMergingRetriever
 from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import QueryBundle, MetadataMode
+from llama_index.core.utils import get_tokenizer
 
-from .build_index import load_env_file, get_models
+from .config import load_env_file
+from .models import get_models
+from .query_metrics import get_callback_manager
+from .index_versions import resolve_current
+from .rerank import CrossEncoderReranker, default_rerank_model
+from .component_loader import load_components
+from .parcel_retriever import ParcelRetriever
+from .owner_name_index import OwnerNameRetriever
 
+from utilities.admission import AdmissionController
 from utilities.custom_logger import logger
+from utilities.metrics import registry, span, profiled
+
+# Parcels listed in the answer when the LLM synthesis is shed
+fallback_parcels = 5
+
+
+class PropertyQueryEngine:
+    """
+    Loads the persisted owner index from `persist_dir` and wires the
+    retrievers and response synthesizer on top of it. Owner vector hits are
+    resolved to their parcels by the ParcelRetriever when the parcel store was
+    built with the index (`use_parcel_retriever`), else by the auto-merging retriever.
+    The models are passed in, so several engines (e.g. benchmarks) can coexist.
+    The index files are loaded concurrently (see component_loader.py), unless
+    `components` already loaded them. With an `admission` controller, the LLM
+    synthesis waits for admission and falls back to the retrieved parcels when shed.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str,
+        embedding_model,
+        generation_llm,
+        callback_manager=None,
+        similarity_top_k: int = 20,
+        reranker: CrossEncoderReranker = None,
+        use_owner_name_index: bool = True,
+        use_parcel_retriever: bool = True,
+        components: dict = None,
+        admission: AdmissionController = None,
+    ):
+        self.persist_dir = persist_dir
+        self.version = os.path.basename(os.path.normpath(persist_dir))
+        self.embed_model = embedding_model
+        self.generation_llm = generation_llm
+        self.admission = admission
+        # Number of queries running on this engine, used to drain it before release
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+        # Load the index files concurrently, unless they were loaded with the models
+        logger.info(f"Creating storage context from : {persist_dir}")
+        if components is None:
+            components = load_components(
+                persist_dir,
+                use_owner_name_index=use_owner_name_index,
+                use_parcel_retriever=use_parcel_retriever,
+            )
+        stores = components["stores"]
+
+        # Define storage context
+        storage_context = StorageContext.from_defaults(
+            docstore=stores["docstore"],
+            index_store=stores["index_store"],
+            vector_store=components["vector_store"],
+        )
+        # Load Index from Storage
+        with span("startup.load_index"):
+            owner_index = load_index_from_storage(
+                storage_context=storage_context,
+                embed_model=embedding_model,
+                callback_manager=callback_manager,
+            )
+
+        # Initialize query engine
+        self.parcel_store = components.get("parcel_store")
+        if self.parcel_store is not None:
+            dense_retriever = ParcelRetriever(
+                owner_index,
+                self.parcel_store,
+                embed_model=embedding_model,
+                similarity_top_k=similarity_top_k,
+                callback_manager=callback_manager,
+                rows=stores["owner_rows"],
+            )
+        else:
+            base_retriever = owner_index.as_retriever(similarity_top_k=similarity_top_k)
+            dense_retriever = AutoMergingRetriever(
+                base_retriever,
+                storage_context,
+                verbose=False,
+                callback_manager=callback_manager,
+            )
+
+        response_synthesizer = get_response_synthesizer(
+            llm=generation_llm,
+            response_mode="compact",
+            callback_manager=callback_manager,
+        )
+        # Owner name index as a fast first stage, when it was built with the index
+        retriever = dense_retriever
+        self.owner_name_index = components.get("owner_name_index")
+        if self.owner_name_index is not None:
+            retriever = OwnerNameRetriever(
+                self.owner_name_index,
+                storage_context.docstore,
+                fallback_retriever=dense_retriever,
+                similarity_top_k=similarity_top_k,
+                callback_manager=callback_manager,
+            )
+
+        # Address / property ID typeahead, when it was built with the index
+        self.address_index = components.get("address_index")
+        # Columnar appraisal table for aggregate questions, when it was built
+        self.analytics = components.get("analytics")
+
+        # Optional re-rank of the retrieved candidates down to a few nodes
+        node_postprocessors = [reranker] if reranker is not None else []
+        self.query_engine = RetrieverQueryEngine.from_args(
+            retriever=retriever,
+            llm=generation_llm,
+            response_synthesizer=response_synthesizer,
+            node_postprocessors=node_postprocessors,
+            callback_manager=callback_manager,
+        )
+
+        # Store index and storage context for potential future use
+        self.index = owner_index
+        self.storage_context = storage_context
+
+    def retrieve(self, query_text: str) -> tuple:
+        """
+        Embed the query once and retrieve the merged parcel nodes.
+        Returns the query bundle (with its embedding) and the retrieved nodes.
+        With the owner name index, the query is only embedded by the dense
+        retriever, i.e. not for queries naming an owner that the lookup found.
+        """
+        if self.owner_name_index is not None:
+            query_bundle = QueryBundle(query_str=query_text)
+        else:
+            with span("query.embed"):
+                embedding = self.embed_model.get_query_embedding(query_text)
+            query_bundle = QueryBundle(query_str=query_text, embedding=embedding)
+        with span("query.retrieve"):
+            nodes = self.query_engine.retrieve(query_bundle)
+        return query_bundle, nodes
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """
+        (label, parcel row) suggestions for a typed address or property ID prefix.
+        """
+        if self.address_index is None:
+            return []
+        return self.address_index.suggest(prefix, limit=limit)
+
+    def parcel_text(self, row: int) -> str:
+        """
+        Text of a parcel node, straight from the docstore.
+        """
+        return self.storage_context.docstore.get_node(str(row)).text
+
+    def acquire(self) -> None:
+        with self._idle:
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Wait until no query is running on this engine. Returns False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def query(
+        self,
+        query_text: str,
+        profile: bool = False,
+        priority: int = 0,
+        deadline: float = None,
+        admitted: bool = False,
+        shed_reason: str = None,
+    ):
+        """
+        `priority` (lower first) and `deadline` (time.monotonic()) order the wait
+        for the LLM when an admission controller is set. When the caller ran the
+        admission itself (the App process for its pre-forked workers), `admitted`
+        skips the controller and `shed_reason` answers without the LLM.
+        """
+        # Query router: aggregate questions are answered from the analytics table
+        if self.analytics is not None:
+            with span("query.analytics"):
+                answer = self.analytics.answer(query_text)
+            if answer is not None:
+                registry.increment("router.analytics")
+                return answer
+        registry.increment("router.rag")
+        with profiled(profile, name="query"), span("query.total"):
+            query_bundle, nodes = self.retrieve(query_text)
+            registry.observe("query.context_tokens", count_context_tokens(nodes))
+
+            def synthesize():
+                with span("query.synthesize", nodes=len(nodes)):
+                    return self.query_engine.synthesize(query_bundle, nodes)
+
+            if shed_reason is not None:
+                return retrieval_only_response(nodes, shed_reason)
+            if self.admission is None or admitted:
+                return synthesize()
+            return self.admission.run(
+                synthesize,
+                lambda reason: retrieval_only_response(nodes, reason),
+                priority=priority,
+                deadline=deadline,
+            )
+
+
+def retrieval_only_response(nodes: list, reason: str) -> Response:
+    """
+    Answer without the LLM: the best retrieved parcels as they are.
+    """
+    registry.increment("query.retrieval_only")
+    parcels = [
+        node.node.get_content(metadata_mode=MetadataMode.LLM)
+        for node in nodes[:fallback_parcels]
+    ]
+    if parcels:
+        text = (
+            "The answer service is busy, these are the best matching properties:\n\n"
+            + "\n\n".join(parcels)
+        )
+    else:
+        text = "The answer service is busy and no matching properties were found."
+    return Response(
+        response=text,
+        source_nodes=nodes,
+        metadata={"retrieval_only": True, "shed_reason": reason},
+    )
+
+
+def count_context_tokens(nodes: list) -> int:
+    """
+    Tokens of the retrieved node texts that go into the synthesis prompt.
+    """
+    tokenizer = get_tokenizer()
+    return sum(
+        len(tokenizer(node.node.get_content(metadata_mode=MetadataMode.LLM)))
+        for node in nodes
+    )
+
+
+def get_reranker() -> tuple:
+    """
+    Re-ranker and candidate pool size from the environment.
+    Returns (None, None) when `rerank_top_n` is not set or 0.
+    """
+    top_n = int(os.getenv("rerank_top_n") or 0)
+    if top_n <= 0:
+        return None, None
+    reranker = CrossEncoderReranker(
+        model=os.getenv("rerank_model") or default_rerank_model,
+        top_n=top_n,
+    )
+    candidates = int(os.getenv("rerank_candidates") or 50)
+    logger.info(f"Re-ranking {candidates} candidates down to {top_n}")
+    return reranker, candidates
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Admission control of the LLM synthesis from the environment.
+    Returns None when `llm_max_concurrency` is not set or 0.
+    """
+    max_concurrency = int(os.getenv("llm_max_concurrency") or 0)
+    if max_concurrency <= 0:
+        return None
+    admission = AdmissionController(
+        name="llm.admission",
+        max_concurrency=max_concurrency,
+        rate=float(os.getenv("llm_rate_limit") or 0),
+        burst=float(os.getenv("llm_rate_burst") or 0) or None,
+        queue_budget_s=float(os.getenv("llm_queue_budget_ms") or 5000) / 1000.0,
+        max_queue=int(os.getenv("llm_max_queue") or 64),
+    )
+    logger.info(
+        f"LLM admission control: {max_concurrency} concurrent requests, "
+        f"queue budget {admission.queue_budget_s}s"
+    )
+    return admission
 
 
 class QueryEngineSingleton:
     _instance = None
     _index = None
     _query_engine = None
+    _engine = None
+    _swap_lock = threading.Lock()
 
     @classmethod
     def __new__(cls, *args, **kwargs):
@@ -44,51 +350,142 @@ class QueryEngineSingleton:
     def __init__(self):
         if self._index is None and self._query_engine is None:
             logger.info("Initializing QueryEngineSingleton")
-            self._initialize()
+            with span("startup.initialize"):
+                self._initialize()
 
     def _initialize(self):
         # Load environment variables
         load_env_file(find_dotenv())
-        embedding_model, generation_llm = get_models()
-        Settings.embed_model = embedding_model
-        Settings.llm = generation_llm
         persist_dir = os.getenv("persist_dir")
         if not persist_dir:
             raise EnvironmentError("Environment variable 'persist_dir' is not set.")
+        self._persist_dir = persist_dir
+        # The models load in the same pool as the index files
+        index_dir = resolve_current(persist_dir)
+        components = load_components(
+            index_dir,
+            extra_tasks={"models": ("startup.load_models", get_models)},
+        )
+        embedding_model, generation_llm = components.pop("models")
+        callback_manager = get_callback_manager()
+        generation_llm.callback_manager = callback_manager
+        Settings.embed_model = embedding_model
+        Settings.llm = generation_llm
+        Settings.callback_manager = callback_manager
+        reranker, rerank_candidates = get_reranker()
+        if reranker is not None:
+            reranker.callback_manager = callback_manager
+        self._models = (embedding_model, generation_llm, callback_manager)
+        self._reranker = reranker
+        self._similarity_top_k = rerank_candidates or 20
+        # Shared by all index versions, the limits are the LLM's, not the index's
+        self._admission = get_admission_controller()
 
-        # Load index
-        logger.info(f"Creating storage context from : {persist_dir}")
-
-        # Define Index and Vector Store
-        vector_store = FaissVectorStore.from_persist_dir(persist_dir)
+        self._set_engine(self._load_engine(index_dir, components))
+        self._start_watcher()
 
-        # Define storage context
-        storage_context = StorageContext.from_defaults(
-            vector_store=vector_store, persist_dir=persist_dir
+    def _load_engine(
+        self, index_dir: str, components: dict = None
+    ) -> PropertyQueryEngine:
+        embedding_model, generation_llm, callback_manager = self._models
+        return PropertyQueryEngine(
+            persist_dir=index_dir,
+            embedding_model=embedding_model,
+            generation_llm=generation_llm,
+            callback_manager=callback_manager,
+            similarity_top_k=self._similarity_top_k,
+            reranker=self._reranker,
+            components=components,
+            admission=self._admission,
         )
-        # Load Index from Storage
-        owner_index = load_index_from_storage(storage_context=storage_context)
 
-        # Initialize query engine
-        base_retriever = owner_index.as_retriever(similarity_top_k=20)
-        auto_merge_retriever = AutoMergingRetriever(
-            base_retriever, storage_context, verbose=False
-        )
+    def _set_engine(self, engine: PropertyQueryEngine) -> PropertyQueryEngine:
+        with self._swap_lock:
+            old_engine = self._engine
+            self._engine = engine
+            # Store index and query engine for potential future use
+            self._index = engine.index
+            self._query_engine = engine.query_engine
+        registry.set_gauge("index.loaded_at", time.time())
+        logger.info(f"Serving index version {engine.version}")
+        return old_engine
 
-        response_synthesizer = get_response_synthesizer(
-            llm=generation_llm,
-            response_mode="compact",
-        )
-        self._query_engine = RetrieverQueryEngine.from_args(
-            retriever=auto_merge_retriever,
-            llm=generation_llm,
-            response_synthesizer=response_synthesizer,
+    def _start_watcher(self) -> None:
+        # Seconds between checks of the CURRENT pointer, 0 disables hot swapping
+        interval = float(os.getenv("index_watch_interval", "30"))
+        if interval <= 0:
+            return
+        thread = threading.Thread(
+            target=self._watch, args=(interval,), name="index-watcher", daemon=True
         )
+        thread.start()
 
-        # Store index and storage context for potential future use
-        self._index = owner_index
+    def _watch(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                self.reload()
+            except Exception as e:
+                registry.increment("index.swap_errors")
+                logger.error(f"Loading the new index version failed: {e}")
+
+    def reload(self) -> bool:
+        """
+        Load the current index version in the background and swap it in if it changed.
+        Queries already running finish on the old engine; its memory is released
+        after they drained (or after `index_drain_timeout` seconds).
+        """
+        index_dir = resolve_current(self._persist_dir)
+        if os.path.normpath(index_dir) == os.path.normpath(self._engine.persist_dir):
+            return False
+
+        logger.info(f"New index version found: {index_dir}")
+        with span("index.swap_load"):
+            new_engine = self._load_engine(index_dir)
+        old_engine = self._set_engine(new_engine)
+        registry.increment("index.swaps")
+
+        drain_timeout = float(os.getenv("index_drain_timeout", "300"))
+        with span("index.swap_drain"):
+            drained = old_engine.wait_idle(drain_timeout)
+        if not drained:
+            logger.warning(
+                f"Index version {old_engine.version} still had queries running "
+                f"after {drain_timeout}s, releasing it anyway"
+            )
+        logger.info(f"Released index version {old_engine.version}")
+        del old_engine
+        gc.collect()
+        return True
+
+    @property
+    def engine(self) -> PropertyQueryEngine:
+        return self._engine
+
+    @property
+    def admission(self) -> AdmissionController:
+        """
+        The LLM admission controller shared by all engines, or None.
+        """
+        return self._admission
 
-    def query(self, query_text: str) -> str:
+    def query(
+        self,
+        query_text: str,
+        profile: bool = False,
+        priority: int = 0,
+        deadline: float = None,
+    ) -> str:
         if self._query_engine is None:
             raise RuntimeError("Query engine is not initialized.")
-        return self._query_engine.query(query_text)
+        # Take the engine and count the query under the swap lock, so a swap
+        # cannot release an engine between the two
+        with self._swap_lock:
+            engine = self._engine
+            engine.acquire()
+        try:
+            return engine.query(
+                query_text, profile=profile, priority=priority, deadline=deadline
+            )
+        finally:
+            engine.release()
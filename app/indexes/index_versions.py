@@ -0,0 +1,81 @@
+"""
+Versioned index directories under `persist_dir`, with an atomic "current" pointer.
+
+Layout:
+    persist_dir/
+        CURRENT                      <- name of the live version, e.g. "20250101-020000"
+        versions/20250101-020000/    <- one complete persisted index per build
+        versions/20250102-020000/
+
+A build writes a new version directory and only then publishes it by replacing
+CURRENT with os.replace, which is atomic: a reader sees either the old or the new
+version, never a partially written index. A persist_dir without CURRENT (indexes
+built before versioning) is used as is.
+
+Functions:
+- new_version_dir(persist_dir): Path of a fresh, empty version directory.
+- publish_version(persist_dir, version_dir): Atomically make `version_dir` current.
+- resolve_current(persist_dir): Directory of the current index.
+- prune_versions(persist_dir, keep): Delete old versions, keeping the newest `keep`.
+"""
+
+import os
+import shutil
+from datetime import datetime
+
+from utilities.custom_logger import logger
+
+current_file = "CURRENT"
+versions_folder = "versions"
+
+
+def new_version_dir(persist_dir: str) -> str:
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    version_dir = os.path.join(persist_dir, versions_folder, version)
+    suffix = 1
+    while os.path.exists(version_dir):
+        version_dir = os.path.join(persist_dir, versions_folder, f"{version}-{suffix}")
+        suffix += 1
+    os.makedirs(version_dir)
+    return version_dir
+
+
+def publish_version(persist_dir: str, version_dir: str) -> None:
+    version = os.path.basename(os.path.normpath(version_dir))
+    pointer_path = os.path.join(persist_dir, current_file)
+    tmp_path = f"{pointer_path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(version + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, pointer_path)
+    logger.info(f"Published index version {version}")
+
+
+def resolve_current(persist_dir: str) -> str:
+    pointer_path = os.path.join(persist_dir, current_file)
+    if not os.path.exists(pointer_path):
+        return persist_dir
+    with open(pointer_path, "r") as file:
+        version = file.read().strip()
+    return os.path.join(persist_dir, versions_folder, version)
+
+
+def prune_versions(persist_dir: str, keep: int = 2) -> list:
+    """
+    Delete all but the newest `keep` versions; the current version is never deleted.
+    """
+    root = os.path.join(persist_dir, versions_folder)
+    if not os.path.isdir(root):
+        return []
+    current = os.path.normpath(resolve_current(persist_dir))
+    versions = sorted(os.listdir(root))
+    removed = []
+    for version in versions[: max(len(versions) - keep, 0)]:
+        version_dir = os.path.join(root, version)
+        if os.path.normpath(version_dir) == current:
+            continue
+        shutil.rmtree(version_dir, ignore_errors=True)
+        removed.append(version)
+        logger.info(f"Removed old index version {version}")
+    return removed
@@ -0,0 +1,113 @@
+"""
+Deterministic local stand-in for the OpenAI generation model.
+
+The mock "answers" by listing the parcels (property ID and owner) found in the
+context of the prompt, so responses are stable across runs and still depend on
+what was retrieved. An optional fixed and per-output-token delay emulates the
+generation latency of a hosted model for benchmarks and load tests.
+Select it with `llm_backend=mock` in the .env file. The same answers are served
+over HTTP by benchmarks/mock_llm_server.py, for tests through the OpenAI client.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any
+
+from llama_index.core.base.llms.types import (
+    CompletionResponse,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.bridge.pydantic import Field
+from llama_index.core.llms.callbacks import llm_completion_callback
+from llama_index.core.llms.custom import CustomLLM
+
+# Matches the text produced by build_index.create_node_representation
+parcel_pattern = re.compile(
+    r"The property ID is (?P<property_id>\S+?)\. "
+    r"It is owned by (?P<owner>.+?), with an owner ID"
+)
+
+
+def mock_answer(prompt: str) -> str:
+    """
+    The parcels (owner and property ID) found in the prompt, in order.
+    """
+    lines = []
+    seen = set()
+    for match in parcel_pattern.finditer(prompt):
+        property_id = match.group("property_id")
+        if property_id in seen:
+            continue
+        seen.add(property_id)
+        lines.append(f"- {match.group('owner')}: property ID {property_id}")
+    if not lines:
+        return "No matching properties found."
+    return "Matching properties:\n" + "\n".join(lines)
+
+
+class LocalMockLLM(CustomLLM):
+    latency_ms: float = Field(
+        default=0.0, description="Fixed delay added to every completion."
+    )
+    latency_per_token_ms: float = Field(
+        default=0.0, description="Delay added per generated (whitespace) token."
+    )
+    context_window: int = Field(
+        default=128000, description="Context window reported to the prompt helper."
+    )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalMockLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(
+            context_window=self.context_window,
+            num_output=256,
+            model_name="local-mock",
+        )
+
+    def _answer(self, prompt: str) -> str:
+        return mock_answer(prompt)
+
+    def _delay_seconds(self, text: str) -> float:
+        return (
+            self.latency_ms + self.latency_per_token_ms * len(text.split())
+        ) / 1000.0
+
+    @llm_completion_callback()
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        text = self._answer(prompt)
+        delay = self._delay_seconds(text)
+        if delay > 0:
+            time.sleep(delay)
+        return CompletionResponse(text=text)
+
+    @llm_completion_callback()
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        text = self._answer(prompt)
+        delay = self._delay_seconds(text)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return CompletionResponse(text=text)
+
+    @llm_completion_callback()
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseGen:
+        text = self._answer(prompt)
+        delay = self._delay_seconds(text)
+        if delay > 0:
+            time.sleep(delay)
+
+        def gen() -> CompletionResponseGen:
+            yield CompletionResponse(text=text, delta=text)
+
+        return gen()
@@ -0,0 +1,56 @@
+"""
+Embedding and generation models of the App.
+
+The model libraries (torch and transformers for the embedding model, the OpenAI
+client) are imported when the models are created rather than on import, so that
+their import time is part of the "startup.load_models" stage and only the
+selected LLM backend is loaded.
+"""
+
+import os
+
+from utilities.custom_logger import logger
+
+
+def get_generation_llm(llm_backend: str = None):
+    # "openai" (default) or "mock" for the deterministic local stand-in
+    llm_backend = llm_backend or os.getenv("llm_backend") or "openai"
+    if llm_backend == "mock":
+        from .mock_llm import LocalMockLLM
+
+        logger.info("Using local mock LLM for generation")
+        return LocalMockLLM(latency_ms=float(os.getenv("mock_llm_latency_ms", "0")))
+    if llm_backend == "openai":
+        from llama_index.llms.openai import OpenAI
+
+        # openai_api_base points the client to an OpenAI compatible server,
+        # e.g. benchmarks/mock_llm_server.py for load tests
+        api_base = os.getenv("openai_api_base") or None
+        if api_base:
+            logger.info(f"Using OpenAI compatible server at {api_base}")
+        return OpenAI(
+            model="gpt-4o-mini",
+            temperature=0.0,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            api_base=api_base,
+        )
+    raise ValueError(f"Unknown llm_backend: {llm_backend}")
+
+
+def get_models(embeddings_llm: str = None, llm_backend: str = None) -> tuple:
+    # Define variables from environment variables, unless given explicitly
+    embeddings_llm = embeddings_llm or os.getenv("embeddings_llm")
+    logger.info(f"embeddings_llm:{embeddings_llm}")
+    embeddings_cache_folder = os.getenv("embeddings_cache_folder")
+    # Embedding model (imports torch and transformers)
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    embedding_model = HuggingFaceEmbedding(
+        model_name=embeddings_llm,
+        cache_folder=embeddings_cache_folder,
+        embed_batch_size=32,
+    )
+
+    # Generation model
+    generation_llm = get_generation_llm(llm_backend)
+    return embedding_model, generation_llm
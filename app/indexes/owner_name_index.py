@@ -0,0 +1,509 @@
+"""
+Owner name index for fast lookups of (possibly misspelled) owner names.
+
+Queries such as "What properties are owned by 'Smeeth'" do not need a dense vector
+search: the owner name index answers them directly from precomputed structures.
+- Every distinct word of the owner names ("SMITH", "JOHN", ...) is indexed with
+  - a SymSpell style deletion dictionary: all strings obtained by deleting up to
+    `max_edit_distance` characters from the word's prefix, mapped to the word.
+    A query word is matched by looking up its own deletes, then verified with the
+    (optimal string alignment) edit distance. The distance allowed grows with the
+    length of the query word (see word_max_distance): short words such as "DAVE"
+    must match exactly, or they would match "LAKE" and "KING", while "SMITHES"
+    still matches "SMITH".
+  - its Metaphone key, so phonetic spellings ("SMEETH" and "SMITH" are both
+    "SM0") match beyond the edit distance.
+- Words map to the distinct owner names containing them, names map to parcel rows.
+
+Lookups are sub-millisecond and the candidates are used as the first stage of the
+retriever. `OwnerNameRetriever` returns the matching parcel nodes directly only
+when the query clearly names an owner (quoted text or "owned by ...") and an owner
+name matches it exactly. Misspelled owner names, and other queries, e.g. addresses or subdivisions that share words with entity owners
+("4001 CAMROSE DR" and "CAMROSE HOLDINGS LLC"), also run the dense retriever and
+the owner matches are fused with its results (reciprocal rank fusion).
+
+The index is built from the owner names of the parcels (row i is parcel node str(i))
+and persisted next to the docstore.
+
+Functions:
+- metaphone(word): Metaphone key of a word.
+- edit_distance(a, b, max_distance): Optimal string alignment distance, bounded.
+- word_max_distance(word, max_edit_distance): Edit distance allowed for a query word.
+- explicit_owner_query(query_str): The owner name a query asks for, if it names one.
+- fuse_ranked(rankings, top_k): Reciprocal rank fusion of ranked node lists.
+
+Classes:
+- OwnerNameIndex: The index.
+- OwnerNameRetriever: LlamaIndex retriever using the index as a first stage.
+"""
+
+import os
+import pickle
+import re
+from typing import List
+
+import numpy as np
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from utilities.custom_logger import logger
+from utilities.metrics import registry, span
+
+owner_name_index_file = "owner_name_index.pkl"
+
+# Words ignored in owner names and in queries
+stop_words = {
+    "AND",
+    "THE",
+    "OF",
+    "WHAT",
+    "WHO",
+    "WHICH",
+    "PROPERTIES",
+    "PROPERTY",
+    "ARE",
+    "IS",
+    "OWNED",
+    "OWNS",
+    "OWN",
+    "BY",
+    "FOR",
+    "SHOW",
+    "FIND",
+    "LIST",
+    "ALL",
+    "ME",
+}
+# Score of a word match by edit distance; phonetic only matches score lower
+edit_distance_scores = {0: 1.0, 1: 0.8, 2: 0.6}
+phonetic_score = 0.5
+
+# Reciprocal rank fusion constant: 1 / (rrf_k + rank) per ranking
+rrf_k = 60
+
+owner_query_patterns = [
+    re.compile(r"['\"](.+?)['\"]"),
+    re.compile(r"\bowned by\s+(.+)$", re.IGNORECASE),
+]
+
+vowels = set("AEIOU")
+
+
+def name_words(text: str) -> list:
+    words = re.findall(r"[A-Z]+", str(text).upper())
+    return [word for word in words if len(word) > 1 and word not in stop_words]
+
+
+def explicit_owner_query(query_str: str) -> str:
+    """
+    The owner name the query asks for: quoted text, else the text after "owned by",
+    else None (the query does not clearly name an owner).
+    """
+    for pattern in owner_query_patterns:
+        match = pattern.search(query_str)
+        if match:
+            return match.group(1)
+    return None
+
+
+def word_max_distance(word: str, max_edit_distance: int) -> int:
+    """
+    0 for words of up to 4 characters, 1 for 5, else max_edit_distance.
+    """
+    if len(word) <= 4:
+        return 0
+    if len(word) == 5:
+        return min(1, max_edit_distance)
+    return max_edit_distance
+
+
+def fuse_ranked(rankings: list, top_k: int) -> List[NodeWithScore]:
+    """
+    Reciprocal rank fusion of lists of NodeWithScore (each best first), by node ID.
+    The score of a node is the sum of 1 / (rrf_k + rank) over the lists.
+    """
+    scores = {}
+    nodes = {}
+    for ranking in rankings:
+        for rank, node_with_score in enumerate(ranking, start=1):
+            node_id = node_with_score.node.node_id
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (rrf_k + rank)
+            nodes.setdefault(node_id, node_with_score.node)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [
+        NodeWithScore(node=nodes[node_id], score=scores[node_id]) for node_id in ranked
+    ]
+
+
+def metaphone(word: str) -> str:
+    """
+    Metaphone key (Lawrence Philips' original rules) of an upper case word.
+    "0" stands for "TH", "X" for "SH"/"CH".
+    """
+    word = "".join(c for c in word.upper() if c.isalpha())
+    if not word:
+        return ""
+    # Initial letter exceptions
+    if word[:2] in ("KN", "GN", "PN", "AE", "WR"):
+        word = word[1:]
+    elif word[0] == "X":
+        word = "S" + word[1:]
+    elif word[:2] == "WH":
+        word = "W" + word[2:]
+
+    key = []
+    length = len(word)
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        next1 = word[i + 1] if i + 1 < length else ""
+        next2 = word[i + 2] if i + 2 < length else ""
+        if c == prev and c != "C":
+            continue
+        if c in vowels:
+            if i == 0:
+                key.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == length - 1):
+                key.append("B")
+        elif c == "C":
+            if next1 == "I" and next2 == "A":
+                key.append("X")
+            elif next1 == "H":
+                key.append("K" if prev == "S" else "X")
+            elif next1 in ("I", "E", "Y"):
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif c == "D":
+            if next1 == "G" and next2 in ("E", "I", "Y"):
+                key.append("J")
+            else:
+                key.append("T")
+        elif c == "G":
+            if next1 == "H" and not (i + 2 >= length or next2 in vowels):
+                continue
+            if next1 == "N" and (i + 2 == length or word[i + 1 :] == "NED"):
+                continue
+            if next1 in ("I", "E", "Y") and prev != "G":
+                key.append("J")
+            else:
+                key.append("K")
+        elif c == "H":
+            if prev in ("C", "S", "P", "T", "G"):
+                continue
+            if prev in vowels and next1 not in vowels:
+                continue
+            key.append("H")
+        elif c == "K":
+            if prev != "C":
+                key.append("K")
+        elif c == "P":
+            key.append("F" if next1 == "H" else "P")
+        elif c == "Q":
+            key.append("K")
+        elif c == "S":
+            if next1 == "H" or (next1 == "I" and next2 in ("O", "A")):
+                key.append("X")
+            else:
+                key.append("S")
+        elif c == "T":
+            if next1 == "I" and next2 in ("O", "A"):
+                key.append("X")
+            elif next1 == "H":
+                key.append("0")
+            elif not (next1 == "C" and next2 == "H"):
+                key.append("T")
+        elif c == "V":
+            key.append("F")
+        elif c in ("W", "Y"):
+            if next1 in vowels:
+                key.append(c)
+        elif c == "X":
+            key.append("KS")
+        elif c == "Z":
+            key.append("S")
+        else:
+            key.append(c)
+    return "".join(key)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance of `a` and `b`,
+    or max_distance + 1 as soon as it is known to be larger than max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if (
+                i > 1
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+                and previous2 is not None
+            ):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def deletes(word: str, max_edit_distance: int, prefix_length: int) -> set:
+    """
+    All strings obtained by deleting up to `max_edit_distance` characters
+    from the first `prefix_length` characters of `word` (including the prefix itself).
+    """
+    prefix = word[:prefix_length]
+    results = {prefix}
+    frontier = {prefix}
+    for _ in range(max_edit_distance):
+        next_frontier = set()
+        for candidate in frontier:
+            if len(candidate) <= 1:
+                continue
+            for i in range(len(candidate)):
+                next_frontier.add(candidate[:i] + candidate[i + 1 :])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+class OwnerNameIndex:
+    def __init__(
+        self,
+        words: list,
+        word_names: tuple,
+        name_rows: tuple,
+        names: list,
+        max_edit_distance: int = 2,
+        prefix_length: int = 7,
+    ):
+        self.words = words
+        self.names = names
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        # CSR layouts: word id -> name ids, name id -> parcel rows
+        self._word_offsets, self._word_name_ids = word_names
+        self._name_offsets, self._name_row_ids = name_rows
+        self._name_lengths = np.fromiter(
+            (len(name) for name in names), dtype=np.int32, count=len(names)
+        )
+        self._deletes = {}
+        self._phonetic = {}
+        for word_id, word in enumerate(words):
+            for delete in deletes(word, max_edit_distance, prefix_length):
+                self._deletes.setdefault(delete, []).append(word_id)
+            self._phonetic.setdefault(metaphone(word), []).append(word_id)
+
+    @classmethod
+    def from_owner_names(cls, owner_names: list, **kwargs) -> "OwnerNameIndex":
+        """
+        `owner_names[i]` is the owner name of parcel row i (parcel node str(i)).
+        """
+        names = []
+        name_ids = {}
+        codes = np.empty(len(owner_names), dtype=np.int32)
+        for row, owner_name in enumerate(owner_names):
+            if not isinstance(owner_name, str):
+                codes[row] = -1
+                continue
+            codes[row] = name_ids.setdefault(owner_name, len(names))
+            if codes[row] == len(names):
+                names.append(owner_name)
+        return cls.from_name_codes(codes, names, **kwargs)
+
+    @classmethod
+    def from_parcel_store(cls, parcel_store, **kwargs) -> "OwnerNameIndex":
+        column = parcel_store.column("owner_names")
+        return cls.from_name_codes(column.codes, column.values, **kwargs)
+
+    @classmethod
+    def from_name_codes(cls, codes: np.ndarray, names: list, **kwargs):
+        """
+        `codes[row]` is the index of the owner name of parcel `row` in `names` (-1: none).
+        """
+        names = [name if isinstance(name, str) else "" for name in names]
+        codes = np.asarray(codes)
+
+        # name id -> parcel rows
+        valid_rows = np.flatnonzero(codes >= 0)
+        order = valid_rows[np.argsort(codes[valid_rows], kind="stable")]
+        counts = np.bincount(codes[valid_rows], minlength=len(names))
+        name_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        name_rows = (name_offsets, order.astype(np.int32))
+
+        # word id -> name ids
+        word_name_lists = {}
+        for name_id, name in enumerate(names):
+            for word in set(name_words(name)):
+                word_name_lists.setdefault(word, []).append(name_id)
+        words = sorted(word_name_lists)
+        word_counts = [len(word_name_lists[word]) for word in words]
+        word_offsets = np.concatenate([[0], np.cumsum(word_counts)]).astype(np.int64)
+        word_name_ids = np.fromiter(
+            (name_id for word in words for name_id in word_name_lists[word]),
+            dtype=np.int32,
+            count=int(word_offsets[-1]),
+        )
+        return cls(words, (word_offsets, word_name_ids), name_rows, names, **kwargs)
+
+    def match_words(self, word: str) -> dict:
+        """
+        Indexed words matching `word`, with their match score.
+        """
+        max_distance = word_max_distance(word, self.max_edit_distance)
+        matches = {}
+        candidates = set()
+        for delete in deletes(word, max_distance, self.prefix_length):
+            candidates.update(self._deletes.get(delete, ()))
+        for word_id in candidates:
+            distance = edit_distance(word, self.words[word_id], max_distance)
+            if distance <= max_distance:
+                matches[word_id] = edit_distance_scores[distance]
+        for word_id in self._phonetic.get(metaphone(word), ()):
+            matches.setdefault(word_id, phonetic_score)
+        return matches
+
+    def lookup(self, owner_query: str, top_k: int = 20, min_score: float = 0.5):
+        """
+        Parcel rows of the owner names best matching `owner_query`,
+        as a list of (row, score), best first.
+        Every query word contributes its best matching word of a name;
+        the name score is the average over the query words.
+        """
+        query_words = name_words(owner_query)
+        if not query_words:
+            return []
+
+        # Best score of every query word per name, as flat (name id, score) arrays
+        name_ids = []
+        name_scores = []
+        for query_word in query_words:
+            matches = self.match_words(query_word)
+            if not matches:
+                continue
+            word_ids = np.fromiter(matches, dtype=np.int64, count=len(matches))
+            scores = np.fromiter(matches.values(), dtype=np.float32, count=len(matches))
+            starts = self._word_offsets[word_ids]
+            counts = self._word_offsets[word_ids + 1] - starts
+            ids = self._word_name_ids[
+                np.repeat(starts - np.cumsum(counts) + counts, counts)
+                + np.arange(counts.sum())
+            ]
+            word_scores = np.repeat(scores, counts)
+            # A name can contain several words matching the same query word
+            order = np.argsort(-word_scores, kind="stable")
+            ids, first = np.unique(ids[order], return_index=True)
+            name_ids.append(ids)
+            name_scores.append(word_scores[order][first])
+        if not name_ids:
+            return []
+
+        # Name score: average over the query words, ties go to shorter names
+        ids, inverse = np.unique(np.concatenate(name_ids), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(name_scores))
+        totals /= len(query_words)
+        keep = totals >= min_score
+        ids, totals = ids[keep], totals[keep]
+        ranked = np.lexsort((self._name_lengths[ids], -totals))
+
+        results = []
+        for position in ranked.tolist():
+            if len(results) >= top_k:
+                break
+            start, end = self._name_offsets[ids[position] : ids[position] + 2]
+            score = float(totals[position])
+            for row in self._name_row_ids[start:end].tolist():
+                results.append((row, score))
+        return results[:top_k]
+
+    def persist(self, persist_dir: str) -> None:
+        os.makedirs(persist_dir, exist_ok=True)
+        with open(os.path.join(persist_dir, owner_name_index_file), "wb") as file:
+            pickle.dump(
+                {
+                    "words": self.words,
+                    "word_names": (self._word_offsets, self._word_name_ids),
+                    "name_rows": (self._name_offsets, self._name_row_ids),
+                    "names": self.names,
+                    "max_edit_distance": self.max_edit_distance,
+                    "prefix_length": self.prefix_length,
+                },
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> "OwnerNameIndex":
+        """
+        The deletion dictionary and phonetic keys are rebuilt on load,
+        so the file only holds the words, names and rows.
+        """
+        with open(os.path.join(persist_dir, owner_name_index_file), "rb") as file:
+            data = pickle.load(file)
+        return cls(**data)
+
+
+class OwnerNameRetriever(BaseRetriever):
+    """
+    First stage retriever: parcels of the owner names matching the query, from the
+    owner name index. Queries naming an owner (explicit_owner_query) that matches an
+    owner name exactly are answered from it alone; other queries with owner matches
+    are fused with the results of `fallback_retriever` (the dense retriever), which
+    also answers the queries without any owner match.
+    """
+
+    def __init__(
+        self,
+        owner_name_index: OwnerNameIndex,
+        docstore,
+        fallback_retriever: BaseRetriever,
+        similarity_top_k: int = 20,
+        callback_manager=None,
+    ):
+        self._owner_name_index = owner_name_index
+        self._docstore = docstore
+        self._fallback_retriever = fallback_retriever
+        self._similarity_top_k = similarity_top_k
+        super().__init__(callback_manager=callback_manager)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        owner_query = explicit_owner_query(query_bundle.query_str)
+        with span("query.owner_name_lookup"):
+            matches = self._owner_name_index.lookup(
+                owner_query or query_bundle.query_str,
+                top_k=self._similarity_top_k,
+            )
+        if not matches:
+            registry.increment("owner_index.fallbacks")
+            return self._fallback_retriever.retrieve(query_bundle)
+
+        nodes = self._docstore.get_nodes([str(row) for row, _ in matches])
+        owner_nodes = [
+            NodeWithScore(node=node, score=score)
+            for node, (_, score) in zip(nodes, matches)
+        ]
+        # Only an exact match is trusted alone: a misspelled name may be closer to
+        # another owner than to the one meant, the dense retriever may find it
+        if owner_query is not None and matches[0][1] >= edit_distance_scores[0]:
+            registry.increment("owner_index.hits")
+            logger.debug(f"Owner name index matched {len(nodes)} parcels")
+            return owner_nodes
+
+        # Owner words in a query that may be about something else (an address, a
+        # subdivision), or inexact owner matches: keep the dense candidates and
+        # rank both lists together
+        registry.increment("owner_index.fused")
+        dense_nodes = self._fallback_retriever.retrieve(query_bundle)
+        return fuse_ranked([owner_nodes, dense_nodes], self._similarity_top_k)
@@ -0,0 +1,95 @@
+"""
+Dense retriever resolving FAISS hits straight to parcels.
+
+Every owner leaf node has exactly one parent, the parcel node, and their IDs are
+derived from the parcel row ("{row}_owner" -> "{row}"). The AutoMergingRetriever
+does not know that: per query it fetches each owner node from the docstore, then
+each parent through the node relationships, and runs its merge-ratio logic.
+
+This retriever instead
+- maps FAISS result positions to parcel rows through an int32 array built once
+  from the index (position -> row, -1 for non-owner vectors),
+- builds the parent nodes of all hits in one batch from the columnar ParcelStore
+  (see ParcelStore.parent_nodes), without docstore lookups.
+Parcels are returned nearest first, scored with the FAISS distance like the
+vector retriever does. Stages: `query.vector_search` and `query.parcel_fetch`.
+
+Classes:
+- ParcelRetriever: The retriever.
+
+Functions:
+- owner_rows(nodes_dict, size): FAISS position -> parcel row array.
+"""
+
+from typing import List
+
+import numpy as np
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from .parcel_store import ParcelStore
+
+from utilities.metrics import span
+
+
+def owner_rows(nodes_dict: dict, size: int) -> np.ndarray:
+    """
+    `nodes_dict` maps FAISS positions (as str) to node IDs, as in the index struct.
+    """
+    rows = np.full(size, -1, dtype=np.int32)
+    for position, node_id in nodes_dict.items():
+        row, _, suffix = node_id.partition("_")
+        if suffix == "owner":
+            rows[int(position)] = int(row)
+    return rows
+
+
+class ParcelRetriever(BaseRetriever):
+    def __init__(
+        self,
+        index,
+        parcel_store: ParcelStore,
+        embed_model,
+        similarity_top_k: int = 20,
+        callback_manager=None,
+        rows: np.ndarray = None,
+    ):
+        """
+        `rows` is the precomputed owner_rows array of the index (e.g. from the
+        startup snapshot); it is built from the index struct when not given.
+        """
+        self._faiss_index = index.vector_store.client
+        self._parcel_store = parcel_store
+        self._embed_model = embed_model
+        self._similarity_top_k = similarity_top_k
+        if rows is None or len(rows) != self._faiss_index.ntotal:
+            rows = owner_rows(index.index_struct.nodes_dict, self._faiss_index.ntotal)
+        self._rows = rows
+        super().__init__(callback_manager=callback_manager)
+
+    def search(self, query_embedding: list) -> tuple:
+        """
+        Parcel rows and FAISS distances of the nearest owner nodes, nearest first.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)[np.newaxis, :]
+        distances, positions = self._faiss_index.search(query, self._similarity_top_k)
+        positions = positions[0]
+        found = positions >= 0
+        rows = self._rows[positions[found]]
+        distances = distances[0][found]
+        owner = rows >= 0
+        return rows[owner], distances[owner]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        if query_bundle.embedding is None:
+            query_bundle.embedding = self._embed_model.get_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+        with span("query.vector_search"):
+            rows, distances = self.search(query_bundle.embedding)
+        with span("query.parcel_fetch", parcels=len(rows)):
+            nodes = self._parcel_store.parent_nodes(rows)
+        return [
+            NodeWithScore(node=node, score=float(distance))
+            for node, distance in zip(nodes, distances.tolist())
+        ]
@@ -0,0 +1,276 @@
+"""
+Compact, columnar in-memory store of the parcels used to build the owner index.
+
+Instead of a dict per row plus two TextNode objects per parcel, the store keeps
+one column per field:
+- repeated values (cities, ZIPs, owner names, DBA names) as int32 codes into a
+  list of unique, interned values, so e.g. "PLANO" exists once;
+- integer columns (property ID) as numpy int64 arrays;
+- near unique text (legal description, situs address) as plain lists.
+
+TextNodes are materialized lazily, per parcel or in batches, only when they are
+needed for the docstore, for embedding or for retrieval. The text and metadata
+are identical to build_index.create_node_representation. For retrieval,
+parent_nodes gathers the parcels of many rows at once with numpy indexing.
+pandas is only imported to build the store.
+
+Classes:
+- ParcelRecord: __slots__ view of one parcel.
+- ParcelStore: The columnar store.
+"""
+
+import math
+import os
+import pickle
+import sys
+from typing import TYPE_CHECKING
+
+import numpy as np
+from llama_index.core.schema import TextNode, NodeRelationship, RelatedNodeInfo
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+parcel_store_file = "parcel_store.pkl"
+
+# Parcel field -> column of the filtered (renamed) dataframe
+parcel_fields = {
+    "property_id": "property ID",
+    "legal_description": "legal description",
+    "owner_id": "owner ID",
+    "owner_names": "owner name",
+    "situs_concatenated": "situs concatenated",
+    "situs_city": "situs city",
+    "situs_zip": "situs ZIP",
+    "dba": "doing business as name",
+}
+# Fields with many repeated values, stored as codes into interned unique values
+categorical_fields = {"owner_names", "situs_city", "situs_zip", "dba"}
+
+missing = float("nan")
+
+
+def is_missing(value) -> bool:
+    """
+    pd.isna for the values of a store column (None or NaN), without pandas.
+    """
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class CategoricalColumn:
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes: np.ndarray, values: list):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def from_series(cls, series: "pd.Series") -> "CategoricalColumn":
+        import pandas as pd
+
+        codes, uniques = pd.factorize(series)
+        values = [sys.intern(v) if isinstance(v, str) else v for v in uniques.tolist()]
+        return cls(codes.astype(np.int32), values)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int):
+        code = self.codes[i]
+        # pandas marks missing values with code -1; keep them as NaN like pandas did
+        return self.values[code] if code >= 0 else missing
+
+    def take(self, rows: np.ndarray) -> list:
+        values = self.values
+        return [values[code] if code >= 0 else missing for code in self.codes[rows]]
+
+
+class IntegerColumn:
+    __slots__ = ("values",)
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> int:
+        return int(self.values[i])
+
+    def take(self, rows: np.ndarray) -> list:
+        return self.values[rows].tolist()
+
+
+def take_column(column, rows: np.ndarray) -> list:
+    """
+    Values of `rows` of a store column, in one batch.
+    """
+    if isinstance(column, list):
+        return [column[row] for row in rows.tolist()]
+    return column.take(rows)
+
+
+def build_column(series: "pd.Series", categorical: bool):
+    import pandas as pd
+
+    if categorical:
+        return CategoricalColumn.from_series(series)
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return IntegerColumn(series.to_numpy(dtype=np.int64))
+    return series.tolist()
+
+
+def combine_owner_names(df: "pd.DataFrame") -> "pd.Series":
+    """
+    "owner name" and "owner name additional" combined the same way as
+    create_node_representation, vectorized over the whole dataframe.
+    """
+    owner_name = df["owner name"]
+    additional = df["owner name additional"]
+    no_additional = additional.isna() | additional.isin(["N/A", "nan"])
+    combined = owner_name.astype(str) + " and " + additional.astype(str)
+    return owner_name.where(no_additional, combined)
+
+
+class ParcelRecord:
+    __slots__ = tuple(parcel_fields)
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def text(self) -> str:
+        dba = self.dba
+        value = (
+            f"This property, located at {self.situs_concatenated}, is legally described as "
+            f"'{self.legal_description}'. The property ID is {self.property_id}. "
+            f"It is owned by {self.owner_names}, with an owner ID of {self.owner_id}. "
+        )
+        if not (dba == "N/A" or is_missing(dba)):
+            value += f"The property is also known as {dba}."
+        return f"Property Information - {self.situs_concatenated}. {value}"
+
+    def metadata(self) -> dict:
+        return {
+            "property_id": self.property_id,
+            "situs_city": self.situs_city,
+            "situs_zip": self.situs_zip,
+            "owner_name": self.owner_names,
+            "legal_description": self.legal_description,
+        }
+
+
+def full_node(record: ParcelRecord, i: int) -> TextNode:
+    node_full = TextNode(text=record.text(), id_=str(i), metadata=record.metadata())
+    node_full.relationships[NodeRelationship.CHILD] = [
+        RelatedNodeInfo(node_id=f"{i}_owner")
+    ]
+    return node_full
+
+
+class ParcelStore:
+    def __init__(self, columns: dict, size: int):
+        self._columns = columns
+        self._size = size
+
+    @classmethod
+    def from_dataframe(cls, filtered_df: "pd.DataFrame") -> "ParcelStore":
+        df = filtered_df.reset_index(drop=True)
+        df = df.assign(**{"owner name": combine_owner_names(df)})
+        columns = {
+            field: build_column(df[column], field in categorical_fields)
+            for field, column in parcel_fields.items()
+        }
+        return cls(columns, len(df))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, field: str):
+        return self._columns[field]
+
+    def record(self, i: int) -> ParcelRecord:
+        return ParcelRecord(
+            **{field: column[i] for field, column in self._columns.items()}
+        )
+
+    def records(self, rows) -> list:
+        """
+        Records of `rows`, gathered column by column.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        fields = list(self._columns)
+        columns = [take_column(self._columns[field], rows) for field in fields]
+        return [ParcelRecord(**dict(zip(fields, values))) for values in zip(*columns)]
+
+    def parent_nodes(self, rows) -> list:
+        """
+        Full (parent) nodes of `rows`, as stored in the docstore under str(row).
+        """
+        return [
+            full_node(record, row)
+            for record, row in zip(self.records(rows), np.asarray(rows).tolist())
+        ]
+
+    def nodes(self, i: int) -> tuple:
+        """
+        Materialize the full (parent) node and the owner (leaf) node of parcel `i`.
+        """
+        record = self.record(i)
+        node_full = full_node(record, i)
+        node_owner = TextNode(
+            text=record.owner_names,
+            id_=f"{i}_owner",
+            metadata={
+                "owner_name": node_full.metadata["owner_name"],
+                "legal_description": node_full.metadata["legal_description"],
+            },
+        )
+        node_owner.relationships[NodeRelationship.PARENT] = RelatedNodeInfo(
+            node_id=node_full.node_id
+        )
+        return node_full, node_owner
+
+    def iter_node_batches(self, batch_size: int = 10000):
+        """
+        Yield (full_nodes, owner_nodes) for consecutive batches of parcels,
+        so only one batch of TextNodes is alive at a time.
+        """
+        for start in range(0, self._size, batch_size):
+            full_nodes = []
+            owner_nodes = []
+            for i in range(start, min(start + batch_size, self._size)):
+                node_full, node_owner = self.nodes(i)
+                full_nodes.append(node_full)
+                owner_nodes.append(node_owner)
+            yield full_nodes, owner_nodes
+
+    def materialize_all(self) -> tuple:
+        """
+        All nodes at once, in the (full_nodes, owner_nodes, all_nodes) shape of get_nodes.
+        """
+        full_nodes = []
+        owner_nodes = []
+        all_nodes = []
+        for batch_full, batch_owner in self.iter_node_batches():
+            full_nodes.extend(batch_full)
+            owner_nodes.extend(batch_owner)
+            for node_full, node_owner in zip(batch_full, batch_owner):
+                all_nodes.append(node_full)
+                all_nodes.append(node_owner)
+        return full_nodes, owner_nodes, all_nodes
+
+    def persist(self, persist_dir: str) -> None:
+        os.makedirs(persist_dir, exist_ok=True)
+        with open(os.path.join(persist_dir, parcel_store_file), "wb") as file:
+            pickle.dump(
+                {"size": self._size, "columns": self._columns},
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> "ParcelStore":
+        with open(os.path.join(persist_dir, parcel_store_file), "rb") as file:
+            data = pickle.load(file)
+        return cls(data["columns"], data["size"])
@@ -1,4 +1,6 @@
 import csv
+import sys
+from collections.abc import Sequence
 
 """
 Generate Python Python program that will read CSV file, and output array of items, one item per row.
@@ -43,16 +45,41 @@ key_for_search = {
 }
 
 
+class PropertyItems(Sequence):
+    """
+    The items of read_csv_and_generate_items, stored column by column with interned
+    values (cities, ZIPs, street names etc. are shared between rows).
+    The [text, dict] item of a row is only built when it is accessed.
+    """
+
+    __slots__ = ("columns", "keys", "_values")
+
+    def __init__(self, columns: list):
+        self.columns = columns
+        self.keys = [key_for_search.get(col, col) for col in columns]
+        self._values = [[] for _ in columns]
+
+    def append_row(self, row: list) -> None:
+        # Short rows are padded with None, like csv.DictReader does
+        row = row + [None] * (len(self._values) - len(row))
+        for values, val in zip(self._values, row):
+            values.append(sys.intern(val) if val is not None else None)
+
+    def __len__(self) -> int:
+        return len(self._values[0]) if self._values else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        row = [values[i] for values in self._values]
+        text_string = ", ".join([f"{key}: {val}" for key, val in zip(self.keys, row)])
+        return [text_string, dict(zip(self.keys, row))]
+
+
 def read_csv_and_generate_items(file_path):
-    items = []
-    with open(file_path, mode="r", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
+    with open(file_path, mode="r", encoding="utf-8", newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        items = PropertyItems(next(reader, []))
         for row in reader:
-            text_string = ", ".join(
-                [f"{key_for_search.get(col, col)}: {val}" for col, val in row.items()]
-            )
-            remapped_dict = {
-                key_for_search.get(col, col): val for col, val in row.items()
-            }
-            items.append([text_string, remapped_dict])
+            items.append_row(row)
     return items
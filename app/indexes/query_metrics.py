@@ -0,0 +1,99 @@
+"""
+LlamaIndex callback handler that feeds stage timings into the metrics registry.
+
+The explicit spans in `QueryEngineSingleton.query` cover embedding, retrieval and
+synthesis as a whole. This handler splits those further using LlamaIndex events:
+- query.vector_retrieve: FAISS search plus leaf node docstore fetch
+  (the RETRIEVE event nested inside the AutoMergingRetriever)
+- query.auto_merge: parent docstore lookups and merge logic
+  (outer RETRIEVE minus the nested vector retrieve)
+The ParcelRetriever has no nested retrieve; its RETRIEVE event is recorded as
+query.vector_retrieve and split by its own query.vector_search / query.parcel_fetch spans.
+- query.prompt_assembly: prompt templating
+- query.llm: the OpenAI call
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.schema import CBEventType
+
+from utilities.metrics import record_duration
+
+event_stage_names = {
+    CBEventType.TEMPLATING: "query.prompt_assembly",
+    CBEventType.LLM: "query.llm",
+}
+
+
+class StageTimingHandler(BaseCallbackHandler):
+    def __init__(self) -> None:
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self._lock = threading.Lock()
+        # event_id -> (event_type, parent_id, start time)
+        self._open_events = {}
+        # outer retrieve event_id -> time spent in nested retrieves
+        self._nested_retrieve_ms = {}
+
+    def on_event_start(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        parent_id: str = "",
+        **kwargs: Any,
+    ) -> str:
+        with self._lock:
+            self._open_events[event_id] = (event_type, parent_id, time.perf_counter())
+        return event_id
+
+    def on_event_end(
+        self,
+        event_type: CBEventType,
+        payload: Optional[Dict[str, Any]] = None,
+        event_id: str = "",
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            event = self._open_events.pop(event_id, None)
+            if event is None:
+                return
+            _, parent_id, start = event
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            parent = self._open_events.get(parent_id)
+
+            if event_type == CBEventType.RETRIEVE:
+                if parent is not None and parent[0] == CBEventType.RETRIEVE:
+                    self._nested_retrieve_ms[parent_id] = (
+                        self._nested_retrieve_ms.get(parent_id, 0.0) + duration_ms
+                    )
+                    stage = "query.vector_retrieve"
+                else:
+                    nested_ms = self._nested_retrieve_ms.pop(event_id, None)
+                    if nested_ms is None:
+                        stage = "query.vector_retrieve"
+                    else:
+                        stage = "query.auto_merge"
+                        duration_ms -= nested_ms
+            else:
+                stage = event_stage_names.get(event_type)
+
+        if stage is not None:
+            record_duration(stage, duration_ms)
+
+    def start_trace(self, trace_id: Optional[str] = None) -> None:
+        pass
+
+    def end_trace(
+        self,
+        trace_id: Optional[str] = None,
+        trace_map: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        pass
+
+
+def get_callback_manager() -> CallbackManager:
+    return CallbackManager([StageTimingHandler()])
@@ -0,0 +1,104 @@
+"""
+Optional CPU re-rank stage between retrieval and synthesis.
+
+The retriever fetches a wider candidate pool (`rerank_candidates` owner nodes, merged
+to their parcel nodes), a small cross-encoder scores every (query, parcel text) pair
+and only the best `rerank_top_n` parcels are sent to the LLM.
+
+- Pairs are scored in batches with sentence-transformers' CrossEncoder, which is
+  already installed with llama-index-embeddings-huggingface. The model is loaded on
+  first use.
+- Scores are kept in an LRU cache keyed by (query, node hash), so repeated queries
+  and parcels returned for several queries are not scored twice.
+- Time spent is recorded as the `query.rerank` stage; cache hits and misses as the
+  `rerank.cache_hits` / `rerank.cache_misses` counters.
+
+Classes:
+- CrossEncoderReranker: LlamaIndex node postprocessor doing the above.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+
+from utilities.custom_logger import logger
+from utilities.metrics import registry, span
+
+default_rerank_model = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker(BaseNodePostprocessor):
+    model: str = Field(default=default_rerank_model, description="Cross-encoder name.")
+    top_n: int = Field(default=5, description="Number of nodes kept after re-ranking.")
+    batch_size: int = Field(default=32, description="Pairs scored per model call.")
+    max_length: int = Field(default=256, description="Max tokens per scored pair.")
+    cache_size: int = Field(default=10000, description="Cached (query, node) scores.")
+    _model: Any = PrivateAttr(default=None)
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CrossEncoderReranker"
+
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Loading re-rank model: {self.model}")
+            with span("startup.load_rerank_model"):
+                self._model = CrossEncoder(
+                    self.model, max_length=self.max_length, device="cpu"
+                )
+        return self._model
+
+    def score(self, query_str: str, nodes: List[NodeWithScore]) -> List[float]:
+        keys = [(query_str, node.node.hash) for node in nodes]
+        scores = [None] * len(nodes)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        misses = [i for i, score in enumerate(scores) if score is None]
+        registry.increment("rerank.cache_hits", len(nodes) - len(misses))
+        registry.increment("rerank.cache_misses", len(misses))
+        if not misses:
+            return scores
+
+        pairs = [
+            (query_str, nodes[i].node.get_content(metadata_mode=MetadataMode.EMBED))
+            for i in misses
+        ]
+        predicted = self._get_model().predict(
+            pairs, batch_size=self.batch_size, show_progress_bar=False
+        )
+        with self._lock:
+            for i, value in zip(misses, predicted):
+                scores[i] = float(value)
+                self._cache[keys[i]] = scores[i]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        if query_bundle is None:
+            raise ValueError("Missing query bundle.")
+        if not nodes:
+            return []
+        with span("query.rerank", candidates=len(nodes), top_n=self.top_n):
+            scores = self.score(query_bundle.query_str, nodes)
+        reranked = [
+            NodeWithScore(node=node.node, score=score)
+            for node, score in zip(nodes, scores)
+        ]
+        reranked.sort(key=lambda node: node.score, reverse=True)
+        return reranked[: self.top_n]
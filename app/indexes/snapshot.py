@@ -0,0 +1,129 @@
+"""
+Startup snapshot of an index version: the structures the App serves from, in one
+binary file written at the end of the build.
+
+Loading an index version parses docstore.json and index_store.json, and the
+parcel retriever then walks the index struct to map FAISS positions to parcel
+rows. The snapshot holds the parsed docstore and index store data and that
+position -> row array in one file, so a cold start reads them in one pass
+(with the garbage collector paused, see `paused_gc`) instead of parsing JSON and
+rebuilding them.
+
+The snapshot is optional: it is only used when its format and the llama-index
+version match, and when the files it was made from (size and modification time)
+did not change since; otherwise the JSON files are loaded as before.
+
+Functions:
+- write_snapshot(persist_dir): Write the snapshot of an index version.
+- load_snapshot(persist_dir): Docstore, index store and owner rows, or None.
+- paused_gc(): Context manager pausing the garbage collector while loading.
+"""
+
+import gc
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from importlib.metadata import version
+
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.storage.index_store import SimpleIndexStore
+
+from .parcel_retriever import owner_rows
+
+from utilities.custom_logger import logger
+
+snapshot_file = "snapshot.pkl"
+# Bump when the content of the snapshot changes
+snapshot_format = 1
+# Files the snapshot is made from
+source_files = ("docstore.json", "index_store.json", "default__vector_store.json")
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def paused_gc():
+    """
+    Pause the garbage collector for the enclosed block. Loading creates millions of
+    objects that all survive, so the collections it triggers only cost time.
+    Components load in several threads: the collector is re-enabled (if it was
+    enabled) when the last block exits.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def source_signature(persist_dir: str) -> dict:
+    signature = {}
+    for name in source_files:
+        path = os.path.join(persist_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature[name] = (stat.st_size, stat.st_mtime_ns)
+    return signature
+
+
+def manifest(persist_dir: str) -> dict:
+    return {
+        "format": snapshot_format,
+        "llama_index": version("llama-index-core"),
+        "sources": source_signature(persist_dir),
+    }
+
+
+def write_snapshot(persist_dir: str) -> str:
+    docstore = SimpleDocumentStore.from_persist_dir(persist_dir)
+    index_store = SimpleIndexStore.from_persist_dir(persist_dir)
+    nodes_dict = index_store.index_structs()[0].nodes_dict
+    size = max((int(position) for position in nodes_dict), default=-1) + 1
+    data = {
+        "docstore": docstore.to_dict(),
+        "index_store": index_store.to_dict(),
+        "owner_rows": owner_rows(nodes_dict, size),
+    }
+    file_path = os.path.join(persist_dir, snapshot_file)
+    temp_path = f"{file_path}.tmp"
+    # The manifest comes first, so a stale snapshot is rejected without reading it
+    with open(temp_path, "wb") as file:
+        pickle.dump(manifest(persist_dir), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, file_path)
+    logger.info(f"Startup snapshot written to {file_path}")
+    return file_path
+
+
+def load_snapshot(persist_dir: str) -> dict:
+    """
+    {"docstore", "index_store", "owner_rows"} from the snapshot of `persist_dir`,
+    or None when there is no snapshot or it does not match the index files.
+    """
+    file_path = os.path.join(persist_dir, snapshot_file)
+    if not os.path.exists(file_path):
+        return None
+    with paused_gc(), open(file_path, "rb") as file:
+        if pickle.load(file) != manifest(persist_dir):
+            logger.warning(
+                f"Startup snapshot {file_path} does not match the index files, "
+                "loading them instead"
+            )
+            return None
+        data = pickle.load(file)
+    return {
+        "docstore": SimpleDocumentStore.from_dict(data["docstore"]),
+        "index_store": SimpleIndexStore.from_dict(data["index_store"]),
+        "owner_rows": data["owner_rows"],
+    }
@@ -0,0 +1,55 @@
+"""
+Compare LLM synthesis under a burst of concurrent queries without and with
+admission control, against the local mock LLM server.
+
+Example:
+    python app/run_admission_benchmark.py --clients 32 --latency-ms 500 --provider-concurrency 4
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.admission_benchmark import run_admission_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--provider-concurrency", type=int, default=4)
+    parser.add_argument("--queue-budget-ms", type=float, default=2000.0)
+    parser.add_argument("--deadline-ms", type=float, default=3000.0)
+    parser.add_argument("--embeddings-llm", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default="benchmark-work/admission")
+    parser.add_argument("--output", default="admission-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_admission_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        num_queries=args.queries,
+        clients=args.clients,
+        latency_ms=args.latency_ms,
+        provider_concurrency=args.provider_concurrency,
+        queue_budget_ms=args.queue_budget_ms,
+        deadline_ms=args.deadline_ms,
+        embeddings_llm=args.embeddings_llm,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Admission benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
-from gradio_app.app import main as app
+import time
+
+from utilities.metrics import record_duration
+
+start = time.perf_counter()
+from gradio_app.app import main as app  # noqa: E402
+
+record_duration("startup.import_app", (time.perf_counter() - start) * 1000)
 
 if __name__ == "__main__":
     app()
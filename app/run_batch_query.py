@@ -0,0 +1,68 @@
+"""
+Run a batch of owner / parcel lookups from a file and write the matches to CSV or JSONL.
+
+Queries are embedded in large batches and searched with one FAISS call per chunk;
+the LLM is only used for queries that ask for it (--synthesize for all of them, or a
+"synthesize" column / key in .csv / .jsonl input).
+
+Example:
+    python app/run_batch_query.py --input owners.txt --output matches.csv --top-k 5
+    python app/run_batch_query.py --input owners.csv --output answers.jsonl \\
+        --template "What properties are owned by '{}'" --synthesize
+"""
+
+import argparse
+import time
+
+from indexes.batch_query import BatchQueryRunner, read_queries, write_results
+from indexes.index_query import QueryEngineSingleton
+from utilities.custom_logger import logger
+from utilities.metrics import registry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--input", required=True, help=".txt, .csv or .jsonl file")
+    parser.add_argument("--output", required=True, help=".csv or .jsonl file")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--template", help="Format string applied to every query")
+    parser.add_argument(
+        "--synthesize", action="store_true", help="Generate an LLM answer per query"
+    )
+    parser.add_argument("--embed-batch-size", type=int, default=256)
+    parser.add_argument(
+        "--max-concurrency", type=int, default=8, help="Concurrent LLM requests"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    queries = read_queries(args.input, template=args.template)
+    if args.synthesize:
+        for query in queries:
+            query["synthesize"] = True
+    logger.info(f"Loaded {len(queries)} queries from {args.input}")
+
+    runner = BatchQueryRunner(
+        QueryEngineSingleton().engine,
+        top_k=args.top_k,
+        embed_batch_size=args.embed_batch_size,
+        max_concurrency=args.max_concurrency,
+    )
+    start = time.perf_counter()
+    results = runner.run(queries)
+    elapsed = time.perf_counter() - start
+    write_results(results, args.output)
+
+    logger.info(
+        f"Processed {len(queries)} queries in {elapsed:.2f}s "
+        f"({len(queries) / elapsed:.1f} queries/s), results in {args.output}"
+    )
+    registry.log_report()
+
+
+if __name__ == "__main__":
+    main()
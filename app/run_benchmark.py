@@ -0,0 +1,107 @@
+"""
+Run the offline retrieval/latency benchmark and save the results as JSON.
+
+Example:
+    python app/run_benchmark.py --parcels 10000 --queries 100 --output bench.json
+    python app/run_benchmark.py --output new.json --compare bench.json
+    python app/run_benchmark.py --rerank-top-n 5 --rerank-candidates 50
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.retrieval_benchmark import run_benchmark, compare_results
+from indexes.rerank import default_rerank_model
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--embeddings-llm", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument(
+        "--mock-latency-ms",
+        type=float,
+        default=0.0,
+        help="Fixed generation delay of the mock LLM",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--rerank-top-n",
+        type=int,
+        default=0,
+        help="Also run the queries with the cross-encoder re-rank stage (0: off)",
+    )
+    parser.add_argument("--rerank-candidates", type=int, default=50)
+    parser.add_argument("--rerank-model", default=default_rerank_model)
+    parser.add_argument(
+        "--no-owner-name-index",
+        action="store_true",
+        help="Retrieve with the dense retriever only",
+    )
+    parser.add_argument("--work-dir", default="benchmark-work")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative change tolerated before a metric counts as a regression",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        num_queries=args.queries,
+        embeddings_llm=args.embeddings_llm,
+        similarity_top_k=args.top_k,
+        mock_latency_ms=args.mock_latency_ms,
+        seed=args.seed,
+        rerank_top_n=args.rerank_top_n,
+        rerank_candidates=args.rerank_candidates,
+        rerank_model=args.rerank_model,
+        use_owner_name_index=not args.no_owner_name_index,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Benchmark results written to {args.output}")
+    logger.info(
+        f"Build: {results['build']['parcels_per_second']:.1f} parcels/s, "
+        f"index size: {results['index']['size_bytes'] / 1e6:.1f} MB, "
+        f"load: {results['load']['seconds']:.2f}s, "
+        f"QPS: {results['query']['qps']:.2f}"
+    )
+    for kind, recalls in results["recall"].items():
+        logger.info(f"Recall ({kind}): {recalls}")
+    if "rerank" in results:
+        rerank = results["rerank"]
+        logger.info(
+            f"Re-rank {rerank['candidates']} -> {rerank['top_n']}: "
+            f"adds {rerank['added_latency_ms']['p50']:.1f} ms (p50), "
+            f"saves {rerank['context_tokens_saved']:.0f} context tokens per query"
+        )
+        for kind, recalls in rerank["recall"].items():
+            logger.info(f"Re-ranked recall ({kind}): {recalls}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, results, tolerance=args.tolerance)
+        for regression in regressions:
+            logger.error(regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
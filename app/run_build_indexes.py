@@ -7,12 +7,18 @@ from dotenv import find_dotenv
 from llama_index.core import Settings
 
 from utilities.custom_logger import logger
+from utilities.metrics import registry, span
 from indexes.build_index import (
-    get_nodes,
-    build_docstore_index,
-    load_env_file,
-    get_models,
+    preprocess_csv,
+    create_parcel_store,
+    build_docstore_index_from_store,
+    build_address_index,
+    build_analytics_store,
 )
+from indexes.config import load_env_file
+from indexes.models import get_models
+from indexes.index_versions import new_version_dir, publish_version, prune_versions
+from indexes.snapshot import write_snapshot
 
 
 def main():
@@ -25,9 +31,25 @@ def main():
     data_path = os.getenv("data_path")
     property_file = os.getenv("property_file")
     property_file_path = os.path.join(data_path, property_file)
-    full_nodes, owner_nodes, all_nodes = get_nodes(property_file_path)
-    build_docstore_index(owner_nodes=owner_nodes, all_nodes=all_nodes)
+    # Build into a new version directory; the running App picks it up once published
+    persist_dir = os.getenv("persist_dir")
+    version_dir = new_version_dir(persist_dir)
+    with span("build.total"):
+        with span("build.csv_parse"):
+            df, filtered_df = preprocess_csv(property_file_path)
+        build_analytics_store(df, persist_dir=version_dir)
+        del df
+        parcel_store = create_parcel_store(filtered_df)
+        build_docstore_index_from_store(parcel_store, persist_dir=version_dir)
+        build_address_index(filtered_df, persist_dir=version_dir)
+        # Ready-to-serve structures for a fast cold start of the App
+        with span("build.snapshot"):
+            write_snapshot(version_dir)
     logger.info("Index built")
+    registry.log_report()
+    registry.dump(os.path.join(version_dir, "build_metrics.json"))
+    publish_version(persist_dir, version_dir)
+    prune_versions(persist_dir, keep=int(os.getenv("index_keep_versions", "2")))
 
 
 if __name__ == "__main__":
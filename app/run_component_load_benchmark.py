@@ -0,0 +1,45 @@
+"""
+Compare the load time of an index version: sequential JSON load, concurrent JSON
+load and concurrent load with the startup snapshot.
+
+Example:
+    python app/run_component_load_benchmark.py --parcels 10000 --repeats 5
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.component_load_benchmark import run_component_load_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--embeddings-llm", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default="benchmark-work/component-load")
+    parser.add_argument("--output", default="component-load-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_component_load_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        repeats=args.repeats,
+        embeddings_llm=args.embeddings_llm,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Component load benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Replay a query mix against the running app and produce a saturation curve.
+
+Start the app first (set llm_backend="mock" in .env to run offline), then e.g.:
+    python app/run_load_test.py --mode closed --levels 1 2 4 8 --duration 30
+    python app/run_load_test.py --mode open --levels 0.5 1 2 4 --queries queries.json
+"""
+
+import argparse
+import csv
+import json
+
+from benchmarks.load_test import GradioQueueClient, load_query_mix, saturation_curve
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:7860")
+    parser.add_argument("--api-name", default="search")
+    parser.add_argument(
+        "--mode",
+        choices=["closed", "open"],
+        default="closed",
+        help="closed: fixed number of users, open: Poisson arrivals at a fixed rate",
+    )
+    parser.add_argument(
+        "--levels",
+        type=float,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Concurrency (closed loop) or requests/second (open loop) per step",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per step")
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="Mean think time (closed loop)"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--queries", help="Query mix file (.json or one per line)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load-test-results.json")
+    return parser.parse_args()
+
+
+def write_curve_csv(curve: dict, file_path: str) -> None:
+    with open(file_path, mode="w", newline="", encoding="utf-8") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(
+            [
+                "level",
+                "throughput_rps",
+                "error_rate",
+                "latency_p50_ms",
+                "latency_p95_ms",
+                "latency_p99_ms",
+                "server_queue_delay_p95_ms",
+            ]
+        )
+        for step in curve["steps"]:
+            writer.writerow(
+                [
+                    step["level"],
+                    round(step["throughput_rps"], 3),
+                    round(step["error_rate"], 4),
+                    round(step["latency_ms"]["p50"], 1),
+                    round(step["latency_ms"]["p95"], 1),
+                    round(step["latency_ms"]["p99"], 1),
+                    round(step["server_queue_delay_ms"]["p95"], 1),
+                ]
+            )
+
+
+def main():
+    args = parse_args()
+    queries = load_query_mix(args.queries)
+    client = GradioQueueClient(args.url, api_name=args.api_name, timeout=args.timeout)
+    curve = saturation_curve(
+        client,
+        queries,
+        mode=args.mode,
+        levels=args.levels,
+        duration=args.duration,
+        think_time=args.think_time,
+        max_in_flight=args.max_in_flight,
+        seed=args.seed,
+    )
+    curve["url"] = args.url
+    with open(args.output, "w") as file:
+        json.dump(curve, file, indent=2)
+    csv_path = args.output.rsplit(".", 1)[0] + ".csv"
+    write_curve_csv(curve, csv_path)
+    logger.info(f"Load test results written to {args.output} and {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare the per-request logging overhead of synchronous handlers with the
+queue-based logging pipeline.
+
+Example:
+    python app/run_logging_benchmark.py --threads 8 --requests 2000 --output logging.json
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.logging_benchmark import run_logging_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="Simulated requests per thread"
+    )
+    parser.add_argument("--work-dir", default="benchmark-work/logging")
+    parser.add_argument("--output", default="logging-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_logging_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_threads=args.threads,
+        requests_per_thread=args.requests,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Logging benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
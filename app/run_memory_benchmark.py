@@ -0,0 +1,48 @@
+"""
+Compare the memory used by the legacy row by row node creation with the
+columnar parcel store, on synthetic parcels.
+
+Example:
+    python app/run_memory_benchmark.py --parcels 100000 --output memory.json
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.memory_benchmark import run_memory_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=100000)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="Parcels per batch of TextNodes materialized from the store",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default="benchmark-work")
+    parser.add_argument("--output", default="memory-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_memory_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Memory benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Run the local OpenAI compatible mock LLM server, for load tests of the App
+(set llm_backend=openai and openai_api_base=http://127.0.0.1:8001/v1 in .env).
+
+Example:
+    python app/run_mock_llm_server.py --port 8001 --latency-ms 800 --max-concurrency 4
+"""
+
+import argparse
+import time
+
+from benchmarks.mock_llm_server import MockLLMServer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--latency-per-token-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=0,
+        help="Requests in flight before answering 429 (0: no limit)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Requests per second before answering 429 (0: no limit)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = MockLLMServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        latency_per_token_ms=args.latency_per_token_ms,
+        max_concurrency=args.max_concurrency,
+        rate_limit=args.rate_limit,
+    ).start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare dense retrieval through the ParcelRetriever (FAISS position -> parcel row
+array, batched parcel nodes) with the AutoMergingRetriever (docstore lookups).
+
+Example:
+    python app/run_parcel_retriever_benchmark.py --parcels 10000 --queries 200
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.parcel_retriever_benchmark import run_parcel_retriever_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--embeddings-llm", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default="benchmark-work/parcel-retriever")
+    parser.add_argument("--output", default="parcel-retriever-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_parcel_retriever_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        num_queries=args.queries,
+        similarity_top_k=args.top_k,
+        embeddings_llm=args.embeddings_llm,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Parcel retriever benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
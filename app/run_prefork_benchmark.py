@@ -0,0 +1,56 @@
+"""
+Measure throughput and memory of the pre-fork serving mode for several worker
+counts, on a synthetic index with a local embedding model and the mock LLM.
+
+Example:
+    python app/run_prefork_benchmark.py --workers 1 2 4 --output prefork.json
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.prefork_benchmark import run_prefork_benchmark
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parcels", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts"
+    )
+    parser.add_argument("--embeddings-llm", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument(
+        "--mock-latency-ms",
+        type=float,
+        default=0.0,
+        help="Fixed generation delay of the mock LLM",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default="benchmark-work/prefork")
+    parser.add_argument("--output", default="prefork-benchmark-results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_prefork_benchmark(
+        work_dir=os.path.abspath(args.work_dir),
+        num_parcels=args.parcels,
+        num_queries=args.queries,
+        levels=tuple(args.workers),
+        embeddings_llm=args.embeddings_llm,
+        mock_latency_ms=args.mock_latency_ms,
+        seed=args.seed,
+    )
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Pre-fork benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,49 @@
 """
 Run the query engine with a sample query.
+
+Stage timings are logged at the end of the run. Use --metrics-file to save them
+as JSON and --profile to run each query under cProfile.
 """
 
+import argparse
+
 from indexes.index_query import QueryEngineSingleton
 from utilities.custom_logger import logger
+from utilities.metrics import registry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--profile", action="store_true", help="Profile each query with cProfile"
+    )
+    parser.add_argument("--metrics-file", help="Write stage timings to this JSON file")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     # Test singleton query engine
     query_engine_instance = QueryEngineSingleton()
     query_list = [
         ("What properties are owned by 'Smith'"),
         ("What properties are owned by 'Smeeth'"),
         ("What properties are owned by 'Smithes'"),
+        ("What is the total market value owned by 'Smith'"),
     ]
     logger.info("Starting Tests...")
     for query_str in query_list:
         logger.info("*" * 50)
-        response = query_engine_instance.query(query_str)
+        response = query_engine_instance.query(query_str, profile=args.profile)
         logger.info(f"Query: {query_str}")
         logger.info("Response:.......")
         logger.info(str(response))
         logger.info("*" * 50)
 
+    registry.log_report()
+    if args.metrics_file:
+        registry.dump(args.metrics_file)
+
 
 if __name__ == "__main__":
     main()
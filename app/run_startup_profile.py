@@ -0,0 +1,58 @@
+"""
+Profile the App startup: per-module import time of gradio_app.app, and the model,
+index and docstore load stages of the query engine (from the .env settings).
+
+Example:
+    python app/run_startup_profile.py --output startup.json
+    python app/run_startup_profile.py --output new.json --compare startup.json
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.startup_profile import compare_startup, run_startup_profile
+from utilities.custom_logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--imports-only",
+        action="store_true",
+        help="Only profile imports, do not load the models and indexes",
+    )
+    parser.add_argument("--top", type=int, default=25, help="Packages/modules listed")
+    parser.add_argument("--output", default="startup-profile.json")
+    parser.add_argument("--compare", help="Baseline profile JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown before a stage counts as regressed",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_startup_profile(load=not args.imports_only, top_n=args.top)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Startup profile written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        regressions = compare_startup(baseline, results, tolerance=args.tolerance)
+        for regression in regressions:
+            logger.error(regression)
+        if regressions:
+            sys.exit(1)
+        logger.info("No startup regressions")
+
+
+if __name__ == "__main__":
+    main()
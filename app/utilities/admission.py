@@ -0,0 +1,196 @@
+"""
+Admission control for a slow, rate limited backend (the LLM synthesis step).
+
+Callers wait in a priority queue for one of `max_concurrency` slots and for a
+token of a token bucket (`rate` requests per second, bursts of `burst`). Waiters
+are ordered by (priority, deadline), lower first, so among equal priorities the
+request closest to its deadline goes next. Every waiter has a deadline: the one
+of the caller, capped at `queue_budget_s` after it was queued. A request is shed
+instead of queued when the queue is full or when the expected wait (requests
+ahead times the average service time, or the rate limit) already exceeds its
+deadline, and it is shed from the queue when its deadline passes. Shed requests
+run the caller's fallback.
+
+Metrics (with the given name as prefix):
+- <name>.admitted, <name>.shed and <name>.shed.<reason> counters
+  (reasons: queue_full, predicted, deadline)
+- <name>.queue_wait histogram: time admitted requests waited, in milliseconds
+- <name>.queue_depth, <name>.active and <name>.shed_rate gauges
+
+Classes:
+- TokenBucket: Thread-safe token bucket.
+- Overloaded: Raised when a request is shed.
+- AdmissionController: The queue, slots and rate limit.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+from utilities.metrics import registry
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = None):
+        """
+        `rate` tokens per second, at most `burst` (default: max(1, rate)) saved up.
+        A rate of 0 or less never limits.
+        """
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """
+        Take a token. Returns 0.0 when one was taken, else the seconds until the
+        next token is available (nothing is taken then).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"Request shed: {reason}")
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str = "admission",
+        max_concurrency: int = 4,
+        rate: float = 0.0,
+        burst: float = None,
+        queue_budget_s: float = 5.0,
+        max_queue: int = 64,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_budget_s = queue_budget_s
+        self.max_queue = max_queue
+        self._bucket = TokenBucket(rate, burst)
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._active = 0
+        # Moving average of the time a slot is held, for the expected wait
+        self._service_s = 0.0
+        self._admitted = 0
+        self._shed = 0
+
+    def _expected_wait(self, ahead: int) -> float:
+        # Called with the lock held; `ahead` waiters are served before this one
+        if ahead == 0 and self._active < self.max_concurrency:
+            return 0.0
+        by_slots = (ahead + 1) * self._service_s / self.max_concurrency
+        by_rate = ahead / self._bucket.rate if self._bucket.rate > 0 else 0.0
+        return max(by_slots, by_rate)
+
+    def _update_gauges(self) -> None:
+        registry.set_gauge(f"{self.name}.queue_depth", len(self._waiting))
+        registry.set_gauge(f"{self.name}.active", self._active)
+        total = self._admitted + self._shed
+        registry.set_gauge(
+            f"{self.name}.shed_rate", self._shed / total if total else 0.0
+        )
+
+    def _reject(self, reason: str) -> Overloaded:
+        # Called with the lock held
+        self._shed += 1
+        self._update_gauges()
+        registry.increment(f"{self.name}.shed")
+        registry.increment(f"{self.name}.shed.{reason}")
+        return Overloaded(reason)
+
+    def acquire(self, priority: int = 0, deadline: float = None) -> float:
+        """
+        Wait for a slot; `deadline` is a time.monotonic() value. Returns the time
+        the slot was taken, to pass to release(). Raises Overloaded when shed.
+        """
+        queued = time.monotonic()
+        budget_deadline = queued + self.queue_budget_s
+        deadline = (
+            budget_deadline if deadline is None else min(deadline, budget_deadline)
+        )
+        with self._condition:
+            if len(self._waiting) >= self.max_queue:
+                raise self._reject("queue_full")
+            ahead = sum(
+                1 for waiter in self._waiting if waiter[:2] <= [priority, deadline]
+            )
+            if queued + self._expected_wait(ahead) > deadline:
+                raise self._reject("predicted")
+            waiter = [priority, deadline, next(self._sequence)]
+            heapq.heappush(self._waiting, waiter)
+            self._update_gauges()
+            while True:
+                wait = None
+                if self._waiting[0] is waiter and self._active < self.max_concurrency:
+                    wait = self._bucket.take()
+                    if wait == 0.0:
+                        heapq.heappop(self._waiting)
+                        self._active += 1
+                        self._admitted += 1
+                        self._update_gauges()
+                        # The next waiter may take another free slot
+                        self._condition.notify_all()
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(waiter)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    raise self._reject("deadline")
+                self._condition.wait(
+                    remaining if wait is None else min(wait, remaining)
+                )
+        admitted = time.monotonic()
+        registry.increment(f"{self.name}.admitted")
+        registry.observe(f"{self.name}.queue_wait", (admitted - queued) * 1000.0)
+        return admitted
+
+    def release(self, admitted: float) -> None:
+        with self._condition:
+            self._active -= 1
+            service_s = time.monotonic() - admitted
+            self._service_s = (
+                service_s
+                if self._service_s == 0.0
+                else 0.8 * self._service_s + 0.2 * service_s
+            )
+            self._update_gauges()
+            self._condition.notify_all()
+
+    def run(
+        self,
+        function: Callable,
+        fallback: Callable[[str], object],
+        priority: int = 0,
+        deadline: float = None,
+    ):
+        """
+        function() once admitted, else fallback(reason) without waiting further.
+        """
+        try:
+            admitted = self.acquire(priority=priority, deadline=deadline)
+        except Overloaded as e:
+            return fallback(e.reason)
+        try:
+            return function()
+        finally:
+            self.release(admitted)
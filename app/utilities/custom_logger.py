@@ -1,14 +1,170 @@
+"""
+Logging setup of the "gradio" logger used by the whole app.
+
+Log calls never do disk or console I/O on the calling (request) thread: the logger
+only has a QueueHandler, and a QueueListener thread writes the records to
+- a size-rotated log file in app/logs (log_max_bytes, log_backup_count),
+- the console.
+Records are plain text or, with log_format="json", one JSON object per line.
+DEBUG records can be sampled (log_debug_sample_rate, e.g. 0.01 keeps 1%), as they
+are the high-volume ones; INFO and above are always kept.
+
+The log_* settings are read from the environment or the .env file.
+A forked child process does not inherit the logging setup: the writer thread does
+not exist there, so the child calls setup_logger for its own.
+"""
+
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 from datetime import datetime
 
+from dotenv import dotenv_values, find_dotenv
+
+log_settings = {
+    "log_level": "INFO",
+    "log_format": "text",
+    "log_max_bytes": str(10 * 1024 * 1024),
+    "log_backup_count": "5",
+    "log_debug_sample_rate": "1.0",
+}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record. Structured fields passed as
+    extra={"json_fields": {...}} (e.g. by metrics spans) are merged in.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "thread": record.threadName,
+        }
+        fields = getattr(record, "json_fields", None)
+        if fields:
+            entry.update(fields)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep all records of level INFO and above, and `rate` of the DEBUG records.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def get_log_settings() -> dict:
+    # The logger is created on import, before load_env_file runs, so read .env here
+    file_values = dotenv_values(find_dotenv())
+    return {
+        key: os.getenv(key) or file_values.get(key) or default
+        for key, default in log_settings.items()
+    }
+
+
+def create_output_handlers(
+    file_path: str,
+    stream=None,
+    log_format: str = "text",
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+) -> list:
+    """
+    The handlers doing the actual I/O: a size-rotated file and the console.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        file_path, maxBytes=max_bytes, backupCount=backup_count
+    )
+    console_handler = logging.StreamHandler(stream)
+
+    # Set a formatter with timestamps
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def attach_queue_handler(
+    target_logger: logging.Logger, handlers: list, debug_sample_rate: float = 1.0
+) -> logging.handlers.QueueListener:
+    """
+    Route the records of `target_logger` through a queue to `handlers`,
+    written by a background listener thread. Returns the started listener.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    target_logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def stop_logging() -> None:
+    """
+    Flush the queued records and stop the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def drop_inherited_logging() -> None:
+    """
+    Run in a forked child: forget the listener and handlers of the parent without
+    flushing or closing them. A handler may have been locked by a write of the
+    parent's writer thread during the fork, and flushing it would hang.
+    """
+    global _listener
+    _listener = None
+    gradio_logger = logging.getLogger("gradio")
+    for handler in gradio_logger.handlers[:]:
+        gradio_logger.removeHandler(handler)
+
+
+def setup_logger(debug_flag=None, log_name: str = "app"):
+    global _listener
+    settings = get_log_settings()
+    if debug_flag is None:
+        debug_flag = logging.getLevelName(settings["log_level"].upper())
 
-def setup_logger(debug_flag=logging.INFO):
     # Get the Gradio logger
     gradio_logger = logging.getLogger("gradio")
     gradio_logger.setLevel(debug_flag)
 
     # Remove existing handlers to prevent duplicate logs
+    stop_logging()
     for handler in gradio_logger.handlers[:]:
         gradio_logger.removeHandler(handler)
 
@@ -18,27 +174,21 @@ def setup_logger(debug_flag=logging.INFO):
     logs_folder = os.path.join(two_levels_up, "logs")
     os.makedirs(logs_folder, exist_ok=True)
 
-    # Add a file handler
+    # File and console handlers, written from the queue listener thread
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_handler = logging.FileHandler(
-        os.path.join(logs_folder, f"app_{timestamp}.log")
+    handlers = create_output_handlers(
+        os.path.join(logs_folder, f"{log_name}_{timestamp}.log"),
+        log_format=settings["log_format"],
+        max_bytes=int(settings["log_max_bytes"]),
+        backup_count=int(settings["log_backup_count"]),
     )
-    file_handler.setLevel(debug_flag)
-
-    # Add a console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(debug_flag)
-
-    # Set a formatter with timestamps
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    for handler in handlers:
+        handler.setLevel(debug_flag)
+    _listener = attach_queue_handler(
+        gradio_logger,
+        handlers,
+        debug_sample_rate=float(settings["log_debug_sample_rate"]),
     )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
-    # Add handlers to the logger
-    gradio_logger.addHandler(file_handler)
-    gradio_logger.addHandler(console_handler)
 
     # Prevent duplicate logs from propagation
     gradio_logger.propagate = False
@@ -48,3 +198,5 @@ def setup_logger(debug_flag=logging.INFO):
 
 # Initialize the logger and make it accessible
 logger = setup_logger()
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=drop_inherited_logging)
@@ -0,0 +1,302 @@
+"""
+In-process metrics registry and timing spans for the query and build paths.
+
+Every `span(...)` records its duration (in milliseconds) into a histogram of the
+module level `registry` and emits a structured (JSON) log record on the
+"gradio.metrics" logger. The registry can be dumped as a dict / JSON file with
+p50/p95/p99 percentiles per stage, and an optional cProfile hook can be switched
+on per request with `profiled(...)`.
+
+Classes:
+- Histogram: Bounded reservoir of samples with count/sum/min/max and percentiles.
+- MetricsRegistry: Thread-safe collection of histograms, counters and gauges,
+  mergeable across processes (export / merge).
+
+Functions:
+- summary_stats(values): Mean and p50/p95/p99 of a list of values.
+- span(name, **fields): Context manager timing a stage.
+- profiled(enabled, name): Context manager running the block under cProfile,
+  one block at a time.
+- reinit_locks(): Fresh locks in a forked child (registered with os.register_at_fork).
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from utilities.custom_logger import logger
+
+# Child of the "gradio" logger, so records go through the same handlers
+metrics_logger = logging.getLogger(f"{logger.name}.metrics")
+
+# Maximum number of samples kept per histogram (most recent samples win)
+MAX_SAMPLES = 10000
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+def summary_stats(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+class Histogram:
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, state: dict) -> None:
+        """
+        Add the samples and totals of another histogram's export().
+        """
+        self._samples.extend(state["samples"])
+        self.count += state["count"]
+        self.total += state["total"]
+        for value in (state["min"], state["max"]):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def export(self) -> dict:
+        return {
+            "samples": list(self._samples),
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    def summary(self) -> dict:
+        values = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> dict:
+        """
+        Return a JSON serialisable view of all metrics.
+        Histogram values are in milliseconds.
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+                "gauges": dict(sorted(self._gauges.items())),
+            }
+
+    def export(self) -> dict:
+        """
+        Picklable raw state (histogram samples included), for merge().
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: histogram.export()
+                    for name, histogram in self._histograms.items()
+                },
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+    def merge(self, state: dict, gauge_prefix: str = "") -> None:
+        """
+        Add the export() of another registry (e.g. of a worker process): samples
+        of histograms with the same name are combined and counters are summed.
+        Gauges are set, prefixed with `gauge_prefix`.
+        """
+        with self._lock:
+            for name, histogram_state in state["histograms"].items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = Histogram()
+                histogram.merge(histogram_state)
+            for name, value in state["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for name, value in state["gauges"].items():
+                self._gauges[f"{gauge_prefix}{name}"] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def dump(self, file_path: str) -> None:
+        with open(file_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        logger.info(f"Metrics written to {file_path}")
+
+    def log_report(self) -> None:
+        """
+        Log one line per histogram with its percentiles, then counters and gauges.
+        """
+        snapshot = self.snapshot()
+        for name, stats in snapshot["histograms"].items():
+            logger.info(
+                f"{name}: count={stats['count']} mean={stats['mean']:.1f}ms "
+                f"p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms "
+                f"p99={stats['p99']:.1f}ms"
+            )
+        for name, value in snapshot["counters"].items():
+            logger.info(f"{name}: {value}")
+        for name, value in snapshot["gauges"].items():
+            logger.info(f"{name}: {value}")
+
+
+# Initialize the registry and make it accessible
+registry = MetricsRegistry()
+
+# Only one cProfile.Profile can be enabled at a time (Python >= 3.12 raises
+# "Another profiling tool is already active" otherwise)
+profile_lock = threading.Lock()
+
+
+def reinit_locks() -> None:
+    """
+    Run in a forked child: a lock held by another thread of the parent during the
+    fork would stay locked in the child forever.
+    """
+    global profile_lock
+    registry._lock = threading.Lock()
+    profile_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=reinit_locks)
+
+
+def record_duration(name: str, duration_ms: float, **fields) -> None:
+    """
+    Record a stage duration measured elsewhere (e.g. by a LlamaIndex callback).
+    """
+    registry.observe(name, duration_ms)
+    if metrics_logger.isEnabledFor(logging.INFO):
+        record = {"span": name, "duration_ms": round(duration_ms, 3), **fields}
+        metrics_logger.info(
+            json.dumps(record, default=str), extra={"json_fields": record}
+        )
+
+
+@contextmanager
+def span(name: str, **fields):
+    """
+    Time the enclosed block and record it under `name`.
+    Extra keyword fields are added to the structured log record.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        record_duration(name, duration_ms, status=status, **fields)
+
+
+@contextmanager
+def profiled(enabled: bool, name: str = "request", top_n: int = 25):
+    """
+    Run the enclosed block under cProfile when `enabled` is set.
+    The raw profile is saved to logs/profiles and the top functions are logged.
+    While another block is being profiled the block is only timed.
+    """
+    if not enabled:
+        yield
+        return
+
+    if not profile_lock.acquire(blocking=False):
+        registry.increment("profile.skipped")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                f"Profiling of {name} skipped, another profile is running "
+                f"({elapsed_ms:.1f} ms)"
+            )
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        yield
+    finally:
+        profiler.disable()
+        profile_lock.release()
+        current_file_path = os.path.abspath(__file__)
+        two_levels_up = os.path.dirname(os.path.dirname(current_file_path))
+        profiles_folder = os.path.join(two_levels_up, "logs", "profiles")
+        os.makedirs(profiles_folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        profile_path = os.path.join(profiles_folder, f"{name}_{timestamp}.prof")
+        profiler.dump_stats(profile_path)
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream).sort_stats("cumulative")
+        stats.print_stats(top_n)
+        logger.info(f"Profile saved to {profile_path}\n{stream.getvalue()}")
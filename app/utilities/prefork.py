@@ -0,0 +1,408 @@
+"""
+Pre-fork worker pool: run a handler in N forked processes that share the memory
+of the parent copy-on-write.
+
+The parent loads everything once (models, FAISS index, docstore), then forks the
+workers. Pages that are only read stay shared between all processes; before
+forking, the garbage collector is disabled and gc.freeze() moves the loaded
+objects out of its generations, so that collections in the workers do not write
+to (and copy) them. Both processes enable the collector again after the fork, and
+the parent unfreezes its objects.
+Each worker handles one request at a time on its own GIL. Requests are sent to
+the worker with the fewest outstanding requests and the results come back on a
+shared queue, read by a collector thread of the parent.
+
+Metrics recorded while handling requests (query stages, LLM admission, ...) live
+in the registry of the worker process. The workers start with an empty registry,
+and `metrics()` asks each of them for its registry and merges them with the one of
+the parent.
+
+Workers that die are replaced (their outstanding requests fail). When
+`generation()` returns a new value (e.g. a new index version was swapped in by the
+parent), the next request forks a new set of workers; the old workers finish their
+queued requests and exit. A worker that stops puts a "done" message on the result
+queue after its last result, so a retired worker is only removed once all of its
+results were read.
+
+Linux only (fork and /proc/<pid>/smaps_rollup for the memory report).
+
+Classes:
+- PreforkPool: The pool, with the merged metrics and the memory of its processes.
+
+Functions:
+- process_memory(pid): Rss/Pss/shared/private memory of a process in MB.
+"""
+
+import gc
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from utilities.custom_logger import logger, setup_logger, stop_logging
+from utilities.metrics import MetricsRegistry, registry
+
+megabyte = 1024 * 1024
+# Seconds to wait for the "done" message of a worker that exited cleanly
+done_timeout = 5.0
+
+
+def process_memory(pid: int) -> dict:
+    """
+    Memory of a process from /proc/<pid>/smaps_rollup, in MB.
+    Pss counts shared pages divided by the number of processes sharing them,
+    so the Pss of all workers adds up to the memory they really use.
+    """
+    fields = {
+        "Rss": "rss_mb",
+        "Pss": "pss_mb",
+        "Shared_Clean": "shared_clean_mb",
+        "Shared_Dirty": "shared_dirty_mb",
+        "Private_Clean": "private_clean_mb",
+        "Private_Dirty": "private_dirty_mb",
+    }
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as file:
+            for line in file:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] = int(value.split()[0]) * 1024 / megabyte
+    except OSError:
+        return {}
+    return memory
+
+
+def limit_native_threads() -> None:
+    """
+    One native thread per worker: the workers are the parallelism, and OpenMP
+    thread pools created in the parent are not usable after fork.
+    """
+    if "faiss" in sys.modules:
+        sys.modules["faiss"].omp_set_num_threads(1)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+@contextmanager
+def frozen_gc():
+    """
+    Fork inside this block. The collector is disabled first, so no collection
+    between freeze() and the fork touches the frozen objects; afterwards the
+    parent unfreezes them and collects its own (e.g. swapped out) objects again.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    gc.freeze()
+    try:
+        yield
+    finally:
+        gc.unfreeze()
+        if was_enabled:
+            gc.enable()
+
+
+def worker_main(index: int, connection, results, handler: Callable) -> None:
+    # Ctrl-C goes to the whole process group, the parent stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Disabled by the parent around the fork; the frozen objects stay frozen here
+    gc.enable()
+    # The log writer thread of the parent does not exist in the fork
+    setup_logger(log_name=f"worker{index}_{os.getpid()}")
+    limit_native_threads()
+    # The metrics copied from the parent are reported by the parent
+    registry.reset()
+    logger.info(f"Worker {index} started (pid {os.getpid()})")
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        task_id, kind, payload = message
+        try:
+            if kind == "metrics":
+                results.put((task_id, True, registry.export()))
+                continue
+            results.put((task_id, True, handler(payload)))
+        except Exception as e:
+            logger.error(f"Worker {index} request failed: {e}")
+            results.put((task_id, False, f"{type(e).__name__}: {e}"))
+    # After the last result: the parent reads all results before forgetting it
+    results.put((None, True, os.getpid()))
+    logger.info(f"Worker {index} stopped")
+    # Forked processes exit without running atexit handlers
+    stop_logging()
+    # Exit here once the results are written: the thread exit hooks copied from
+    # the parent (e.g. of a thread pool that forked this worker) fail in the fork
+    results.close()
+    results.join_thread()
+    os._exit(0)
+
+
+class Worker:
+    def __init__(self, index: int, process, connection):
+        self.index = index
+        self.process = process
+        self.connection = connection
+        self.outstanding = set()
+        self.retiring = False
+        # Its "done" message was read
+        self.done = False
+        # When it was first found dead
+        self.exited_at = None
+
+
+class PreforkPool:
+    def __init__(
+        self,
+        handler: Callable[[Any], Any],
+        num_workers: int,
+        generation: Callable[[], Any] = None,
+    ):
+        """
+        `handler(payload)` runs in the workers and its result is returned to the
+        caller; with fork, neither needs to be picklable, but results must be.
+        """
+        self.handler = handler
+        self.num_workers = num_workers
+        self.generation = generation or (lambda: None)
+        self._context = multiprocessing.get_context("fork")
+        self._results = self._context.Queue()
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._futures = {}
+        self._workers = []
+        self._current_generation = None
+        self._running = False
+        self._collector = None
+
+    def start(self) -> "PreforkPool":
+        with self._lock:
+            self._running = True
+            self._fork_workers()
+        self._collector = threading.Thread(
+            target=self._collect, name="prefork-collector", daemon=True
+        )
+        self._collector.start()
+        return self
+
+    def _fork_workers(self) -> None:
+        # Called with the lock held
+        self._current_generation = self.generation()
+        start = time.perf_counter()
+        with frozen_gc():
+            for index in range(self.num_workers):
+                self._workers.append(self._fork_worker(index))
+        registry.observe("prefork.fork", (time.perf_counter() - start) * 1000)
+        logger.info(
+            f"Forked {self.num_workers} workers "
+            f"(generation {self._current_generation})"
+        )
+
+    def _fork_worker(self, index: int) -> Worker:
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, child_connection, self._results, self.handler),
+            name=f"prefork-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        return Worker(index, process, parent_connection)
+
+    def _retire(self, worker: Worker) -> None:
+        # Requests already sent are handled before the stop message
+        worker.retiring = True
+        try:
+            worker.connection.send(None)
+        except OSError:
+            pass
+
+    def submit(self, payload) -> Future:
+        future = Future()
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Worker pool is not running.")
+            if self.generation() != self._current_generation:
+                for worker in self._workers:
+                    if not worker.retiring:
+                        self._retire(worker)
+                self._fork_workers()
+                registry.increment("prefork.recycles")
+            workers = self._available_workers()
+            if not workers:
+                # Every worker died or is retiring: replace the dead ones first
+                self._reap_workers()
+                workers = self._available_workers()
+            if not workers:
+                self._fork_workers()
+                workers = self._available_workers()
+            worker = min(workers, key=lambda worker: len(worker.outstanding))
+            self._send(worker, "call", payload, future)
+        registry.increment(f"prefork.worker_{worker.index}.requests")
+        return future
+
+    def _available_workers(self) -> list:
+        # Called with the lock held
+        return [
+            worker
+            for worker in self._workers
+            if not worker.retiring and worker.process.is_alive()
+        ]
+
+    def _send(self, worker: Worker, kind: str, payload, future: Future) -> None:
+        # Called with the lock held
+        task_id = next(self._task_ids)
+        self._futures[task_id] = (future, worker, time.perf_counter(), kind)
+        worker.outstanding.add(task_id)
+        worker.connection.send((task_id, kind, payload))
+
+    def call(self, payload, timeout: float = None):
+        """
+        Run `payload` on a worker and return the handler's result.
+        """
+        future = self.submit(payload)
+        ok, result = future.result(timeout=timeout)
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def _collect(self) -> None:
+        while self._running:
+            try:
+                task_id, ok, result = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if task_id is None:
+                # "done" message of a stopped worker, `result` is its pid
+                with self._lock:
+                    for worker in self._workers:
+                        if worker.process.pid == result:
+                            worker.done = True
+                self._check_workers()
+                continue
+            with self._lock:
+                entry = self._futures.pop(task_id, None)
+                if entry is not None:
+                    entry[1].outstanding.discard(task_id)
+            if entry is None:
+                continue
+            future, worker, submitted, kind = entry
+            if kind == "call":
+                registry.observe(
+                    "prefork.request", (time.perf_counter() - submitted) * 1000
+                )
+            future.set_result((ok, result))
+            self._check_workers()
+
+    def _check_workers(self) -> None:
+        with self._lock:
+            self._reap_workers()
+
+    def _reap_workers(self) -> None:
+        # Called with the lock held
+        for worker in list(self._workers):
+            if worker.process.is_alive():
+                continue
+            worker.process.join()
+            if worker.exited_at is None:
+                worker.exited_at = time.monotonic()
+            # A worker that stopped cleanly may still have results in the queue,
+            # they are read before its "done" message
+            if (
+                worker.process.exitcode == 0
+                and not worker.done
+                and time.monotonic() - worker.exited_at < done_timeout
+            ):
+                continue
+            self._workers.remove(worker)
+            failed = [self._futures.pop(task_id) for task_id in worker.outstanding]
+            if worker.retiring and not failed:
+                continue
+            registry.increment("prefork.worker_deaths")
+            logger.error(
+                f"Worker {worker.index} (pid {worker.process.pid}) died with "
+                f"exit code {worker.process.exitcode}, "
+                f"{len(failed)} requests failed"
+            )
+            for future, _, _, _ in failed:
+                future.set_result((False, "Worker process died"))
+            if self._running and not worker.retiring:
+                with frozen_gc():
+                    self._workers.append(self._fork_worker(worker.index))
+
+    def metrics(self, timeout: float = 5.0) -> dict:
+        """
+        registry.snapshot() of the parent and all workers combined: histograms
+        and counters over all processes, gauges of the workers prefixed with
+        "worker_<index>.". A worker answers after its queued requests; workers
+        that do not answer within `timeout` seconds are left out (and counted in
+        the "prefork.metrics_missing" gauge).
+        """
+        with self._lock:
+            requests = []
+            for worker in self._workers:
+                if not worker.retiring:
+                    future = Future()
+                    self._send(worker, "metrics", None, future)
+                    requests.append((worker.index, future))
+        combined = MetricsRegistry()
+        combined.merge(registry.export())
+        deadline = time.monotonic() + timeout
+        missing = 0
+        for index, future in requests:
+            try:
+                ok, state = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                ok = False
+            if ok:
+                combined.merge(state, gauge_prefix=f"worker_{index}.")
+            else:
+                missing += 1
+        combined.set_gauge("prefork.metrics_missing", missing)
+        return combined.snapshot()
+
+    def memory(self) -> dict:
+        """
+        Memory of the parent and of each worker (see process_memory), in MB.
+        """
+        with self._lock:
+            workers = [worker for worker in self._workers if not worker.retiring]
+        report = {"parent": process_memory(os.getpid())}
+        for worker in workers:
+            report[f"worker_{worker.index}"] = process_memory(worker.process.pid)
+        report["total_pss_mb"] = sum(
+            memory.get("pss_mb", 0.0) for memory in report.values()
+        )
+        return report
+
+    def stop(self, timeout: float = 30.0) -> None:
+        with self._lock:
+            self._running = False
+            workers = list(self._workers)
+            for worker in workers:
+                self._retire(worker)
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        with self._lock:
+            self._workers.clear()
+            pending = list(self._futures.values())
+            self._futures.clear()
+        for future, _, _, _ in pending:
+            future.set_result((False, "Worker pool stopped"))
+        if self._collector is not None:
+            self._collector.join()
+        logger.info("Worker pool stopped")
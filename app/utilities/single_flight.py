@@ -0,0 +1,65 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one execution: the first caller runs the
+function, the callers arriving while it runs wait for it and get the same result
+(or exception). Once it finished, the next call with that key runs again, so no
+result is cached beyond the in-flight window.
+
+Counters (with the given name as prefix):
+- <name>.executions: calls that ran the function
+- <name>.coalesced: calls that waited for a running execution instead
+Gauge <name>.in_flight: keys currently executing.
+
+Classes:
+- SingleFlight: The coalescing group.
+
+Functions:
+- normalize_query(text): Key of a query: case, whitespace and trailing punctuation ignored.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+from utilities.metrics import registry
+
+
+def normalize_query(text: str) -> str:
+    """
+    "What properties  are owned by Smith?" -> "what properties are owned by smith"
+    """
+    return " ".join(text.casefold().split()).rstrip("?!. ")
+
+
+class SingleFlight:
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: Hashable, function: Callable):
+        """
+        Return function(), sharing the execution with concurrent calls of `key`.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                registry.set_gauge(f"{self.name}.in_flight", len(self._calls))
+
+        if not leader:
+            registry.increment(f"{self.name}.coalesced")
+            return future.result()
+
+        registry.increment(f"{self.name}.executions")
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+                registry.set_gauge(f"{self.name}.in_flight", len(self._calls))
+        return future.result()
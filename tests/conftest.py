@@ -0,0 +1,20 @@
+"""
+The app modules are imported the way the scripts in app/ import them
+(`from utilities.metrics import ...`), so app/ goes on sys.path.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "app"))
+
+from utilities.metrics import registry  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    registry.reset()
+    yield
+    registry.reset()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from utilities.admission import AdmissionController, Overloaded, TokenBucket
+from utilities.metrics import registry
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=10.0, burst=2)
+    assert bucket.take() == 0.0
+    assert bucket.take() == 0.0
+    wait = bucket.take()
+    assert 0.0 < wait <= 0.1
+    time.sleep(wait + 0.01)
+    assert bucket.take() == 0.0
+
+
+def test_token_bucket_without_rate_never_limits():
+    bucket = TokenBucket(rate=0.0)
+    assert all(bucket.take() == 0.0 for _ in range(100))
+
+
+def test_queue_full_is_shed():
+    controller = AdmissionController(name="test_adm", max_concurrency=1, max_queue=1)
+    admitted = controller.acquire()
+    waiter = threading.Thread(
+        target=controller.run, args=(lambda: None, lambda reason: None)
+    )
+    waiter.start()
+    while registry.snapshot()["gauges"]["test_adm.queue_depth"] < 1:
+        time.sleep(0.01)
+    with pytest.raises(Overloaded) as error:
+        controller.acquire()
+    assert error.value.reason == "queue_full"
+    controller.release(admitted)
+    waiter.join()
+    counters = registry.snapshot()["counters"]
+    assert counters["test_adm.shed.queue_full"] == 1
+    assert counters["test_adm.admitted"] == 2
+
+
+def test_deadline_passing_in_the_queue_runs_the_fallback():
+    controller = AdmissionController(max_concurrency=1, queue_budget_s=0.2)
+    admitted = controller.acquire()
+    result = controller.run(lambda: "ran", fallback=lambda reason: reason)
+    controller.release(admitted)
+    assert result == "deadline"
+    assert controller.run(lambda: "ran", fallback=lambda reason: reason) == "ran"
+
+
+def test_expected_wait_beyond_the_deadline_is_shed_up_front():
+    controller = AdmissionController(max_concurrency=1, queue_budget_s=5.0)
+    # Slots are held for about a second on average
+    controller.release(controller.acquire() - 1.0)
+    admitted = controller.acquire()
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as error:
+        controller.acquire(deadline=time.monotonic() + 0.5)
+    assert error.value.reason == "predicted"
+    assert time.monotonic() - start < 0.1
+    controller.release(admitted)
+
+
+def test_waiters_are_served_by_priority_then_deadline():
+    controller = AdmissionController(max_concurrency=1, queue_budget_s=10.0)
+    admitted = controller.acquire()
+    order = []
+    now = time.monotonic()
+    waiters = [
+        ("low", 1, now + 9.0),
+        ("high_late", 0, now + 9.0),
+        ("high_soon", 0, now + 8.0),
+    ]
+
+    def waiter(name, priority, deadline):
+        controller.run(
+            lambda: order.append(name),
+            fallback=lambda reason: order.append(f"{name}:{reason}"),
+            priority=priority,
+            deadline=deadline,
+        )
+
+    threads = []
+    for args in waiters:
+        threads.append(threading.Thread(target=waiter, args=args))
+        threads[-1].start()
+        # Queue them one by one, in this order
+        while registry.snapshot()["gauges"]["admission.queue_depth"] < len(threads):
+            time.sleep(0.01)
+    controller.release(admitted)
+    for waiter_thread in threads:
+        waiter_thread.join()
+    assert order == ["high_soon", "high_late", "low"]
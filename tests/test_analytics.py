@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+
+from indexes.analytics import (
+    AnalyticsEngine,
+    build_analytics_table,
+    parse_aggregate_question,
+)
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        (
+            "What is the total market value owned by Smith?",
+            ("sum", "current value market", [("owner", "smith")], None),
+        ),
+        (
+            "Average appraised value on Preston Rd by city",
+            (
+                "mean",
+                "current value appraised",
+                [("street", "preston rd")],
+                "situs city",
+            ),
+        ),
+        (
+            "How many properties are in Plano, TX?",
+            ("count", None, [("city", "plano")], None),
+        ),
+        (
+            "how many homes in 75093 built after 2000",
+            ("count", None, [("zip", "75093"), ("built_after", "2000")], None),
+        ),
+        (
+            "highest value by year built",
+            ("max", "current value market", [], "improvement year built"),
+        ),
+    ],
+)
+def test_aggregate_questions_are_parsed(question, expected):
+    query = parse_aggregate_question(question)
+    assert query is not None
+    parsed = (
+        query["aggregation"],
+        query["metric"],
+        query["filters"],
+        query["group_by"],
+    )
+    assert parsed == expected
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Who owns 4001 Camrose Dr?",
+        "Does Smith own a property with a pool?",
+        "What is the total market value of homes built in 2005?",
+        "Average market value for 2023",
+        "How many properties are in Plano and Frisco?",
+        "Which property has the highest market value?",
+    ],
+)
+def test_other_questions_go_to_rag(question):
+    assert parse_aggregate_question(question) is None
+
+
+@pytest.fixture
+def engine(tmp_path):
+    df = pd.DataFrame(
+        {
+            "property ID": ["1", "2", "3", "4"],
+            "owner name": [
+                "SMITH JOHN",
+                "SMITH MARY",
+                "DOE JANE",
+                "CAMROSE HOLDINGS LLC",
+            ],
+            "situs street prefix": ["", "", "", ""],
+            "situs street name": ["PRESTON", "PRESTON", "CAMROSE", "CAMROSE"],
+            "situs street suffix": ["RD", "RD", "DR", "DR"],
+            "situs city": ["PLANO", "FRISCO", "PLANO", "PLANO"],
+            "situs ZIP": ["75093", "75034", "75093", "75093"],
+            "current value market": ["100000", "300000", "200000", "1000000"],
+            "improvement year built": ["1990", "2010", "2005", "2020"],
+        }
+    )
+    build_analytics_table(df, str(tmp_path))
+    return AnalyticsEngine(str(tmp_path))
+
+
+def test_filters_and_group_by(engine):
+    query = parse_aggregate_question("total market value owned by Smith by city")
+    result = engine.run(query)
+    assert result["count"] == 2
+    assert result["groups"] == [("FRISCO", 300000.0, 1), ("PLANO", 100000.0, 1)]
+
+    query = parse_aggregate_question("how many properties in Plano built after 2000")
+    assert engine.run(query)["value"] == 2
+
+
+def test_answer(engine):
+    answer = engine.answer("What is the total market value owned by Smith?")
+    assert "$400,000" in answer
+    assert engine.answer("Who owns 4001 Camrose Dr?") is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # A misspelled owner is left to the fuzzy owner lookup of the pipeline
+        "total market value owned by Smeeth",
+        "how many properties are in Dallas",
+    ],
+)
+def test_filters_matching_nothing_are_not_answered(engine, question):
+    assert parse_aggregate_question(question) is not None
+    assert engine.answer(question) is None
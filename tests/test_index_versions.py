@@ -0,0 +1,43 @@
+import os
+
+from indexes.index_versions import (
+    current_file,
+    new_version_dir,
+    prune_versions,
+    publish_version,
+    resolve_current,
+)
+
+
+def test_persist_dir_without_current_is_used_as_is(tmp_path):
+    assert resolve_current(str(tmp_path)) == str(tmp_path)
+
+
+def test_publish_swaps_the_current_pointer(tmp_path):
+    persist_dir = str(tmp_path)
+    first = new_version_dir(persist_dir)
+    second = new_version_dir(persist_dir)
+    # Versions created within the same second get a suffix
+    assert first != second and os.path.isdir(second)
+
+    publish_version(persist_dir, first)
+    assert resolve_current(persist_dir) == first
+    publish_version(persist_dir, second)
+    assert resolve_current(persist_dir) == second
+    # The pointer is replaced, no temporary file is left behind
+    assert sorted(os.listdir(persist_dir)) == [current_file, "versions"]
+
+
+def test_prune_keeps_the_newest_and_the_current_version(tmp_path):
+    persist_dir = str(tmp_path)
+    versions = [new_version_dir(persist_dir) for _ in range(4)]
+    publish_version(persist_dir, versions[0])
+
+    removed = prune_versions(persist_dir, keep=2)
+
+    assert removed == [os.path.basename(versions[1])]
+    remaining = sorted(os.listdir(os.path.join(persist_dir, "versions")))
+    assert remaining == sorted(
+        os.path.basename(v) for v in (versions[0], *versions[2:])
+    )
+    assert resolve_current(persist_dir) == versions[0]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from utilities import metrics
+from utilities.metrics import (
+    Histogram,
+    MetricsRegistry,
+    percentile,
+    profiled,
+    registry,
+    summary_stats,
+)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 51
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_stats_sorts_its_input():
+    stats = summary_stats([3.0, 1.0, 2.0])
+    assert stats == {"mean": 2.0, "p50": 2.0, "p95": 3.0, "p99": 3.0}
+    assert summary_stats([])["mean"] == 0.0
+
+
+def test_histogram_keeps_the_most_recent_samples():
+    histogram = Histogram(max_samples=3)
+    for value in (100.0, 1.0, 2.0, 3.0):
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert summary["count"] == 4
+    assert summary["max"] == 100.0
+    assert summary["mean"] == 26.5
+    # The percentiles only see the samples kept
+    assert summary["p99"] == 3.0
+
+
+def test_histogram_merge():
+    first, second = Histogram(), Histogram()
+    first.observe(1.0)
+    second.observe(5.0)
+    second.observe(3.0)
+    first.merge(second.export())
+    summary = first.summary()
+    assert (summary["count"], summary["min"], summary["max"]) == (3, 1.0, 5.0)
+    assert summary["p50"] == 3.0
+
+
+def test_registry_merge_sums_counters_and_prefixes_gauges():
+    worker = MetricsRegistry()
+    worker.observe("query.total", 10.0)
+    worker.increment("requests", 2)
+    worker.set_gauge("queue_depth", 4)
+
+    combined = MetricsRegistry()
+    combined.observe("query.total", 20.0)
+    combined.increment("requests")
+    combined.merge(worker.export(), gauge_prefix="worker_0.")
+    snapshot = combined.snapshot()
+    assert snapshot["histograms"]["query.total"]["count"] == 2
+    assert snapshot["counters"] == {"requests": 3}
+    assert snapshot["gauges"] == {"worker_0.queue_depth": 4}
+
+
+def test_profiled_runs_one_profile_at_a_time(tmp_path, monkeypatch):
+    # Profiles are written next to utilities/, keep them out of the tree
+    monkeypatch.setattr(metrics, "__file__", str(tmp_path / "utilities" / "m.py"))
+    started = threading.Barrier(4)
+    errors = []
+
+    def work():
+        try:
+            started.wait()
+            with profiled(True, name="test"):
+                time.sleep(0.2)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert registry.snapshot()["counters"]["profile.skipped"] == 3
+    assert len(list((tmp_path / "logs" / "profiles").iterdir())) == 1
+    # The lock is released again
+    assert not metrics.profile_lock.locked()
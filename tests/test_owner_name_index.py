@@ -0,0 +1,122 @@
+import pytest
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from indexes.owner_name_index import (
+    OwnerNameIndex,
+    OwnerNameRetriever,
+    edit_distance,
+    explicit_owner_query,
+    metaphone,
+    word_max_distance,
+)
+from utilities.metrics import registry
+
+owner_names = [
+    "SMITH JOHN",
+    "SMITHERS MARY",
+    "DAVE LAKE",
+    "KING DAVID",
+    "CAMROSE HOLDINGS LLC",
+    None,
+    "SMITH JOHN",
+]
+
+
+def names(index: OwnerNameIndex, query: str) -> list:
+    return [
+        (owner_names[row], pytest.approx(score)) for row, score in index.lookup(query)
+    ]
+
+
+def test_metaphone():
+    assert metaphone("SMITH") == metaphone("SMEETH") == "SM0"
+    assert metaphone("KNIGHT") == metaphone("NIGHT")
+
+
+def test_edit_distance_counts_transpositions_once():
+    assert edit_distance("SMITH", "SMIHT", 2) == 1
+    assert edit_distance("SMITH", "SMITHES", 2) == 2
+    assert edit_distance("SMITH", "JONES", 2) > 2
+
+
+def test_word_max_distance_grows_with_the_word():
+    assert word_max_distance("DAVE", 2) == 0
+    assert word_max_distance("SMITH", 2) == 1
+    assert word_max_distance("SMITHES", 2) == 2
+    assert word_max_distance("SMITHES", 1) == 1
+
+
+def test_explicit_owner_query():
+    assert explicit_owner_query("What properties are owned by Smeeth") == "Smeeth"
+    assert explicit_owner_query("Properties of 'John Smith'?") == "John Smith"
+    assert explicit_owner_query("4001 Camrose Dr") is None
+
+
+def test_lookup_exact_and_misspelled():
+    index = OwnerNameIndex.from_owner_names(owner_names)
+    # Both parcels of the name, the exact match first
+    assert names(index, "John Smith")[:2] == [("SMITH JOHN", 1.0)] * 2
+    assert names(index, "Smeeth")[0] == ("SMITH JOHN", 0.6)
+    # Phonetic match of a short word
+    assert names(index, "Kyng") == [("KING DAVID", 0.5)]
+    # Two edits from a 7 letter word
+    assert ("SMITH JOHN", 0.6) in names(index, "Smithes")
+    assert names(index, "Smithes")[0] == ("SMITHERS MARY", 0.8)
+
+
+def test_short_words_must_match_exactly():
+    index = OwnerNameIndex.from_owner_names(owner_names)
+    assert [name for name, _ in names(index, "Dave")] == ["DAVE LAKE"]
+    assert names(index, "Dane") == []
+
+
+def test_persist_round_trip(tmp_path):
+    index = OwnerNameIndex.from_owner_names(owner_names)
+    index.persist(str(tmp_path))
+    loaded = OwnerNameIndex.from_persist_dir(str(tmp_path))
+    assert loaded.lookup("Smithes") == index.lookup("Smithes")
+
+
+class Docstore:
+    def get_nodes(self, node_ids):
+        return [
+            TextNode(text=owner_names[int(i)], id_=i, metadata={}) for i in node_ids
+        ]
+
+
+class DenseRetriever:
+    def __init__(self):
+        self.queries = []
+
+    def retrieve(self, query_bundle):
+        self.queries.append(query_bundle.query_str)
+        node = TextNode(text="dense", id_="dense", metadata={})
+        return [NodeWithScore(node=node, score=0.9)]
+
+
+def retrieve(query: str):
+    dense = DenseRetriever()
+    retriever = OwnerNameRetriever(
+        OwnerNameIndex.from_owner_names(owner_names), Docstore(), dense
+    )
+    node_ids = [node.node.node_id for node in retriever._retrieve(QueryBundle(query))]
+    return node_ids, dense.queries
+
+
+def test_exact_owner_query_skips_the_dense_retriever():
+    node_ids, dense_queries = retrieve("What properties are owned by John Smith")
+    assert node_ids[:2] == ["0", "6"]
+    assert dense_queries == []
+    assert registry.snapshot()["counters"]["owner_index.hits"] == 1
+
+
+def test_inexact_owner_query_is_fused_with_dense_results():
+    node_ids, dense_queries = retrieve("What properties are owned by Smithes")
+    assert "dense" in node_ids and "1" in node_ids
+    assert len(dense_queries) == 1
+
+
+def test_query_without_owner_match_uses_the_dense_retriever():
+    node_ids, _ = retrieve("Parcels in the Willow Bend subdivision")
+    assert node_ids == ["dense"]
+    assert registry.snapshot()["counters"]["owner_index.fallbacks"] == 1
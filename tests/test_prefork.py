@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utilities.prefork import PreforkPool
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="fork and /proc are Linux only"
+)
+
+
+def handler(payload):
+    if payload == "fail":
+        raise ValueError("bad payload")
+    if payload == "exit":
+        os._exit(3)
+    time.sleep(0.001)
+    return payload, os.getpid()
+
+
+@pytest.fixture
+def generation():
+    return {"value": 0}
+
+
+@pytest.fixture
+def pool(generation):
+    pool = PreforkPool(
+        handler, num_workers=2, generation=lambda: generation["value"]
+    ).start()
+    yield pool
+    pool.stop(timeout=10)
+
+
+def test_call_returns_the_result_of_a_worker(pool):
+    value, pid = pool.call("hello", timeout=10)
+    assert value == "hello"
+    assert pid != os.getpid()
+
+
+def test_handler_errors_are_raised_to_the_caller(pool):
+    with pytest.raises(RuntimeError, match="ValueError: bad payload"):
+        pool.call("fail", timeout=10)
+    # The worker keeps serving
+    assert pool.call("after", timeout=10)[0] == "after"
+
+
+def test_new_generation_keeps_the_results_of_retiring_workers(pool, generation):
+    with ThreadPoolExecutor(8) as executor:
+        futures = []
+        for i in range(400):
+            if i % 100 == 50:
+                generation["value"] += 1
+            futures.append(executor.submit(pool.call, i, 30))
+        results = [future.result() for future in futures]
+
+    assert [value for value, _ in results] == list(range(400))
+    # 4 generations of 2 workers served the requests
+    assert len({pid for _, pid in results}) > 2
+    deadline = time.monotonic() + 10
+    while len(pool._workers) > 2 and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert len(pool._workers) == 2
+
+
+def test_dead_worker_is_replaced(pool):
+    with pytest.raises(RuntimeError, match="Worker process died"):
+        pool.call("exit", timeout=10)
+    assert pool.call("after", timeout=10)[0] == "after"
+
+
+def test_metrics_of_the_workers_are_merged(pool):
+    for i in range(10):
+        pool.call(i, timeout=10)
+    snapshot = pool.metrics()
+    assert snapshot["histograms"]["prefork.request"]["count"] == 10
+    assert snapshot["gauges"]["prefork.metrics_missing"] == 0
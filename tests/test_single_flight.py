@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from utilities.metrics import registry
+from utilities.single_flight import SingleFlight, normalize_query
+
+
+def test_normalize_query():
+    assert (
+        normalize_query("What properties  are owned by Smith?")
+        == "what properties are owned by smith"
+    )
+
+
+def run_concurrently(count: int, target) -> list:
+    results = [None] * count
+
+    def call(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight("test_flight")
+    calls = []
+    release = threading.Event()
+
+    def function():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    def call():
+        return group.do("key", function)
+
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(5, call)
+
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    counters = registry.snapshot()["counters"]
+    assert counters["test_flight.executions"] == 1
+    assert counters["test_flight.coalesced"] == 4
+    assert registry.snapshot()["gauges"]["test_flight.in_flight"] == 0
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("backend down")
+
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(3, lambda: group.do("key", failing))
+
+    assert all(isinstance(result, ValueError) for result in results)
+    # Once finished, the next call runs again
+    assert group.do("key", lambda: "recovered") == "recovered"
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight()
+    started = threading.Barrier(2, timeout=5)
+
+    def function(value):
+        # Both must be running at the same time to pass the barrier
+        started.wait()
+        return value
+
+    results = run_concurrently(
+        2, lambda: group.do(threading.current_thread().name, lambda: function(1))
+    )
+    assert results == [1, 1]
+
+
+def test_leader_exception_type_is_kept():
+    group = SingleFlight()
+    with pytest.raises(KeyError):
+        group.do("key", lambda: {}["missing"])